@@ -1,8 +1,87 @@
-from django.contrib import admin
-from .models import Profile, Post, Like, Friendship, FriendRequest, Opportunity, Application
+import csv
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from .forms import UploadErrorsMixin
+from .models import Profile, Post, Like, Friendship, FriendRequest, Opportunity, Application, Skill
+from .pagination import keyset_page
+from .uploads import upload_errors
+
+# Inscrições por página na fila de revisão
+REVIEW_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 2000
+
+class Echo:
+    """Buffer falso: o csv.writer devolve cada linha em vez de acumular"""
+    def write(self, value):
+        return value
+
+def stream_applications_csv(request, queryset, filename='inscricoes.csv'):
+    """
+    Exporta as inscrições em CSV linha a linha (StreamingHttpResponse),
+    lendo o banco em blocos, sem montar o arquivo inteiro em memória.
+    """
+    resume_storage = Application._meta.get_field('resume').storage
+    status_labels = dict(Application.STATUS_CHOICES)
+    type_labels = dict(Opportunity.TYPE_CHOICES)
+    rows = queryset.order_by('-applied_at', '-id').values_list(
+        'id', 'applied_at', 'status', 'user__username', 'user__email',
+        'opportunity__title', 'opportunity__type', 'opportunity__company', 'resume', 'cover_letter',
+    )
+    writer = csv.writer(Echo())
+
+    def generate():
+        # BOM para o Excel abrir com acentos corretos
+        yield '\ufeff'
+        yield writer.writerow(['ID', 'Data', 'Status', 'Usuário', 'E-mail', 'Oportunidade', 'Tipo', 'Empresa', 'Currículo', 'Carta de Apresentação'])
+        for pk, applied_at, status, username, email, title, opp_type, company, resume, cover_letter in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield writer.writerow([
+                pk,
+                timezone.localtime(applied_at).strftime('%d/%m/%Y %H:%M'),
+                status_labels.get(status, status),
+                username,
+                email,
+                title,
+                type_labels.get(opp_type, opp_type),
+                company,
+                request.build_absolute_uri(resume_storage.url(resume)) if resume else '',
+                cover_letter,
+            ])
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+class UploadErrorsForm(UploadErrorsMixin, forms.ModelForm):
+    pass
+
+class UploadErrorsAdmin(admin.ModelAdmin):
+    """Arquivo recusado pelo BoundedUploadHandler vira erro no campo em vez de sumir do save"""
+    form = UploadErrorsForm
+    
+    def get_form(self, request, obj=None, **kwargs):
+        form = super().get_form(request, obj, **kwargs)
+        if request.method != 'POST':
+            return form
+        errors = upload_errors(request)
+        
+        class BoundUploadErrorsForm(form):
+            def __init__(self, *args, **kwargs):
+                kwargs.setdefault('upload_errors', errors)
+                super().__init__(*args, **kwargs)
+        
+        return BoundUploadErrorsForm
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(UploadErrorsAdmin):
     list_display = ['user', 'uid', 'bio_preview']
     search_fields = ['user__username', 'user__email', 'uid']
     list_filter = ['user__date_joined']
@@ -16,11 +95,11 @@ class ProfileAdmin(admin.ModelAdmin):
     bio_preview.short_description = 'Bio'
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
-    list_display = ['author', 'content_preview', 'created_at', 'total_likes']
+class PostAdmin(UploadErrorsAdmin):
+    list_display = ['author', 'content_preview', 'created_at', 'like_count']
     search_fields = ['author__username', 'content']
     list_filter = ['created_at']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'like_count']
     date_hierarchy = 'created_at'
     
     def content_preview(self, obj):
@@ -52,9 +131,16 @@ class FriendRequestAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'created_at'
 
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name', 'slug']
+    readonly_fields = ['slug']
+
 @admin.register(Opportunity)
 class OpportunityAdmin(admin.ModelAdmin):
-    list_display = ['title', 'type', 'company', 'status', 'total_applications', 'deadline', 'created_at']
+    list_display = ['title', 'type', 'company', 'status', 'total_applications', 'review_link', 'deadline', 'created_at']
+    list_select_related = ['created_by']
     list_filter = ['type', 'status', 'created_at', 'work_mode']
     search_fields = ['title', 'company', 'description']
     date_hierarchy = 'created_at'
@@ -84,18 +170,29 @@ class OpportunityAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
     
     def total_applications(self, obj):
-        """Mostra total de inscrições"""
-        return obj.total_applications()
+        """Mostra total de inscrições (contador desnormalizado)"""
+        return obj.application_count
     total_applications.short_description = 'Inscrições'
+    total_applications.admin_order_field = 'application_count'
+    
+    def review_link(self, obj):
+        """Atalho para a fila de revisão filtrada pela oportunidade"""
+        url = reverse('admin:global_app_application_review_queue')
+        return format_html('<a href="{}?opportunity={}">Revisar</a>', url, obj.id)
+    review_link.short_description = 'Fila de revisão'
 
 
 @admin.register(Application)
-class ApplicationAdmin(admin.ModelAdmin):
+class ApplicationAdmin(UploadErrorsAdmin):
     list_display = ['user', 'opportunity_title', 'opportunity_type', 'status', 'applied_at']
     list_filter = ['status', 'applied_at', 'opportunity__type']
+    list_select_related = ['user', 'opportunity']
     search_fields = ['user__username', 'user__email', 'opportunity__title']
     date_hierarchy = 'applied_at'
     readonly_fields = ['applied_at', 'updated_at']
+    raw_id_fields = ['opportunity', 'user']
+    # Evita o COUNT(*) da tabela inteira a cada página
+    show_full_result_count = False
     
     fieldsets = (
         ('Informações da Inscrição', {
@@ -123,22 +220,122 @@ class ApplicationAdmin(admin.ModelAdmin):
         return obj.opportunity.get_type_display()
     opportunity_type.short_description = 'Tipo'
     
-    actions = ['mark_as_reviewing', 'mark_as_accepted', 'mark_as_rejected']
+    actions = ['mark_as_reviewing', 'mark_as_accepted', 'mark_as_rejected', 'export_csv']
     
     def mark_as_reviewing(self, request, queryset):
         """Marca inscrições como 'Em Análise'"""
-        updated = queryset.update(status='reviewing')
+        updated = queryset.update(status='reviewing', updated_at=timezone.now())
         self.message_user(request, f'{updated} inscrição(ões) marcada(s) como Em Análise.')
     mark_as_reviewing.short_description = 'Marcar como Em Análise'
     
     def mark_as_accepted(self, request, queryset):
         """Marca inscrições como 'Aceito'"""
-        updated = queryset.update(status='accepted')
+        updated = queryset.update(status='accepted', updated_at=timezone.now())
         self.message_user(request, f'{updated} inscrição(ões) aceita(s).')
     mark_as_accepted.short_description = 'Marcar como Aceito'
     
     def mark_as_rejected(self, request, queryset):
         """Marca inscrições como 'Rejeitado'"""
-        updated = queryset.update(status='rejected')
+        updated = queryset.update(status='rejected', updated_at=timezone.now())
         self.message_user(request, f'{updated} inscrição(ões) rejeitada(s).')
-    mark_as_rejected.short_description = 'Marcar como Rejeitado'
\ No newline at end of file
+    mark_as_rejected.short_description = 'Marcar como Rejeitado'
+    
+    def export_csv(self, request, queryset):
+        """Exporta as inscrições selecionadas em CSV"""
+        return stream_applications_csv(request, queryset.select_related(None))
+    export_csv.short_description = 'Exportar selecionadas (CSV)'
+    
+    def get_urls(self):
+        urls = [
+            path('review-queue/', self.admin_site.admin_view(self.review_queue_view), name='global_app_application_review_queue'),
+            path('review-queue/export/', self.admin_site.admin_view(self.review_export_view), name='global_app_application_review_export'),
+        ]
+        return urls + super().get_urls()
+    
+    def _review_filters(self, request):
+        """Filtros da fila de revisão vindos da query string"""
+        filters = {}
+        opportunity = request.GET.get('opportunity', '')
+        if opportunity.isdigit():
+            filters['opportunity_id'] = int(opportunity)
+        opportunity_type = request.GET.get('type', '')
+        if opportunity_type in dict(Opportunity.TYPE_CHOICES):
+            filters['opportunity__type'] = opportunity_type
+        return filters
+    
+    def _review_status(self, request):
+        status = request.GET.get('status', 'pending')
+        return status if status in dict(Application.STATUS_CHOICES) else ''
+    
+    def review_queue_view(self, request):
+        """
+        Fila de revisão: contagem por status numa única query agregada,
+        paginação por cursor (applied_at, id) e alteração de status em lote
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        
+        if request.method == 'POST':
+            if not self.has_change_permission(request):
+                raise PermissionDenied
+            new_status = request.POST.get('new_status')
+            ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+            if new_status in dict(Application.STATUS_CHOICES) and ids:
+                updated = Application.objects.filter(id__in=ids).update(status=new_status, updated_at=timezone.now())
+                self.message_user(request, f'{updated} inscrição(ões) atualizada(s).')
+            else:
+                self.message_user(request, 'Selecione inscrições e um novo status.', messages.WARNING)
+            return redirect(request.get_full_path())
+        
+        filters = self._review_filters(request)
+        status = self._review_status(request)
+        base = Application.objects.filter(**filters)
+        
+        status_counts = base.aggregate(**{
+            value: Count('id', filter=Q(status=value)) for value, _ in Application.STATUS_CHOICES
+        })
+        
+        queryset = base.filter(status=status) if status else base
+        applications, next_cursor = keyset_page(
+            queryset.select_related('user', 'opportunity').only(
+                'id', 'status', 'applied_at', 'resume',
+                'user__username', 'user__email', 'opportunity__title', 'opportunity__type',
+            ),
+            request.GET.get('cursor'),
+            REVIEW_PAGE_SIZE,
+            date_field='applied_at',
+        )
+        
+        query = request.GET.copy()
+        query.pop('cursor', None)
+        opportunity = None
+        if 'opportunity_id' in filters:
+            opportunity = Opportunity.objects.filter(id=filters['opportunity_id']).only('id', 'title').first()
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Fila de revisão de inscrições',
+            'applications': applications,
+            'next_cursor': next_cursor,
+            'base_query': query.urlencode(),
+            'status_choices': [
+                (value, label, status_counts[value]) for value, label in Application.STATUS_CHOICES
+            ],
+            'type_choices': Opportunity.TYPE_CHOICES,
+            'current_status': status,
+            'current_type': request.GET.get('type', ''),
+            'opportunity': opportunity,
+            'export_url': f"{reverse('admin:global_app_application_review_export')}?{request.GET.urlencode()}",
+        }
+        return TemplateResponse(request, 'admin/global_app/application/review_queue.html', context)
+    
+    def review_export_view(self, request):
+        """Exporta em CSV todas as inscrições dos filtros atuais da fila"""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        queryset = Application.objects.filter(**self._review_filters(request))
+        status = self._review_status(request)
+        if status:
+            queryset = queryset.filter(status=status)
+        return stream_applications_csv(request, queryset)
@@ -6,4 +6,7 @@ class GlobalAppConfig(AppConfig):
     name = 'global_app'
 
     def ready(self):
-        import global_app.signals
\ No newline at end of file
+        import global_app.signals
+        from global_app.expiry import sweeper
+        if sweeper is not None:
+            sweeper.start()
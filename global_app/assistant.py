@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AIChatMessage, AIChatSession
+
+logger = logging.getLogger(__name__)
+
+# Mensagens anteriores enviadas ao modelo como contexto
+CONTEXT_MESSAGES = 20
+MAX_PROMPT_LENGTH = 4000
+TITLE_LENGTH = 60
+
+# Threads que avançam o gerador do provedor quando a resposta sai pelo ASGI
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'WORK_AI_WORKERS', 8),
+    thread_name_prefix='work_ai',
+)
+
+
+class Provider(ABC):
+    """
+    Modelo que responde ao assistente. Um provedor externo implementa
+    stream() com a API de streaming dele.
+    """
+
+    @abstractmethod
+    def stream(self, messages):
+        """
+        Recebe o histórico ([{'role': ..., 'content': ...}], o último é a
+        pergunta) e devolve um gerador com os pedaços da resposta conforme
+        ficam prontos.
+        """
+
+
+class LocalProvider(Provider):
+    """
+    Provedor local e determinístico (a mesma pergunta gera a mesma
+    resposta), para desenvolvimento e testes. WORK_AI_STREAM_DELAY simula
+    o tempo entre tokens de um modelo de verdade.
+    """
+
+    TOPICS = [
+        (('currículo', 'curriculo', 'cv'),
+         'Para o currículo, comece por um resumo de duas linhas com sua área e seus resultados. '
+         'Liste as experiências da mais recente para a mais antiga e destaque as habilidades pedidas na vaga.'),
+        (('entrevista',),
+         'Para a entrevista, pesquise a empresa, prepare exemplos no formato situação, ação e resultado '
+         'e leve duas ou três perguntas sobre o time e os desafios da vaga.'),
+        (('vaga', 'oportunidade', 'emprego'),
+         'Na página de Oportunidades você encontra as vagas abertas e as recomendadas para o seu perfil. '
+         'Manter suas habilidades atualizadas no perfil melhora as recomendações.'),
+        (('transição', 'transicao', 'carreira'),
+         'Em uma transição de carreira, mapeie as habilidades que você já tem e que valem na nova área, '
+         'faça projetos pequenos para mostrar no portfólio e converse com quem já trabalha nela.'),
+    ]
+    DEFAULT = 'Posso ajudar com currículo, entrevistas, vagas e planos de carreira. Sobre "{question}": '
+
+    def __init__(self, delay=None):
+        self.delay = getattr(settings, 'WORK_AI_STREAM_DELAY', 0) if delay is None else delay
+
+    def answer(self, question):
+        lowered = question.lower()
+        parts = [text for keywords, text in self.TOPICS if any(keyword in lowered for keyword in keywords)]
+        if not parts:
+            parts = [self.DEFAULT.format(question=question[:80]) + self.TOPICS[0][1]]
+        return ' '.join(parts)
+
+    def stream(self, messages):
+        # Um token por palavra, mantendo os espaços
+        for token in re.findall(r'\S+\s*', self.answer(messages[-1]['content'])):
+            if self.delay:
+                time.sleep(self.delay)
+            yield token
+
+
+_provider = None
+
+
+def get_provider():
+    """Provedor configurado em WORK_AI_PROVIDER (padrão: LocalProvider)"""
+    global _provider
+    if _provider is None:
+        _provider = import_string(getattr(settings, 'WORK_AI_PROVIDER', 'global_app.assistant.LocalProvider'))()
+    return _provider
+
+
+def start_turn(user, content, session_id=None):
+    """
+    Grava a pergunta (criando a sessão se preciso) e retorna a sessão e o
+    histórico que vai para o modelo. None se a sessão não é do usuário.
+    """
+    with transaction.atomic():
+        if session_id:
+            session = AIChatSession.objects.select_for_update().filter(id=session_id, user=user).first()
+            if session is None:
+                return None, None
+        else:
+            session = AIChatSession.objects.create(user=user, title=content[:TITLE_LENGTH])
+        AIChatMessage.objects.create(session=session, role='user', content=content)
+        AIChatSession.objects.filter(id=session.id).update(updated_at=timezone.now())
+
+    history = list(
+        AIChatMessage.objects.filter(session=session).order_by('-id').values('role', 'content')[:CONTEXT_MESSAGES]
+    )
+    return session, history[::-1]
+
+
+def finish_turn(session_id, content):
+    """Grava a resposta do assistente (também a parcial, se o cliente saiu)"""
+    if not content:
+        return None
+    with transaction.atomic():
+        message = AIChatMessage.objects.create(session_id=session_id, role='assistant', content=content)
+        AIChatSession.objects.filter(id=session_id).update(updated_at=timezone.now())
+    return message
+
+
+def sse(data, event=None):
+    """Um evento no formato text/event-stream"""
+    prefix = f'event: {event}\n' if event else ''
+    return f'{prefix}data: {json.dumps(data)}\n\n'
+
+
+class ResponseStream:
+    """
+    Corpo do StreamingHttpResponse: primeiro o evento da sessão (sai antes
+    de o modelo responder, o que mantém o tempo até o primeiro byte baixo),
+    depois um evento por pedaço da resposta e por fim o "done". Os tempos
+    até o primeiro byte e até o primeiro token vão para o log.
+    """
+
+    def __init__(self, session, history, provider, started):
+        self.session = session
+        self.history = history
+        self.provider = provider
+        self.started = started
+        self.parts = []
+
+    def _elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def _header(self):
+        logger.info('work_ai sessão %s: primeiro byte em %.1fms', self.session.id, self._elapsed_ms())
+        return sse({'session': self.session.id, 'title': self.session.title}, event='session')
+
+    def _chunk(self, text):
+        if not self.parts:
+            logger.info('work_ai sessão %s: primeiro token em %.1fms', self.session.id, self._elapsed_ms())
+        self.parts.append(text)
+        return sse({'delta': text})
+
+    def _done(self, message):
+        logger.info('work_ai sessão %s: resposta completa em %.1fms', self.session.id, self._elapsed_ms())
+        return sse({'message': message.id if message else None}, event='done')
+
+    def __iter__(self):
+        yield self._header()
+        chunks = self.provider.stream(self.history)
+        finished = False
+        try:
+            for text in chunks:
+                yield self._chunk(text)
+            finished = True
+            yield self._done(finish_turn(self.session.id, ''.join(self.parts)))
+        except Exception:
+            logger.exception('Falha no provedor do work_ai')
+            yield sse({'error': 'Não foi possível gerar a resposta.'}, event='error')
+        finally:
+            # Cliente saiu no meio: o provedor libera a conexão com o modelo
+            _close_stream(chunks)
+            if not finished:
+                finish_turn(self.session.id, ''.join(self.parts))
+
+    async def __aiter__(self):
+        # Sob ASGI o provedor (síncrono) roda numa thread, um pedaço por vez,
+        # sem acumular a resposta inteira antes de enviar
+        yield self._header()
+        chunks = self.provider.stream(self.history)
+        pending = None
+        finished = False
+        try:
+            while True:
+                pending = _executor.submit(next, chunks, None)
+                text = await asyncio.wrap_future(pending)
+                if text is None:
+                    break
+                yield self._chunk(text)
+            finished = True
+            yield self._done(await sync_to_async(finish_turn)(self.session.id, ''.join(self.parts)))
+        except Exception:
+            logger.exception('Falha no provedor do work_ai')
+            yield sse({'error': 'Não foi possível gerar a resposta.'}, event='error')
+        finally:
+            # Cancelado (cliente desconectou): espera o next() em andamento e fecha o gerador
+            await sync_to_async(_close_stream, thread_sensitive=False)(chunks, pending)
+            if not finished:
+                await sync_to_async(finish_turn)(self.session.id, ''.join(self.parts))
+
+
+def _close_stream(chunks, pending=None):
+    if pending is not None:
+        wait([pending])
+    close = getattr(chunks, 'close', None)
+    if close is not None:
+        close()
+
+
+def response_stream(request, session, history, started, provider=None):
+    """Iterador síncrono (WSGI) ou assíncrono (ASGI), conforme o servidor"""
+    stream = ResponseStream(session, history, provider or get_provider(), started)
+    return stream.__aiter__() if isinstance(request, ASGIRequest) else iter(stream)
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Broker(ABC):
+    """
+    Interface de publicação/assinatura usada pelo tempo real. Cada
+    assinatura é uma asyncio.Queue que recebe as mensagens publicadas no
+    canal. Um broker entre processos (Redis, por exemplo) implementa os
+    mesmos três métodos.
+    """
+
+    @abstractmethod
+    async def subscribe(self, channel, queue):
+        """Passa a colocar na fila as mensagens publicadas no canal"""
+
+    @abstractmethod
+    async def unsubscribe(self, channel, queue):
+        """Desfaz o subscribe (a fila deixa de receber)"""
+
+    @abstractmethod
+    async def publish(self, channel, message):
+        """Entrega a mensagem a todos os assinantes do canal"""
+
+
+class LocalBroker(Broker):
+    """
+    Broker dentro do processo: publicar é colocar a mensagem na fila de
+    cada assinante, sem rede nem serialização. Serve para um worker só e
+    para testes.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    async def subscribe(self, channel, queue):
+        self._subscribers.setdefault(channel, set()).add(queue)
+
+    async def unsubscribe(self, channel, queue):
+        subscribers = self._subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    async def publish(self, channel, message):
+        delivered = 0
+        for queue in list(self._subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(message)
+                delivered += 1
+            except asyncio.QueueFull:
+                # Cliente lento: descarta para não atrasar os outros
+                logger.warning('Fila cheia no canal %s, mensagem descartada', channel)
+        return delivered
+
+    def subscriber_count(self, channel):
+        return len(self._subscribers.get(channel, ()))
+
+
+_broker = None
+
+
+def get_broker():
+    """Broker configurado em CHAT_BROKER (padrão: LocalBroker)"""
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'CHAT_BROKER', 'global_app.broker.LocalBroker'))()
+    return _broker
@@ -0,0 +1,328 @@
+import asyncio
+import atexit
+import logging
+import threading
+import uuid
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.utils import timezone
+
+from .broker import get_broker
+from .models import Conversation, ConversationParticipant, Message
+from .websocket import route
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SIZE = 50
+MAX_MESSAGE_LENGTH = 2000
+# Mensagens aguardando envio por conexão; acima disso o cliente é lento demais
+CONNECTION_QUEUE_SIZE = 100
+# Intervalo (segundos) entre gravações do MessageBuffer
+FLUSH_INTERVAL = getattr(settings, 'CHAT_FLUSH_INTERVAL', 0.1)
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def serialize_message(message, sender_name):
+    return {
+        'id': message.id,
+        'uid': message.uid,
+        'conversation': message.conversation_id,
+        'sender': message.sender_id,
+        'sender_name': sender_name,
+        'content': message.content,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+def recent_messages(conversation, limit=HISTORY_SIZE, before=None):
+    """
+    Mensagens da conversa em ordem cronológica: as últimas, ou as anteriores
+    ao id `before`. Percorre o índice (conversation, id) só pelo tamanho da página.
+    """
+    queryset = Message.objects.filter(conversation=conversation)
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    messages = list(queryset.select_related('sender').order_by('-id')[:limit])
+    return messages[::-1]
+
+
+def participant_ids(conversation_id, user_id):
+    """Participantes da conversa, ou None se o usuário não faz parte dela"""
+    ids = list(ConversationParticipant.objects.filter(conversation_id=conversation_id).values_list('user_id', flat=True))
+    return ids if user_id in ids else None
+
+
+class MessageBuffer:
+    """
+    Write-behind das mensagens do chat: a mensagem é entregue na hora e
+    gravada depois, em lote, por tempo (FLUSH_INTERVAL) ou por tamanho
+    (max_pending). Um flush é uma transação com um INSERT das mensagens,
+    os contadores de não lidas e o updated_at das conversas.
+
+    Se o lote falha por um dado inválido (a conversa ou o remetente foi
+    apagado), as mensagens são gravadas uma a uma e só as inválidas vão para
+    o log e são descartadas. Outros erros (banco fora do ar, travado) voltam
+    o lote para o buffer, e o próximo flush tenta de novo: as mensagens já
+    foram entregues e não podem sumir do histórico por uma trava passageira.
+    O buffer guarda no máximo max_buffered mensagens.
+    """
+
+    # Erros do próprio dado: tentar de novo não adianta
+    INVALID = (IntegrityError, DataError)
+
+    def __init__(self, max_pending=200, max_buffered=10000):
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        self._lock = threading.Lock()
+        self._pending = []
+        self._failures = 0
+
+    def add(self, conversation_id, sender, content, participants):
+        """Enfileira a mensagem; retorna (mensagem, precisa_gravar_já)"""
+        message = Message(
+            conversation_id=conversation_id,
+            sender=sender,
+            content=content,
+            uid=uuid.uuid4().hex,
+            created_at=timezone.now(),
+        )
+        with self._lock:
+            self._pending.append((message, participants))
+            return message, len(self._pending) >= self.max_pending
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def _write(self, pending):
+        """Grava o lote numa única transação"""
+        # Não lidas: cada mensagem conta para todos os participantes menos o remetente
+        unread = Counter()
+        last_message_at = {}
+        for message, participants in pending:
+            last_message_at[message.conversation_id] = message.created_at
+            for user_id in participants:
+                if user_id != message.sender_id:
+                    unread[(message.conversation_id, user_id)] += 1
+        increments = defaultdict(list)
+        for (conversation_id, user_id), amount in unread.items():
+            increments[(conversation_id, amount)].append(user_id)
+
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create([message for message, participants in pending])
+                for (conversation_id, amount), user_ids in increments.items():
+                    ConversationParticipant.objects.filter(conversation_id=conversation_id, user_id__in=user_ids).update(
+                        unread_count=F('unread_count') + amount
+                    )
+                Conversation.objects.filter(id__in=last_message_at.keys()).update(
+                    updated_at=Case(
+                        *[When(id=conversation_id, then=Value(when)) for conversation_id, when in last_message_at.items()],
+                        output_field=DateTimeField(),
+                    )
+                )
+        except Exception:
+            # O rollback desfaz o INSERT: as mensagens voltam a ser novas
+            for message, participants in pending:
+                message.pk = None
+                message._state.adding = True
+            raise
+
+    def _write_each(self, pending):
+        """Grava mensagem por mensagem, descartando as inválidas"""
+        written = 0
+        for position, item in enumerate(pending):
+            try:
+                self._write([item])
+            except self.INVALID:
+                message = item[0]
+                logger.exception(
+                    'Mensagem do chat descartada (uid=%s, conversa=%s, remetente=%s)',
+                    message.uid, message.conversation_id, message.sender_id,
+                )
+            except Exception:
+                # O banco travou no meio: o resto volta para o buffer
+                self._requeue(pending[position:])
+                break
+            else:
+                written += 1
+        return written
+
+    def _requeue(self, pending):
+        """Devolve ao buffer (na frente, mantendo a ordem) para o próximo flush"""
+        self._failures += 1
+        logger.exception('Falha ao gravar mensagens do chat (%s tentativa(s) seguidas)', self._failures)
+        with self._lock:
+            self._pending[:0] = pending
+            excess = len(self._pending) - self.max_buffered
+            if excess > 0:
+                # Banco fora do ar por muito tempo: descarta as mais antigas
+                del self._pending[:excess]
+                logger.error('Buffer do chat cheio: %s mensagens descartadas', excess)
+
+    def flush(self):
+        """Grava as mensagens pendentes; retorna quantas foram gravadas"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        if not pending:
+            return 0
+
+        try:
+            self._write(pending)
+        except self.INVALID:
+            # Uma mensagem inválida não pode travar as outras
+            logger.warning('Lote do chat com mensagem inválida; gravando uma a uma')
+            written = self._write_each(pending)
+        except Exception:
+            self._requeue(pending)
+            return 0
+        else:
+            written = len(pending)
+        if written:
+            self._failures = 0
+        return written
+
+
+message_buffer = MessageBuffer(max_pending=getattr(settings, 'CHAT_MAX_PENDING', 200))
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        message_buffer.flush()
+    except Exception:
+        pass
+
+
+def mark_read(conversation_id, user_id):
+    """Zera as não lidas do participante (depois de gravar o que está no buffer)"""
+    message_buffer.flush()
+    return ConversationParticipant.objects.filter(conversation_id=conversation_id, user_id=user_id).update(unread_count=0)
+
+
+def unread_counts(user):
+    """{conversation_id: não lidas} das conversas do usuário com mensagens novas"""
+    return dict(
+        ConversationParticipant.objects.filter(user=user, unread_count__gt=0)
+        .values_list('conversation_id', 'unread_count')
+    )
+
+
+# Um flusher por event loop: acorda a cada FLUSH_INTERVAL ou quando o buffer enche
+_flushers = {}
+
+
+async def _flush_loop(wake):
+    while True:
+        try:
+            await asyncio.wait_for(wake.wait(), FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+        if message_buffer.pending_count():
+            await sync_to_async(message_buffer.flush)()
+
+
+def _flusher_wake():
+    loop = asyncio.get_running_loop()
+    for other in [other for other, (task, wake) in _flushers.items() if task.done()]:
+        del _flushers[other]
+    if loop not in _flushers:
+        wake = asyncio.Event()
+        _flushers[loop] = (loop.create_task(_flush_loop(wake)), wake)
+    return _flushers[loop][1]
+
+
+async def _forward(websocket, queue):
+    """Envia para o cliente o que chega na fila da conexão"""
+    try:
+        while True:
+            await websocket.send_json(await queue.get())
+    except Exception:
+        # Conexão fechada: o loop de leitura encerra a assinatura
+        pass
+
+
+class ChatConnection:
+    """Estado de uma conexão do chat (participantes já conferidos por conversa)"""
+
+    def __init__(self, websocket, broker):
+        self.websocket = websocket
+        self.broker = broker
+        self.user = websocket.user
+        self._participants = {}
+
+    async def participants(self, conversation_id):
+        if conversation_id not in self._participants:
+            self._participants[conversation_id] = await sync_to_async(participant_ids)(conversation_id, self.user.id)
+        return self._participants[conversation_id]
+
+    async def handle(self, data):
+        if data.get('type') == 'message':
+            await self.send_message(data)
+        elif data.get('type') == 'read':
+            await self.mark_read(data)
+        else:
+            await self.websocket.send_json({'type': 'error', 'error': 'Tipo de mensagem desconhecido'})
+
+    async def send_message(self, data):
+        content = str(data.get('content', '')).strip()
+        try:
+            conversation_id = int(data.get('conversation'))
+        except (TypeError, ValueError):
+            conversation_id = None
+
+        if not content or len(content) > MAX_MESSAGE_LENGTH:
+            await self.websocket.send_json({'type': 'error', 'error': 'Mensagem vazia ou longa demais'})
+            return
+        participants = await self.participants(conversation_id) if conversation_id else None
+        if not participants:
+            await self.websocket.send_json({'type': 'error', 'error': 'Conversa não encontrada'})
+            return
+
+        message, flush_now = message_buffer.add(conversation_id, self.user, content, participants)
+        if flush_now:
+            _flusher_wake().set()
+        payload = {'type': 'message', 'message': serialize_message(message, self.user.get_full_name() or self.user.username)}
+        # Todos os participantes, inclusive as outras abas de quem enviou
+        for user_id in participants:
+            await self.broker.publish(user_channel(user_id), payload)
+
+    async def mark_read(self, data):
+        try:
+            conversation_id = int(data.get('conversation'))
+        except (TypeError, ValueError):
+            return
+        if await self.participants(conversation_id):
+            await sync_to_async(mark_read)(conversation_id, self.user.id)
+
+
+@route('/ws/chat/')
+async def chat_socket(websocket):
+    """
+    Uma conexão por aba. Cada usuário assina o próprio canal no broker;
+    uma mensagem enviada é publicada no canal de cada participante e
+    gravada pelo MessageBuffer logo depois.
+    """
+    await websocket.accept()
+    _flusher_wake()
+    broker = get_broker()
+    channel = user_channel(websocket.user.id)
+    queue = asyncio.Queue(maxsize=CONNECTION_QUEUE_SIZE)
+    await broker.subscribe(channel, queue)
+    forwarder = asyncio.create_task(_forward(websocket, queue))
+    connection = ChatConnection(websocket, broker)
+
+    try:
+        while True:
+            await connection.handle(await websocket.receive_json())
+    finally:
+        forwarder.cancel()
+        await broker.unsubscribe(channel, queue)
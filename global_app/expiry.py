@@ -0,0 +1,73 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Opportunity
+from . import matching
+
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) do fechamento automático no próprio processo.
+# None desliga; nesse caso agende o comando close_expired_opportunities
+SWEEP_INTERVAL = getattr(settings, 'OPPORTUNITY_EXPIRY_SWEEP_INTERVAL', None)
+
+
+def close_expired(batch_size=500, today=None):
+    """
+    Fecha as oportunidades abertas com prazo vencido, em lotes pelo índice
+    (status, deadline). Retorna quantas foram fechadas.
+    """
+    today = today or timezone.localdate()
+    closed = 0
+
+    while True:
+        ids = list(
+            Opportunity.objects.filter(status='open', deadline__lt=today)
+            .order_by('deadline', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        with transaction.atomic():
+            closed += Opportunity.objects.filter(id__in=ids, status='open').update(
+                status='closed', updated_at=timezone.now()
+            )
+        # O update não dispara signals: tira da matriz de recomendação
+        for opportunity_id in ids:
+            matching.index.mark_dirty(opportunity_id)
+
+    return closed
+
+
+class ExpirySweeper:
+    """Executa close_expired a cada interval segundos numa thread daemon"""
+
+    def __init__(self, interval, batch_size=500):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='opportunity-expiry', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                closed = close_expired(self.batch_size)
+                if closed:
+                    logger.info('%s oportunidade(s) vencida(s) fechada(s)', closed)
+            except Exception:
+                logger.exception('Falha ao fechar oportunidades vencidas')
+
+
+sweeper = ExpirySweeper(SWEEP_INTERVAL) if SWEEP_INTERVAL else None
@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
-from .models import Post, Profile
+from .models import Application, Post, Profile
 
 class SignUpForm(UserCreationForm):
     email = forms.EmailField(required=True, widget=forms.EmailInput(attrs={'autocomplete': 'email'}))
@@ -18,7 +18,20 @@ class SignUpForm(UserCreationForm):
             raise forms.ValidationError("Já existe uma conta com este e-mail.")
         return email
 
-class PostForm(forms.ModelForm):
+class UploadErrorsMixin:
+    """Mostra no campo os arquivos recusados pelo BoundedUploadHandler (uploads.upload_errors)"""
+    
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        self.upload_errors = upload_errors or {}
+        super().__init__(*args, **kwargs)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, message in self.upload_errors.items():
+            self.add_error(field if field in self.fields else None, message)
+        return cleaned_data
+
+class PostForm(UploadErrorsMixin, forms.ModelForm):
     class Meta:
         model = Post
         fields = ['content', 'image']
@@ -39,7 +52,13 @@ class PostForm(forms.ModelForm):
             'image': 'Imagem (opcional)'
         }
 
-class ProfileEditForm(forms.ModelForm):
+class ApplicationForm(UploadErrorsMixin, forms.ModelForm):
+    """Inscrição em uma oportunidade (carta e currículo opcionais)"""
+    class Meta:
+        model = Application
+        fields = ['cover_letter', 'resume']
+
+class ProfileEditForm(UploadErrorsMixin, forms.ModelForm):
     # Campos do User
     first_name = forms.CharField(
         max_length=150,
@@ -90,6 +109,17 @@ class ProfileEditForm(forms.ModelForm):
         help_text='Máximo 500 caracteres'
     )
     
+    skills = forms.CharField(
+        required=False,
+        label='Habilidades',
+        max_length=500,
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Ex: Python, Django, SQL'
+        }),
+        help_text='Separe por vírgula'
+    )
+    
     # Campos de redes sociais
     facebook_url = forms.URLField(
         required=False,
@@ -154,6 +184,10 @@ class ProfileEditForm(forms.ModelForm):
                     field_name = f'{network}_url'
                     if field_name in self.fields:
                         self.fields[field_name].initial = url
+        
+        # Preencher habilidades a partir das tags do perfil
+        if self.instance and self.instance.pk:
+            self.fields['skills'].initial = ', '.join(skill.name for skill in self.instance.skill_tags.all())
     
     def save(self, commit=True):
         profile = super().save(commit=False)
@@ -191,5 +225,6 @@ class ProfileEditForm(forms.ModelForm):
         
         if commit:
             profile.save()
+            profile.set_skills(self.cleaned_data.get('skills', ''))
         
         return profile
\ No newline at end of file
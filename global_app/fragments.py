@@ -0,0 +1,70 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.timesince import timesince
+
+# Alias do cache usado pelos fragmentos (LocMem ou arquivo já funcionam)
+FRAGMENT_CACHE = getattr(settings, 'FEED_FRAGMENT_CACHE', 'default')
+FRAGMENT_TIMEOUT = getattr(settings, 'FEED_FRAGMENT_TIMEOUT', 60 * 60 * 24)
+
+# O "há quanto tempo" muda a cada request, então fica fora do fragmento
+TIMESINCE_PLACEHOLDER = '__post_timesince__'
+
+
+def _cache():
+    return caches[FRAGMENT_CACHE]
+
+
+def card_key(post):
+    """
+    Chave do fragmento derivada de tudo o que ele mostra: o post, o nome do
+    autor e o avatar (com as versões redimensionadas). Qualquer mudança gera
+    outra chave; como não há chave de versão para ser despejada pelo cull do
+    cache, o pior caso é renderizar de novo, nunca servir um card antigo.
+    """
+    author = post.author
+    profile = getattr(author, 'profile', None)
+    state = [
+        post.content,
+        post.image.name if post.image else '',
+        post.image_renditions,
+        author.username,
+        author.first_name,
+        author.last_name,
+        profile.avatar.name if profile and profile.avatar else '',
+        profile.avatar_renditions if profile else {},
+    ]
+    digest = hashlib.blake2b(json.dumps(state, sort_keys=True).encode(), digest_size=16).hexdigest()
+    return f'feed:card:{post.id}:{digest}'
+
+
+def attach_post_cards(posts):
+    """
+    Preenche post.card_body com o HTML do card (autor, conteúdo e imagem),
+    reaproveitando o cache. O estado de curtida de quem vê é renderizado
+    fora do fragmento, no components/post_card.html.
+    """
+    if not posts:
+        return posts
+
+    cache = _cache()
+    keys = {post.id: card_key(post) for post in posts}
+    cached = cache.get_many(keys.values())
+
+    missing = {}
+    for post in posts:
+        key = keys[post.id]
+        html = cached.get(key)
+        if html is None:
+            html = render_to_string('components/post_card_body.html', {'post': post})
+            missing[key] = html
+        post.card_body = mark_safe(html.replace(TIMESINCE_PLACEHOLDER, timesince(post.created_at), 1))
+
+    if missing:
+        cache.set_many(missing, FRAGMENT_TIMEOUT)
+
+    return posts
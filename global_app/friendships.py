@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import FriendRequest, Friendship
+
+# Cache curto e sem chave de versão: com vários workers (LocMem) ou cull do
+# cache, uma invalidação não chega a todos; o TTL limita quanto tempo o
+# número de amigos em comum pode ficar desatualizado
+MUTUAL_FRIENDS_TIMEOUT = getattr(settings, 'MUTUAL_FRIENDS_TIMEOUT', 60)
+
+
+def mutual_friends_queryset(user_id, other_id):
+    """Amizades de other_id com quem também é amigo de user_id (interseção no banco)"""
+    return Friendship.objects.filter(
+        user_id=other_id,
+        friend_id__in=Friendship.objects.filter(user_id=user_id).values('friend_id'),
+    )
+
+
+def mutual_friends(user, other, limit=10):
+    """
+    Retorna (total, usuários) dos amigos em comum entre user e other.
+    O total e os ids dos primeiros `limit` ficam em cache por par de
+    usuários durante MUTUAL_FRIENDS_TIMEOUT segundos.
+    """
+    low, high = sorted((user.id, other.id))
+    key = f'mutual:{low}:{high}:{limit}'
+
+    result = cache.get(key)
+    if result is None:
+        mutual = mutual_friends_queryset(low, high)
+        result = {
+            'count': mutual.count(),
+            'ids': list(mutual.order_by('friend_id').values_list('friend_id', flat=True)[:limit]),
+        }
+        cache.set(key, result, MUTUAL_FRIENDS_TIMEOUT)
+
+    users = User.objects.filter(id__in=result['ids']).select_related('profile').order_by('id')
+    return result['count'], list(users)
+
+
+def resolve_friendship_status(viewer, users):
+    """
+    Resolve o status de amizade do viewer com uma página de usuários em
+    duas queries, qualquer que seja o tamanho da página.
+    Retorna {user_id: (status, request_id)} com status em
+    'friend', 'sent', 'received' ou 'none'.
+    """
+    user_ids = [user.id for user in users]
+    if not user_ids:
+        return {}
+
+    friend_ids = set(
+        Friendship.objects.filter(user=viewer, friend_id__in=user_ids).values_list('friend_id', flat=True)
+    )
+    pending = FriendRequest.objects.filter(
+        Q(from_user=viewer, to_user_id__in=user_ids) |
+        Q(from_user_id__in=user_ids, to_user=viewer),
+        status='pending'
+    ).values_list('id', 'from_user_id', 'to_user_id')
+
+    statuses = {user_id: ('none', None) for user_id in user_ids}
+    for request_id, from_user_id, to_user_id in pending:
+        if from_user_id == viewer.id:
+            statuses[to_user_id] = ('sent', request_id)
+        else:
+            statuses[from_user_id] = ('received', request_id)
+    for friend_id in friend_ids:
+        statuses[friend_id] = ('friend', None)
+
+    return statuses
@@ -0,0 +1,133 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, features
+
+from . import storage as media_storage
+
+logger = logging.getLogger(__name__)
+
+# Tamanhos por campo: nome -> (largura, altura, recortar). Os tamanhos são
+# o dobro do exibido nos templates, para telas de alta densidade
+RENDITIONS = {
+    'avatar': {
+        'thumb': (100, 100, True),
+        'medium': (400, 400, True),
+    },
+    'image': {
+        'large': (1200, 1200, False),
+    },
+}
+
+# Campo de imagem -> campo JSON que guarda as versões geradas
+RENDITION_FIELDS = {
+    'avatar': 'avatar_renditions',
+    'image': 'image_renditions',
+}
+
+WEBP_AVAILABLE = features.check('webp')
+RENDITION_QUALITY = 80
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2),
+    thread_name_prefix='images',
+)
+
+
+def needs_processing(instance, field_name):
+    """True se a imagem atual ainda não tem versões geradas"""
+    name = getattr(instance, field_name).name or ''
+    renditions = getattr(instance, RENDITION_FIELDS[field_name]) or {}
+    return renditions.get('source', '') != name
+
+
+def rendition_name(name, size):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    extension = 'webp' if WEBP_AVAILABLE else 'jpg'
+    return f'{directory}/renditions/{stem}_{size}.{extension}'
+
+
+def _render(image, width, height, crop):
+    """Redimensiona; a imagem nova não carrega o EXIF do original"""
+    if crop:
+        image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail((width, height), Image.LANCZOS)
+
+    output = BytesIO()
+    if WEBP_AVAILABLE:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        image.save(output, 'WEBP', quality=RENDITION_QUALITY, method=4)
+    else:
+        image.convert('RGB').save(output, 'JPEG', quality=RENDITION_QUALITY, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def generate_renditions(model_label, pk, field_name):
+    """
+    Gera as versões de uma imagem e grava em {campo}_renditions. Só grava
+    se a imagem não foi trocada enquanto processava.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+
+    field_file = getattr(instance, field_name)
+    renditions_field = RENDITION_FIELDS[field_name]
+    source = field_file.name or ''
+    renditions = {'source': source}
+
+    if source:
+        storage = field_file.storage
+        with storage.open(source, 'rb') as handle:
+            image = Image.open(handle)
+            # Aplica a rotação do EXIF antes de descartá-lo
+            image = ImageOps.exif_transpose(image)
+            image.load()
+
+        for size, (width, height, crop) in RENDITIONS[field_name].items():
+            name = rendition_name(source, size)
+            renditions[size] = storage.save(name, ContentFile(_render(image, width, height, crop)))
+
+    previous = getattr(instance, renditions_field) or {}
+    with transaction.atomic():
+        updated = model.objects.filter(pk=pk, **{field_name: source}).update(**{renditions_field: renditions})
+        if updated:
+            # O update não passa pelos signals: ajusta as referências aqui
+            media_storage.retain(name for key, name in renditions.items() if key != 'source')
+            media_storage.release(name for key, name in previous.items() if key != 'source')
+    return renditions
+
+
+def _run(model_label, pk, field_name):
+    try:
+        generate_renditions(model_label, pk, field_name)
+    except Exception:
+        logger.exception('Falha ao processar imagem %s:%s (%s)', model_label, pk, field_name)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(instance, field_name):
+    """Processa a imagem numa thread do pool, fora do request"""
+    return _executor.submit(_run, instance._meta.label, instance.pk, field_name)
+
+
+def rendition_url(field_file, size):
+    """URL da versão pedida, ou do original enquanto ela não foi gerada"""
+    if not field_file:
+        return ''
+    renditions = getattr(field_file.instance, RENDITION_FIELDS.get(field_file.field.name, ''), None) or {}
+    if renditions.get('source') == field_file.name and size in renditions:
+        return field_file.storage.url(renditions[size])
+    return field_file.url
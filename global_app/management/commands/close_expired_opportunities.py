@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from global_app.expiry import close_expired
+
+
+class Command(BaseCommand):
+    help = 'Fecha as oportunidades abertas com prazo de inscrição vencido, em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de oportunidades por lote')
+
+    def handle(self, *args, **options):
+        closed = close_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{closed} oportunidade(s) vencida(s) fechada(s).'))
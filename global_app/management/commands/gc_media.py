@@ -0,0 +1,74 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from global_app.models import Application, MediaBlob, Post, Profile
+from global_app.storage import is_blob, referenced_names
+
+# Modelos com campos de arquivo (os mesmos ligados aos signals de referência)
+MEDIA_MODELS = (Profile, Post, Application)
+
+
+class Command(BaseCommand):
+    help = 'Apaga os blobs de mídia sem referências (avatares trocados, posts removidos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help='Só apaga blobs sem referência há pelo menos esse tempo')
+        parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de blobs por lote')
+        parser.add_argument('--recount', action='store_true',
+                            help='Recalcula as referências a partir dos modelos antes de coletar')
+        parser.add_argument('--dry-run', action='store_true', help='Só mostra quantos seriam apagados')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            self.recount(options['batch_size'])
+
+        threshold = timezone.now() - timedelta(minutes=options['grace_minutes'])
+        orphans = MediaBlob.objects.filter(ref_count__lte=0, updated_at__lt=threshold)
+
+        if options['dry_run']:
+            self.stdout.write(f'{orphans.count()} blob(s) seriam apagados.')
+            return
+
+        deleted = 0
+        last_id = 0
+        while True:
+            batch = list(orphans.filter(id__gt=last_id).order_by('id').values_list('id', 'name')[:options['batch_size']])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            # Apaga só as linhas que continuam órfãs (um reenvio renova updated_at)
+            with transaction.atomic():
+                still_orphan = list(orphans.filter(id__in=[pk for pk, _ in batch]).select_for_update().values_list('id', 'name'))
+                MediaBlob.objects.filter(id__in=[pk for pk, _ in still_orphan]).delete()
+            for _, name in still_orphan:
+                default_storage.delete(name)
+            deleted += len(still_orphan)
+
+        self.stdout.write(self.style.SUCCESS(f'{deleted} blob(s) apagado(s).'))
+
+    def recount(self, batch_size):
+        """Conta de novo quantos campos apontam para cada blob"""
+        started = timezone.now()
+        counts = Counter()
+        for model in MEDIA_MODELS:
+            for instance in model.objects.iterator(chunk_size=batch_size):
+                counts.update(name for name in referenced_names(instance) if is_blob(name))
+
+        stale = {}
+        for pk, name, ref_count in MediaBlob.objects.values_list('id', 'name', 'ref_count').iterator(chunk_size=batch_size):
+            if ref_count != counts[name]:
+                stale.setdefault(counts[name], []).append(pk)
+
+        # Blobs referenciados ou soltos depois do início da contagem ficam como estão
+        fixed = 0
+        for ref_count, ids in stale.items():
+            for start in range(0, len(ids), batch_size):
+                fixed += MediaBlob.objects.filter(id__in=ids[start:start + batch_size], updated_at__lt=started).update(ref_count=ref_count)
+        self.stdout.write(f'{fixed} contagem(ns) de referência corrigida(s).')
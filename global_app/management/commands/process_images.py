@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from global_app.images import generate_renditions, needs_processing
+from global_app.models import Post, Profile
+
+
+class Command(BaseCommand):
+    help = 'Gera as versões redimensionadas dos avatares e imagens de posts que ainda não têm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reprocessa também as imagens que já têm versões')
+
+    def handle(self, *args, **options):
+        processed = 0
+        for model, field_name in ((Profile, 'avatar'), (Post, 'image')):
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for instance in queryset.iterator(chunk_size=500):
+                if options['all'] or needs_processing(instance, field_name):
+                    try:
+                        generate_renditions(model._meta.label, instance.pk, field_name)
+                        processed += 1
+                    except Exception as e:
+                        self.stderr.write(f'{model.__name__} {instance.pk}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'{processed} imagem(ns) processada(s).'))
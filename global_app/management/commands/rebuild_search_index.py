@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from global_app.models import Opportunity
+from global_app.search import index_opportunity, index_user, opportunity_index, user_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os índices de busca textual (FTS5)'
+
+    def handle(self, *args, **options):
+        if not user_index.available:
+            self.stdout.write(self.style.WARNING('Busca FTS5 disponível apenas no SQLite.'))
+            return
+
+        with transaction.atomic():
+            user_index.clear()
+            total = 0
+            for user in User.objects.only('id', 'username', 'first_name', 'last_name').iterator(chunk_size=1000):
+                index_user(user)
+                total += 1
+
+            opportunity_index.clear()
+            total_opportunities = 0
+            for opportunity in Opportunity.objects.iterator(chunk_size=1000):
+                index_opportunity(opportunity)
+                total_opportunities += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} usuário(s) e {total_opportunities} oportunidade(s) indexado(s).'
+        ))
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from global_app.suggestions import rebuild_for
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as sugestões de amizade (amigos de amigos) de todos os usuários'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de usuários por lote')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+
+        while True:
+            users = list(User.objects.filter(id__gt=last_id).order_by('id').only('id')[:batch_size])
+            if not users:
+                break
+            last_id = users[-1].id
+
+            for user in users:
+                rebuild_for(user)
+            total += len(users)
+
+        self.stdout.write(self.style.SUCCESS(f'Sugestões recalculadas para {total} usuário(s).'))
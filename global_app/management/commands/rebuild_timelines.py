@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from global_app.models import Post
+from global_app.timeline import fan_out_post
+
+
+class Command(BaseCommand):
+    help = 'Materializa nas timelines os posts existentes (idempotente)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Quantidade de posts por lote')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        total = 0
+
+        while True:
+            posts = list(
+                Post.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'author_id', 'created_at')[:batch_size]
+            )
+            if not posts:
+                break
+            last_id = posts[-1].id
+
+            for post in posts:
+                fan_out_post(post)
+            total += len(posts)
+
+        self.stdout.write(self.style.SUCCESS(f'{total} post(s) distribuído(s) nas timelines.'))
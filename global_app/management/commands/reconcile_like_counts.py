@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from global_app.models import Like, Post
+
+
+class Command(BaseCommand):
+    help = 'Reconcilia Post.like_count com a tabela de curtidas, em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Quantidade de posts por lote')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        counts = Like.objects.filter(post=OuterRef('pk')).values('post').annotate(n=Count('id')).values('n')
+        real_count = Coalesce(Subquery(counts), 0)
+        last_id = 0
+        checked = 0
+        fixed = 0
+
+        while True:
+            # Percorre por faixas de id para não carregar a tabela inteira
+            ids = list(Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+
+            # Conta e grava no mesmo UPDATE: uma curtida que entra no meio do
+            # lote não é sobrescrita por uma contagem lida antes dela
+            fixed += (
+                Post.objects.filter(id__in=ids)
+                .annotate(real_count=real_count)
+                .filter(~Q(like_count=real_count))
+                .update(like_count=real_count)
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{checked} post(s) verificado(s), {fixed} contador(es) corrigido(s).'))
@@ -0,0 +1,217 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from .models import Application, Opportunity, OpportunitySkill, ProfileSkill, normalize_skill
+from .search import TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+# Uma habilidade em comum pesa mais que uma palavra do texto
+SKILL_WEIGHT = 3.0
+MIN_WORD_LENGTH = 3
+
+# Reconstrução completa periódica: corrige o IDF e pega alterações
+# feitas por outros processos
+REBUILD_INTERVAL = getattr(settings, 'MATCHING_REBUILD_INTERVAL', 10 * 60)
+
+
+def _word_terms(*texts):
+    words = TOKEN_RE.findall(normalize_skill(' '.join(filter(None, texts))))
+    return [f'w:{word}' for word in words if len(word) >= MIN_WORD_LENGTH and not word.isdigit()]
+
+
+def _opportunity_terms(opportunities):
+    """{id: Counter(termo -> peso)} com as habilidades e as palavras do título e requisitos"""
+    ids = [opportunity.id for opportunity in opportunities]
+    terms = {opportunity.id: Counter(_word_terms(opportunity.title, opportunity.requirements)) for opportunity in opportunities}
+    for opportunity_id, skill_id in OpportunitySkill.objects.filter(opportunity_id__in=ids).values_list('opportunity_id', 'skill_id'):
+        terms[opportunity_id][f's:{skill_id}'] += SKILL_WEIGHT
+    return terms
+
+
+def _profile_terms(user, applied_ids=()):
+    """Termos do perfil: habilidades, bio e as oportunidades em que já se inscreveu"""
+    terms = Counter()
+    profile = getattr(user, 'profile', None)
+    if profile is not None:
+        terms.update(_word_terms(profile.bio))
+        for skill_id in ProfileSkill.objects.filter(profile=profile).values_list('skill_id', flat=True):
+            terms[f's:{skill_id}'] += SKILL_WEIGHT
+
+    applied = Opportunity.objects.filter(id__in=applied_ids).only('id', 'title', 'requirements')
+    for counter in _opportunity_terms(list(applied)).values():
+        terms.update(counter)
+    return terms
+
+
+class MatchingIndex:
+    """
+    Matriz TF-IDF (oportunidades abertas x termos) mantida em memória.
+    Cada linha já está normalizada, então o score de um perfil contra
+    todas as oportunidades é um único produto matriz-vetor. Oportunidades
+    alteradas são marcadas como sujas e só as suas linhas são recalculadas.
+
+    A reconstrução completa periódica roda numa thread, uma por vez; as
+    leituras seguem com a última matriz pronta. Só a primeira leitura do
+    processo espera a matriz ser construída.
+    """
+
+    def __init__(self, rebuild_interval=REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        # Garante um rebuild por vez (o _lock só protege a troca da matriz)
+        self._rebuild_lock = threading.Lock()
+        self._dirty = set()
+        self._built_at = None
+        self._vocabulary = {}
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows = {}
+
+    def mark_dirty(self, opportunity_id):
+        with self._lock:
+            self._dirty.add(opportunity_id)
+
+    def _vectorize(self, counter):
+        """Vetor normalizado com o IDF atual; termos fora do vocabulário são ignorados"""
+        vector = np.zeros(len(self._vocabulary), dtype=np.float32)
+        for term, count in counter.items():
+            column = self._vocabulary.get(term)
+            if column is not None:
+                vector[column] = (1.0 + math.log(count)) * self._idf[column]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def rebuild(self):
+        """Recalcula vocabulário, IDF e matriz a partir de todas as oportunidades abertas"""
+        # Alterações feitas durante o rebuild continuam marcadas
+        with self._lock:
+            self._dirty = set()
+        opportunities = list(Opportunity.objects.open().only('id', 'title', 'requirements'))
+        terms = _opportunity_terms(opportunities)
+
+        document_frequency = Counter(term for counter in terms.values() for term in counter)
+        vocabulary = {term: column for column, term in enumerate(sorted(document_frequency))}
+        total = len(terms)
+        idf = np.ones(len(vocabulary), dtype=np.float32)
+        for term, column in vocabulary.items():
+            idf[column] = math.log((1 + total) / (1 + document_frequency[term])) + 1.0
+
+        with self._lock:
+            self._vocabulary = vocabulary
+            self._idf = idf
+            self._ids = np.array(list(terms), dtype=np.int64)
+            self._rows = {opportunity_id: row for row, opportunity_id in enumerate(terms)}
+            self._matrix = np.vstack([self._vectorize(counter) for counter in terms.values()]) if terms \
+                else np.zeros((0, len(vocabulary)), dtype=np.float32)
+            self._built_at = time.monotonic()
+
+    def _refresh_dirty(self):
+        """Recalcula só as linhas das oportunidades alteradas desde a última leitura"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+
+        opportunities = list(Opportunity.objects.open().filter(id__in=dirty).only('id', 'title', 'requirements'))
+        terms = _opportunity_terms(opportunities)
+
+        with self._lock:
+            # Termos novos entram com o maior IDF (ainda raros); o rebuild corrige
+            new_terms = sorted({term for counter in terms.values() for term in counter} - self._vocabulary.keys())
+            if new_terms:
+                max_idf = float(self._idf.max()) if len(self._idf) else 1.0
+                for term in new_terms:
+                    self._vocabulary[term] = len(self._vocabulary)
+                self._idf = np.concatenate([self._idf, np.full(len(new_terms), max_idf, dtype=np.float32)])
+                self._matrix = np.pad(self._matrix, ((0, 0), (0, len(new_terms))))
+
+            # Fechadas ou removidas: zera a linha, que passa a ter score 0
+            for opportunity_id in dirty - terms.keys():
+                row = self._rows.get(opportunity_id)
+                if row is not None:
+                    self._matrix[row] = 0
+
+            appended = []
+            for opportunity_id, counter in terms.items():
+                row = self._rows.get(opportunity_id)
+                if row is None:
+                    self._rows[opportunity_id] = len(self._ids) + len(appended)
+                    appended.append((opportunity_id, self._vectorize(counter)))
+                else:
+                    self._matrix[row] = self._vectorize(counter)
+            if appended:
+                self._ids = np.concatenate([self._ids, np.array([pk for pk, _ in appended], dtype=np.int64)])
+                self._matrix = np.vstack([self._matrix, np.array([vector for _, vector in appended], dtype=np.float32)])
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('Falha ao reconstruir a matriz de recomendação')
+        finally:
+            self._rebuild_lock.release()
+            connection.close()
+
+    def refresh(self):
+        if self._built_at is None:
+            # Primeira leitura: um request constrói e os concorrentes esperam por ele
+            with self._rebuild_lock:
+                if self._built_at is None:
+                    self.rebuild()
+            return
+
+        if time.monotonic() - self._built_at > self.rebuild_interval and self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild_in_background, name='matching-rebuild', daemon=True).start()
+        # Durante o rebuild as marcações ficam para depois da troca da matriz
+        if not self._rebuild_lock.locked():
+            self._refresh_dirty()
+
+    def score(self, term_counters):
+        """
+        Scores de vários perfis de uma vez: (perfis x termos) @ (termos x
+        oportunidades). Retorna (ids das oportunidades, matriz de scores).
+        """
+        self.refresh()
+        with self._lock:
+            ids, matrix = self._ids, self._matrix
+            profiles = np.vstack([self._vectorize(counter) for counter in term_counters]) if term_counters \
+                else np.zeros((0, matrix.shape[1]), dtype=np.float32)
+        return ids, profiles @ matrix.T
+
+    def recommend(self, user, limit=5, applied_ids=()):
+        """
+        Ids das oportunidades abertas mais próximas do perfil, da mais para
+        a menos. As que estão em applied_ids entram no perfil, não no resultado.
+        """
+        ids, scores = self.score([_profile_terms(user, applied_ids)])
+        if not len(ids):
+            return []
+        scores = scores[0]
+        if applied_ids:
+            scores[np.isin(ids, list(applied_ids))] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return ids[candidates].tolist()
+
+
+index = MatchingIndex()
+
+
+def recommended_opportunities(user, limit=5):
+    """Oportunidades abertas recomendadas para o usuário (sem as que já se inscreveu)"""
+    applied = set(Application.objects.filter(user=user).values_list('opportunity_id', flat=True))
+    ranked_ids = index.recommend(user, limit, applied_ids=applied)
+    by_id = Opportunity.objects.open().in_bulk(ranked_ids)
+    return [by_id[pk] for pk in ranked_ids if pk in by_id]
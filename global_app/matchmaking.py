@@ -0,0 +1,227 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import presence
+from . import signaling
+from .images import rendition_url
+from .models import Profile
+from .websocket import route
+
+MODES = ('video', 'voice')
+# Quantos parceiros recentes cada usuário evita, e por quanto tempo (segundos)
+RECENT_PARTNERS = getattr(settings, 'MATCH_RECENT_PARTNERS', 5)
+RECENT_PARTNER_WINDOW = getattr(settings, 'MATCH_RECENT_PARTNER_WINDOW', 30 * 60)
+# Limite de candidatos olhados por tentativa: o custo não cresce com a fila
+MAX_SCAN = 50
+
+
+class Ticket:
+    """Um usuário esperando na fila; o future recebe o pareamento"""
+
+    def __init__(self, user_id, info, online=True):
+        self.user_id = user_id
+        self.info = info
+        self.online = online
+        self.enqueued_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class MatchQueue:
+    """
+    Fila de espera de uma modalidade de chamada. Os tickets ficam em dois
+    OrderedDict (online e inativos), do mais antigo ao mais novo: entrar,
+    sair e parear são O(1). Quem está online é pareado primeiro, e
+    parceiros recentes não são pareados de novo.
+
+    A fila é usada só pelo event loop (sem threads). Os parceiros recentes
+    também são lidos pela view de /calls/, numa thread do servidor, por
+    isso ficam sob um lock. Como tudo fica em memória, a fila e os
+    parceiros recentes valem só para este processo.
+    """
+
+    def __init__(self, recent_partners=RECENT_PARTNERS, recent_window=RECENT_PARTNER_WINDOW, max_scan=MAX_SCAN):
+        self.recent_partners = recent_partners
+        self.recent_window = recent_window
+        self.max_scan = max_scan
+        self._online = OrderedDict()
+        self._idle = OrderedDict()
+        # user_id -> deque de (parceiro, quando)
+        self._recent = {}
+        self._recent_lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._online) + len(self._idle)
+
+    def __contains__(self, user_id):
+        return user_id in self._online or user_id in self._idle
+
+    def _is_recent(self, user_id, other_id, now):
+        with self._recent_lock:
+            partners = tuple(self._recent.get(user_id, ()))
+        for partner_id, when in partners:
+            if partner_id == other_id and now - when < self.recent_window:
+                return True
+        return False
+
+    def _remember(self, user_id, other_id, now):
+        with self._recent_lock:
+            partners = self._recent.get(user_id)
+            if partners is None:
+                partners = self._recent[user_id] = deque(maxlen=self.recent_partners)
+            partners.append((other_id, now))
+
+    def _prune(self, now):
+        """Esquece quem não pareia há mais de recent_window (uma vez por janela)"""
+        if now - self._pruned_at < self.recent_window:
+            return
+        self._pruned_at = now
+        with self._recent_lock:
+            expired = [user_id for user_id, partners in self._recent.items() if now - partners[-1][1] >= self.recent_window]
+            for user_id in expired:
+                del self._recent[user_id]
+
+    def recent_partner_ids(self, user_id):
+        """Parceiros recentes do usuário, do mais novo ao mais antigo"""
+        now = time.monotonic()
+        with self._recent_lock:
+            partners = tuple(self._recent.get(user_id, ()))
+        return [partner_id for partner_id, when in reversed(partners) if now - when < self.recent_window]
+
+    def _take_partner(self, ticket, now):
+        """Remove e retorna o ticket mais antigo que pode parear com este"""
+        scanned = 0
+        for waiting in (self._online, self._idle):
+            for user_id, candidate in waiting.items():
+                if scanned >= self.max_scan:
+                    return None
+                scanned += 1
+                if user_id == ticket.user_id or candidate.future.done():
+                    continue
+                if self._is_recent(ticket.user_id, user_id, now) or self._is_recent(user_id, ticket.user_id, now):
+                    continue
+                del waiting[user_id]
+                return candidate
+        return None
+
+    def join(self, ticket):
+        """
+        Pareia o ticket com quem está esperando, ou o coloca na fila.
+        Retorna o ticket do parceiro (ou None, se ficou esperando).
+        """
+        self.leave(ticket.user_id)
+        now = time.monotonic()
+        self._prune(now)
+        partner = self._take_partner(ticket, now)
+        if partner is None:
+            (self._online if ticket.online else self._idle)[ticket.user_id] = ticket
+            return None
+
+        self._remember(ticket.user_id, partner.user_id, now)
+        self._remember(partner.user_id, ticket.user_id, now)
+        room = uuid.uuid4().hex
+        # Quem esperava inicia a chamada (envia a oferta)
+        partner.future.set_result({'room': room, 'role': 'caller', 'partner': ticket.info})
+        ticket.future.set_result({'room': room, 'role': 'callee', 'partner': partner.info})
+        return partner
+
+    def leave(self, user_id, ticket=None):
+        """
+        Tira o usuário da fila (cancelou ou desconectou). Com ticket, só
+        tira se for ele que está na fila: o usuário pode ter buscado de
+        novo em outra aba, e o ticket dela continua esperando.
+        """
+        for waiting in (self._online, self._idle):
+            current = waiting.get(user_id)
+            if current is not None and (ticket is None or current is ticket):
+                del waiting[user_id]
+                if not current.future.done():
+                    current.future.cancel()
+                return current
+        return None
+
+
+queues = {mode: MatchQueue() for mode in MODES}
+
+
+def recent_partner_ids(user_id):
+    """Parceiros recentes do usuário em todas as modalidades (sem repetição)"""
+    ids = []
+    for queue in queues.values():
+        ids.extend(partner_id for partner_id in queue.recent_partner_ids(user_id) if partner_id not in ids)
+    return ids
+
+
+def ticket_info(user):
+    """Dados do usuário enviados ao parceiro e se ele está online agora"""
+    profile = Profile.objects.filter(user=user).only('user', 'avatar', 'avatar_renditions', 'last_activity').first()
+    last_activity = max(
+        filter(None, [profile.last_activity if profile else None, presence.tracker.last_seen(user.id)]),
+        default=None,
+    )
+    online = bool(last_activity and last_activity > timezone.now() - presence.ONLINE_WINDOW)
+    info = {
+        'id': user.id,
+        'username': user.username,
+        'name': user.get_full_name() or user.username,
+        'avatar': rendition_url(profile.avatar, 'thumb') if profile else '',
+        'chat_url': reverse('chat_with', args=[user.username]),
+    }
+    return info, online
+
+
+async def _wait_for_match(websocket, ticket):
+    try:
+        match = await ticket.future
+    except asyncio.CancelledError:
+        return
+    await websocket.send_json({'type': 'matched', **match})
+
+
+@route('/ws/calls/')
+async def calls_socket(websocket):
+    """
+    Busca de chamada aleatória. O cliente envia {"type": "search", "mode":
+    "video"} e recebe {"type": "matched", ...} quando houver um parceiro;
+    {"type": "cancel"} ou fechar a conexão tira o usuário da fila.
+    """
+    await websocket.accept()
+    user_id = websocket.user.id
+    info, online = await sync_to_async(ticket_info)(websocket.user)
+    queue = None
+    ticket = None
+    waiter = None
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            if queue is not None:
+                queue.leave(user_id, ticket)
+                queue = None
+
+            if data.get('type') == 'search':
+                mode = data.get('mode') if data.get('mode') in MODES else 'video'
+                queue = queues[mode]
+                ticket = Ticket(user_id, info, online)
+                waiter = asyncio.create_task(_wait_for_match(websocket, ticket))
+                partner = queue.join(ticket)
+                if partner is None:
+                    await websocket.send_json({'type': 'waiting', 'mode': mode, 'queue_size': len(queue)})
+                else:
+                    # A sala de sinalização espera os dois na página da chamada
+                    signaling.rooms.create(ticket.future.result()['room'], (user_id, partner.user_id))
+            elif data.get('type') != 'cancel':
+                await websocket.send_json({'type': 'error', 'error': 'Tipo de mensagem desconhecido'})
+    finally:
+        if queue is not None:
+            queue.leave(user_id, ticket)
+        if waiter is not None and not waiter.done():
+            waiter.cancel()
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_count(apps, schema_editor):
+    Post = apps.get_model('global_app', 'Post')
+    Like = apps.get_model('global_app', 'Like')
+    counts = Like.objects.filter(post=OuterRef('pk')).values('post').annotate(n=Count('id')).values('n')
+    Post.objects.update(like_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0009_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_like_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0011_timeline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FriendSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_suggestions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sugestão de Amizade',
+                'verbose_name_plural': 'Sugestões de Amizade',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['user', '-score', 'candidate'], name='suggestion_user_score_idx')],
+                'unique_together': {('user', 'candidate')},
+            },
+        ),
+    ]
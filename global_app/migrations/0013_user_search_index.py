@@ -0,0 +1,40 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS global_app_usersearch USING fts5('
+    "username, full_name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+)
+
+
+def create_user_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    User = apps.get_model('auth', 'User')
+    schema_editor.execute(CREATE_SQL)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO global_app_usersearch (rowid, username, full_name) VALUES (%s, %s, %s)',
+            [
+                (user_id, username, f'{first_name} {last_name}'.strip())
+                for user_id, username, first_name, last_name
+                in User.objects.values_list('id', 'username', 'first_name', 'last_name').iterator()
+            ],
+        )
+
+
+def drop_user_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS global_app_usersearch')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0012_friendsuggestion'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_user_search_index, drop_user_search_index),
+    ]
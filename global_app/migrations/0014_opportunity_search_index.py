@@ -0,0 +1,40 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS global_app_opportunitysearch USING fts5('
+    'title, company, location, description, requirements, skills, '
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+)
+
+
+def create_opportunity_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Opportunity = apps.get_model('global_app', 'Opportunity')
+    schema_editor.execute(CREATE_SQL)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO global_app_opportunitysearch '
+            '(rowid, title, company, location, description, requirements, skills) '
+            'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+            list(Opportunity.objects.values_list(
+                'id', 'title', 'company', 'location', 'description', 'requirements', 'skills'
+            ).iterator()),
+        )
+
+
+def drop_opportunity_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS global_app_opportunitysearch')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0013_user_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opportunity_search_index, drop_opportunity_search_index),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0014_opportunity_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nome')),
+                ('slug', models.CharField(max_length=100, unique=True, verbose_name='Chave')),
+            ],
+            options={
+                'verbose_name': 'Habilidade',
+                'verbose_name_plural': 'Habilidades',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProfileSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='global_app.profile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_links', to='global_app.skill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OpportunitySkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opportunity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='global_app.opportunity')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opportunity_links', to='global_app.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='opportunity',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, related_name='opportunities', through='global_app.OpportunitySkill', to='global_app.skill'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, related_name='profiles', through='global_app.ProfileSkill', to='global_app.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='profileskill',
+            index=models.Index(fields=['skill', 'profile'], name='profileskill_skill_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='profileskill',
+            unique_together={('profile', 'skill')},
+        ),
+        migrations.AddIndex(
+            model_name='opportunityskill',
+            index=models.Index(fields=['skill', 'opportunity'], name='opportunityskill_skill_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='opportunityskill',
+            unique_together={('opportunity', 'skill')},
+        ),
+    ]
@@ -0,0 +1,50 @@
+import unicodedata
+
+from django.db import migrations
+
+
+def _normalize(name):
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return ' '.join(name.lower().split())
+
+
+def split_opportunity_skills(apps, schema_editor):
+    Opportunity = apps.get_model('global_app', 'Opportunity')
+    Skill = apps.get_model('global_app', 'Skill')
+    OpportunitySkill = apps.get_model('global_app', 'OpportunitySkill')
+
+    parsed = {}
+    names = {}
+    for opportunity_id, text in Opportunity.objects.exclude(skills='').values_list('id', 'skills').iterator():
+        slugs = []
+        for name in text.split(','):
+            name = ' '.join(name.split())
+            slug = _normalize(name)
+            if slug and slug not in slugs:
+                slugs.append(slug)
+                names.setdefault(slug, name)
+        parsed[opportunity_id] = slugs
+
+    Skill.objects.bulk_create([Skill(slug=slug, name=name) for slug, name in names.items()], ignore_conflicts=True)
+    skill_ids = dict(Skill.objects.values_list('slug', 'id'))
+
+    OpportunitySkill.objects.bulk_create(
+        [
+            OpportunitySkill(opportunity_id=opportunity_id, skill_id=skill_ids[slug])
+            for opportunity_id, slugs in parsed.items()
+            for slug in slugs
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0015_skill_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_opportunity_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_application_count(apps, schema_editor):
+    Opportunity = apps.get_model('global_app', 'Opportunity')
+    Application = apps.get_model('global_app', 'Application')
+    counts = Application.objects.filter(opportunity=OuterRef('pk')).values('opportunity').annotate(n=Count('id')).values('n')
+    Opportunity.objects.update(application_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0016_split_opportunity_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='opportunity',
+            name='application_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Inscrições'),
+        ),
+        migrations.RunPython(backfill_application_count, migrations.RunPython.noop),
+    ]
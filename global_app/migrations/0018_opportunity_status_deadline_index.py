@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0017_opportunity_application_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='opportunity',
+            index=models.Index(fields=['status', 'deadline'], name='opportunity_status_dl_idx'),
+        ),
+    ]
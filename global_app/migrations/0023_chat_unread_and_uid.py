@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:30
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fill_uids(apps, schema_editor):
+    Message = apps.get_model('global_app', 'Message')
+    for message in Message.objects.filter(uid__isnull=True).only('id').iterator():
+        message.uid = uuid.uuid4().hex
+        message.save(update_fields=['uid'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0022_chat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='uid',
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.RunPython(fill_uids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='message',
+            name='uid',
+            field=models.CharField(max_length=32, unique=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0023_chat_unread_and_uid'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIChatSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=120)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Chat com a IA',
+                'verbose_name_plural': 'Chats com a IA',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AIChatMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('user', 'Usuário'), ('assistant', 'Assistente')], max_length=10)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='global_app.aichatsession')),
+            ],
+            options={
+                'verbose_name': 'Mensagem da IA',
+                'verbose_name_plural': 'Mensagens da IA',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='aichatsession',
+            index=models.Index(fields=['user', '-updated_at'], name='aisession_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aichatmessage',
+            index=models.Index(fields=['session', 'id'], name='aimessage_session_idx'),
+        ),
+    ]
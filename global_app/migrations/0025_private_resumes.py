@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:10
+
+import os
+
+import global_app.storage
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.db.models import F
+
+
+def move_resumes(apps, schema_editor):
+    """Tira os currículos já enviados de MEDIA_ROOT (público) para o storage privado"""
+    Application = apps.get_model('global_app', 'Application')
+    MediaBlob = apps.get_model('global_app', 'MediaBlob')
+    private = global_app.storage.private_storage()
+
+    for application in Application.objects.exclude(resume='').exclude(resume__isnull=True).only('id', 'resume').iterator():
+        name = application.resume.name
+        if not default_storage.exists(name):
+            continue
+        with default_storage.open(name, 'rb') as handle:
+            new_name = private.save(f'resumes/{os.path.basename(name)}', handle)
+        Application.objects.filter(id=application.id).update(resume=new_name)
+        # O blob público perde a referência e o gc_media apaga o arquivo
+        MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0024_ai_chat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='application',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=global_app.storage.private_storage, upload_to='resumes/', verbose_name='Currículo'),
+        ),
+        migrations.RunPython(move_resumes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations
+
+# Os mesmos limites do global_app.timeline
+FANOUT_FRIEND_LIMIT = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 1000)
+BACKFILL_POSTS = getattr(settings, 'TIMELINE_BACKFILL_POSTS', 50)
+BATCH_SIZE = 5000
+
+
+def backfill_timeline(apps, schema_editor):
+    """
+    Preenche as timelines com os posts que já existiam antes da 0011: os
+    BACKFILL_POSTS mais recentes de cada autor entram na timeline dele e
+    na dos amigos. Autores com mais de FANOUT_FRIEND_LIMIT amigos ficam com
+    fan-out na leitura, como em timeline.fan_out_post.
+    """
+    Friendship = apps.get_model('global_app', 'Friendship')
+    Post = apps.get_model('global_app', 'Post')
+    TimelineEntry = apps.get_model('global_app', 'TimelineEntry')
+
+    friends = defaultdict(list)
+    for user_id, friend_id in Friendship.objects.values_list('user_id', 'friend_id').iterator():
+        friends[user_id].append(friend_id)
+
+    entries = []
+    for author_id in Post.objects.order_by().values_list('author_id', flat=True).distinct():
+        readers = friends.get(author_id, [])
+        if len(readers) > FANOUT_FRIEND_LIMIT:
+            Post.objects.filter(author_id=author_id).update(fanout_on_read=True)
+            readers = []
+        posts = (
+            Post.objects.filter(author_id=author_id)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'created_at')[:BACKFILL_POSTS]
+        )
+        for post_id, created_at in posts:
+            entries.extend(
+                TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, created_at=created_at)
+                for user_id in [author_id, *readers]
+            )
+        if len(entries) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+            entries = []
+    TimelineEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0025_private_resumes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_timeline, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def recount_application_count(apps, schema_editor):
+    # Inscrições criadas ou apagadas pelo admin e por cascades não eram contadas
+    Opportunity = apps.get_model('global_app', 'Opportunity')
+    Application = apps.get_model('global_app', 'Application')
+    counts = Application.objects.filter(opportunity=OuterRef('pk')).values('opportunity').annotate(n=Count('id')).values('n')
+    Opportunity.objects.update(application_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0026_backfill_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_application_count, migrations.RunPython.noop),
+    ]
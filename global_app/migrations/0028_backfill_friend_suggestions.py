@@ -0,0 +1,52 @@
+from collections import Counter, defaultdict
+
+from django.db import migrations
+
+# O mesmo limite do global_app.suggestions
+MAX_STORED_SUGGESTIONS = 100
+BATCH_SIZE = 5000
+
+
+def backfill_friend_suggestions(apps, schema_editor):
+    """
+    Recalcula as sugestões de todos os usuários, como o rebuild_suggestions.
+    A 0012 criou a tabela vazia e as atualizações incrementais só somam as
+    amizades feitas depois dela: sem isso, quem já tinha amigos via só os
+    usuários mais recentes até alguém rodar o comando.
+    """
+    Friendship = apps.get_model('global_app', 'Friendship')
+    FriendSuggestion = apps.get_model('global_app', 'FriendSuggestion')
+
+    friends = defaultdict(set)
+    for user_id, friend_id in Friendship.objects.values_list('user_id', 'friend_id').iterator():
+        friends[user_id].add(friend_id)
+
+    FriendSuggestion.objects.all().delete()
+    suggestions = []
+    for user_id, friend_ids in friends.items():
+        scores = Counter(
+            candidate_id
+            for friend_id in friend_ids
+            for candidate_id in friends.get(friend_id, ())
+            if candidate_id != user_id and candidate_id not in friend_ids
+        )
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:MAX_STORED_SUGGESTIONS]
+        suggestions.extend(
+            FriendSuggestion(user_id=user_id, candidate_id=candidate_id, score=score)
+            for candidate_id, score in ranked
+        )
+        if len(suggestions) >= BATCH_SIZE:
+            FriendSuggestion.objects.bulk_create(suggestions, batch_size=500)
+            suggestions = []
+    FriendSuggestion.objects.bulk_create(suggestions, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('global_app', '0027_recount_application_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_friend_suggestions, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Value
 from django.contrib.auth.models import User
 from django.utils.crypto import get_random_string
 from django.utils import timezone
-from datetime import timedelta
+from . import presence
+from .storage import private_storage
+import unicodedata
 
 def avatar_upload_to(instance, filename):
     return f'avatars/user_{instance.user.id}/{filename}'
@@ -10,10 +13,89 @@ def avatar_upload_to(instance, filename):
 def post_image_upload_to(instance, filename):
     return f'posts/user_{instance.author.id}/{filename}'
 
+def normalize_skill(name):
+    """Forma canônica de uma habilidade: minúscula, sem acentos e espaços extras"""
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return ' '.join(name.lower().split())
+
+def parse_skills(text):
+    """Separa o texto de habilidades (por vírgula) em [(chave, nome)] sem repetições"""
+    skills = {}
+    for name in (text or '').split(','):
+        name = ' '.join(name.split())
+        key = normalize_skill(name)
+        if key and key not in skills:
+            skills[key] = name
+    return list(skills.items())
+
+class MediaBlob(models.Model):
+    """
+    Arquivo gravado pelo ContentAddressedStorage (nome = hash do conteúdo).
+    ref_count conta quantos campos apontam para ele; os que ficam em zero
+    são apagados pelo comando gc_media.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at'], name='mediablob_gc_idx'),
+        ]
+        verbose_name = 'Arquivo de mídia'
+        verbose_name_plural = 'Arquivos de mídia'
+    
+    def __str__(self):
+        return self.name
+
+class Skill(models.Model):
+    """Habilidade normalizada, usada como tag em oportunidades e perfis"""
+    name = models.CharField(max_length=100, verbose_name='Nome')
+    slug = models.CharField(max_length=100, unique=True, verbose_name='Chave')
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Habilidade'
+        verbose_name_plural = 'Habilidades'
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def from_text(cls, text):
+        """Converte um texto separado por vírgulas em Skills, criando as que faltam"""
+        parsed = parse_skills(text)
+        if not parsed:
+            return []
+        cls.objects.bulk_create([cls(slug=slug, name=name) for slug, name in parsed], ignore_conflicts=True)
+        by_slug = cls.objects.in_bulk([slug for slug, _ in parsed], field_name='slug')
+        return [by_slug[slug] for slug, _ in parsed]
+
+class SkillFilterQuerySet(models.QuerySet):
+    """Filtro por habilidades através da tabela de ligação (skill_links)"""
+    
+    def with_all_skills(self, names):
+        """
+        Objetos que têm todas as habilidades informadas. Cada habilidade vira
+        um join pelo índice (skill, objeto), e o banco faz a interseção.
+        """
+        slugs = {normalize_skill(name) for name in names} - {''}
+        skill_ids = list(Skill.objects.filter(slug__in=slugs).values_list('id', flat=True))
+        if len(skill_ids) < len(slugs):
+            return self.none()
+        queryset = self
+        for skill_id in skill_ids:
+            queryset = queryset.filter(skill_links__skill_id=skill_id)
+        return queryset
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     uid = models.CharField(max_length=24, blank=True, default='')
     avatar = models.ImageField(upload_to=avatar_upload_to, blank=True, null=True)
+    # Versões redimensionadas do avatar ({'source': original, tamanho: arquivo}), geradas por images.py
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(max_length=500, blank=True)
     socials = models.JSONField(default=list, blank=True)
     # Preferências de acessibilidade e configurações
@@ -30,6 +112,9 @@ class Profile(models.Model):
     )
     # Status da conta
     last_activity = models.DateTimeField(default=timezone.now)
+    skill_tags = models.ManyToManyField(Skill, through='ProfileSkill', related_name='profiles', blank=True)
+    
+    objects = SkillFilterQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         if not self.uid:
@@ -41,25 +126,67 @@ class Profile(models.Model):
     
     def is_online(self):
         """Verifica se o usuário está online (ativo nos últimos 5 minutos)"""
-        if not self.last_activity:
+        # O buffer de presença tem heartbeats ainda não gravados no banco
+        last_activity = max(filter(None, [self.last_activity, presence.tracker.last_seen(self.user_id)]), default=None)
+        if not last_activity:
             return False
-        time_threshold = timezone.now() - timedelta(minutes=5)
-        return self.last_activity > time_threshold
+        time_threshold = timezone.now() - presence.ONLINE_WINDOW
+        return last_activity > time_threshold
     
     def update_last_activity(self):
         """Atualiza o timestamp de última atividade"""
         self.last_activity = timezone.now()
         self.save(update_fields=['last_activity'])
+    
+    def set_skills(self, text):
+        """Define as habilidades do perfil a partir de um texto separado por vírgulas"""
+        self.skill_tags.set(Skill.from_text(text))
+
+class ProfileSkill(models.Model):
+    profile = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='profile_links')
+    
+    class Meta:
+        unique_together = ('profile', 'skill')
+        indexes = [
+            models.Index(fields=['skill', 'profile'], name='profileskill_skill_idx'),
+        ]
+
+class PostQuerySet(models.QuerySet):
+    def with_viewer_state(self, user):
+        """
+        Anota na mesma query se o usuário que está vendo já curtiu cada
+        post (user_has_liked). O total de curtidas vem de like_count
+        """
+        if user.is_authenticated:
+            liked = Exists(Like.objects.filter(post=OuterRef('pk'), user=user))
+        else:
+            liked = Value(False)
+        return self.annotate(user_has_liked=liked)
 
 class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField(max_length=5000)
     image = models.ImageField(upload_to=post_image_upload_to, blank=True, null=True)
+    # Versões redimensionadas da imagem, geradas por images.py
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Contador desnormalizado, mantido pelo toggle_like com F()
+    like_count = models.PositiveIntegerField(default=0)
+    # Autores com muitos amigos não materializam o post na timeline de cada
+    # amigo; esses posts são buscados na leitura (fan-out na leitura)
+    fanout_on_read = models.BooleanField(default=False)
+    
+    objects = PostQuerySet.as_manager()
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # Índice usado pela paginação por cursor do feed
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            models.Index(fields=['fanout_on_read', 'author', '-created_at'], name='post_fanout_read_idx'),
+        ]
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
     
@@ -67,7 +194,7 @@ class Post(models.Model):
         return f'{self.author.username} - {self.content[:50]}'
     
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
     
     def is_liked_by(self, user):
         """Verifica se o usuário curtiu este post"""
@@ -89,6 +216,27 @@ class Like(models.Model):
     def __str__(self):
         return f'{self.user.username} curtiu post de {self.post.author.username}'
     
+class TimelineEntry(models.Model):
+    """Post materializado na timeline de um usuário (fan-out na escrita)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    # Cópia de post.created_at para paginar sem join com Post
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ('user', 'post')
+        ordering = ['-created_at', '-post']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_created_idx'),
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+        verbose_name = 'Entrada da Timeline'
+        verbose_name_plural = 'Entradas da Timeline'
+    
+    def __str__(self):
+        return f'Timeline de {self.user.username}: post {self.post_id}'
+
 class Friendship(models.Model):
     """Modelo para armazenar amizades confirmadas"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friendships')
@@ -104,6 +252,25 @@ class Friendship(models.Model):
     def __str__(self):
         return f'{self.user.username} é amigo de {self.friend.username}'
 
+class FriendSuggestion(models.Model):
+    """Sugestão de amizade pré-calculada (score = amigos em comum)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friend_suggestions')
+    candidate = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('user', 'candidate')
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['user', '-score', 'candidate'], name='suggestion_user_score_idx'),
+        ]
+        verbose_name = 'Sugestão de Amizade'
+        verbose_name_plural = 'Sugestões de Amizade'
+    
+    def __str__(self):
+        return f'{self.candidate.username} sugerido para {self.user.username} ({self.score})'
+
 class FriendRequest(models.Model):
     """Modelo para solicitações de amizade"""
     STATUS_CHOICES = [
@@ -145,6 +312,14 @@ class FriendRequest(models.Model):
         """Cancela a solicitação (quem enviou pode cancelar)"""
         self.delete()
 
+class OpportunityQuerySet(SkillFilterQuerySet):
+    def open(self):
+        """
+        Oportunidades abertas e dentro do prazo. As vencidas são fechadas
+        pelo close_expired_opportunities, mas até lá também ficam de fora.
+        """
+        return self.filter(status='open').exclude(deadline__lt=timezone.localdate())
+
 class Opportunity(models.Model):
     """Modelo para oportunidades (vagas, entrevistas, demandas)"""
     TYPE_CHOICES = [
@@ -169,22 +344,35 @@ class Opportunity(models.Model):
     work_mode = models.CharField(max_length=50, verbose_name='Modo de Trabalho', blank=True, help_text='Ex: Remoto, Híbrido, Presencial')
     requirements = models.TextField(verbose_name='Requisitos', blank=True)
     skills = models.CharField(max_length=500, verbose_name='Habilidades', blank=True, help_text='Separe por vírgula')
+    # Tags normalizadas a partir de skills (sincronizadas no save)
+    skill_tags = models.ManyToManyField(Skill, through='OpportunitySkill', related_name='opportunities', blank=True)
+    # Contador desnormalizado, mantido por apply_opportunity e cancel_application
+    application_count = models.PositiveIntegerField(default=0, verbose_name='Inscrições')
     deadline = models.DateField(verbose_name='Prazo de Inscrição', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_opportunities', verbose_name='Criado por')
     
+    objects = OpportunityQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Oportunidade'
         verbose_name_plural = 'Oportunidades'
+        indexes = [
+            models.Index(fields=['status', 'deadline'], name='opportunity_status_dl_idx'),
+        ]
     
     def __str__(self):
         return f'{self.get_type_display()} - {self.title}'
     
     def total_applications(self):
         """Retorna o total de inscrições"""
-        return self.applications.count()
+        return self.application_count
+    
+    def sync_skill_tags(self):
+        """Atualiza as tags normalizadas a partir do campo skills"""
+        self.skill_tags.set(Skill.from_text(self.skills))
     
     def is_expired(self):
         """Verifica se a oportunidade está expirada"""
@@ -193,6 +381,16 @@ class Opportunity(models.Model):
             return timezone.now().date() > self.deadline
         return False
 
+class OpportunitySkill(models.Model):
+    opportunity = models.ForeignKey(Opportunity, on_delete=models.CASCADE, related_name='skill_links')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='opportunity_links')
+    
+    class Meta:
+        unique_together = ('opportunity', 'skill')
+        indexes = [
+            models.Index(fields=['skill', 'opportunity'], name='opportunityskill_skill_idx'),
+        ]
+
 class Application(models.Model):
     """Modelo para inscrições em oportunidades"""
     STATUS_CHOICES = [
@@ -205,7 +403,8 @@ class Application(models.Model):
     opportunity = models.ForeignKey(Opportunity, on_delete=models.CASCADE, related_name='applications', verbose_name='Oportunidade')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='applications', verbose_name='Usuário')
     cover_letter = models.TextField(verbose_name='Carta de Apresentação', blank=True)
-    resume = models.FileField(upload_to='resumes/', verbose_name='Currículo', null=True, blank=True)
+    # Fora de MEDIA_ROOT: só o candidato e a equipe baixam (views.serve_private_media)
+    resume = models.FileField(upload_to='resumes/', storage=private_storage, verbose_name='Currículo', null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Status')
     applied_at = models.DateTimeField(auto_now_add=True, verbose_name='Data da Inscrição')
     updated_at = models.DateTimeField(auto_now=True)
@@ -214,8 +413,125 @@ class Application(models.Model):
     class Meta:
         unique_together = ('opportunity', 'user')
         ordering = ['-applied_at']
+        indexes = [
+            # Fila de revisão: filtros por oportunidade/status, paginada por (applied_at, id)
+            models.Index(fields=['opportunity', 'status', 'applied_at'], name='application_review_idx'),
+            models.Index(fields=['status', 'applied_at'], name='application_status_idx'),
+            models.Index(fields=['applied_at'], name='application_applied_idx'),
+        ]
         verbose_name = 'Inscrição'
         verbose_name_plural = 'Inscrições'
     
     def __str__(self):
-        return f'{self.user.username} - {self.opportunity.title}'
\ No newline at end of file
+        return f'{self.user.username} - {self.opportunity.title}'
+
+class Conversation(models.Model):
+    """Conversa do chat entre dois usuários"""
+    # "menor_id:maior_id" dos participantes; garante uma conversa por par
+    key = models.CharField(max_length=50, unique=True)
+    participants = models.ManyToManyField(User, through='ConversationParticipant', related_name='conversations')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Conversa'
+        verbose_name_plural = 'Conversas'
+    
+    def __str__(self):
+        return f'Conversa {self.key}'
+    
+    @staticmethod
+    def key_for(user_id, other_id):
+        return '{}:{}'.format(*sorted((user_id, other_id)))
+    
+    @classmethod
+    def between(cls, user, other):
+        """
+        Retorna a conversa entre os dois usuários, criando se ainda não existe.
+        A chave única do par faz duas criações simultâneas resultarem na
+        mesma conversa; conversa e participantes são gravados juntos.
+        """
+        with transaction.atomic():
+            conversation, created = cls.objects.get_or_create(key=cls.key_for(user.id, other.id))
+            if created:
+                ConversationParticipant.objects.bulk_create([
+                    ConversationParticipant(conversation=conversation, user_id=user_id)
+                    for user_id in {user.id, other.id}
+                ], ignore_conflicts=True)
+        return conversation
+
+class ConversationParticipant(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_memberships')
+    joined_at = models.DateTimeField(auto_now_add=True)
+    # Mensagens não lidas por este participante (somado no flush do chat.MessageBuffer)
+    unread_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('conversation', 'user')
+        indexes = [
+            models.Index(fields=['user', 'conversation'], name='chatmember_user_idx'),
+        ]
+
+class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_messages')
+    content = models.TextField(max_length=2000)
+    # Identificador gerado no envio: a mensagem é entregue antes de ser gravada (e de ter id)
+    uid = models.CharField(max_length=32, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Histórico de uma conversa: leitura pelo índice (conversa, id)
+            models.Index(fields=['conversation', 'id'], name='message_conversation_idx'),
+        ]
+        verbose_name = 'Mensagem'
+        verbose_name_plural = 'Mensagens'
+    
+    def __str__(self):
+        return f'{self.sender.username}: {self.content[:50]}'
+
+
+class AIChatSession(models.Model):
+    """Conversa do usuário com o assistente (Connexa AI)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_sessions')
+    title = models.CharField(max_length=120)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            # Barra de "Chats recentes": sessões do usuário pela mais recente
+            models.Index(fields=['user', '-updated_at'], name='aisession_user_updated_idx'),
+        ]
+        verbose_name = 'Chat com a IA'
+        verbose_name_plural = 'Chats com a IA'
+    
+    def __str__(self):
+        return f'{self.user.username}: {self.title}'
+
+
+class AIChatMessage(models.Model):
+    ROLE_CHOICES = [
+        ('user', 'Usuário'),
+        ('assistant', 'Assistente'),
+    ]
+    
+    session = models.ForeignKey(AIChatSession, on_delete=models.CASCADE, related_name='messages')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['session', 'id'], name='aimessage_session_idx'),
+        ]
+        verbose_name = 'Mensagem da IA'
+        verbose_name_plural = 'Mensagens da IA'
+    
+    def __str__(self):
+        return f'{self.role}: {self.content[:50]}'
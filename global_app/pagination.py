@@ -0,0 +1,65 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+FEED_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+# Ids são inteiros de 64 bits com sinal; acima disso o SQLite dá OverflowError
+MAX_PK = 2 ** 63
+
+
+def encode_cursor(created_at, pk):
+    """Codifica a posição (created_at, id) de um item em um cursor opaco"""
+    raw = f'{created_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decodifica um cursor gerado por encode_cursor. Retorna None se for inválido"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not 0 < pk < MAX_PK:
+        return None
+    return created_at, pk
+
+
+def parse_page_size(value, default=FEED_PAGE_SIZE):
+    """Converte o parâmetro de tamanho de página respeitando o limite máximo"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_page(queryset, cursor=None, limit=FEED_PAGE_SIZE, date_field='created_at', id_field='id'):
+    """
+    Pagina um queryset por (date_field, id_field) em ordem decrescente.
+    Usa WHERE sobre o índice em vez de OFFSET, então o custo de cada página
+    é constante independente de quantas linhas existem antes dela.
+    Retorna (itens, próximo_cursor).
+    """
+    position = decode_cursor(cursor) if isinstance(cursor, str) else cursor
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__lt': created_at}) |
+            Q(**{date_field: created_at, f'{id_field}__lt': pk})
+        )
+
+    # Busca um item a mais para saber se existe próxima página
+    items = list(queryset.order_by(f'-{date_field}', f'-{id_field}')[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, date_field), getattr(last, id_field))
+
+    return items, next_cursor
@@ -0,0 +1,103 @@
+import atexit
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Tempo sem atividade para considerar o usuário offline
+ONLINE_WINDOW = timedelta(minutes=5)
+
+
+class PresenceTracker:
+    """
+    Guarda em memória os heartbeats dos usuários e grava em lote no
+    Profile.last_activity, por tempo (flush_interval) ou por tamanho
+    (max_pending). Um UPDATE por flush em vez de um por usuário.
+    """
+
+    def __init__(self, flush_interval=60, max_pending=500, online_window=ONLINE_WINDOW):
+        self.flush_interval = timedelta(seconds=flush_interval)
+        self.max_pending = max_pending
+        self.online_window = online_window
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._seen = {}
+        self._last_flush = timezone.now()
+
+    def touch(self, user_id, when=None):
+        """Registra atividade do usuário; grava no banco se o buffer estourou"""
+        when = when or timezone.now()
+        with self._lock:
+            self._pending[user_id] = when
+            self._seen[user_id] = when
+            should_flush = (
+                len(self._pending) >= self.max_pending or
+                when - self._last_flush >= self.flush_interval
+            )
+        if should_flush:
+            self.flush()
+
+    def last_seen(self, user_id):
+        """Última atividade conhecida neste processo (ou None)"""
+        return self._seen.get(user_id)
+
+    def online_user_ids(self, among=None):
+        """Usuários vistos por este processo dentro da janela de online (só os de among, se dado)"""
+        threshold = timezone.now() - self.online_window
+        among = None if among is None else set(among)
+        with self._lock:
+            return [
+                user_id for user_id, when in self._seen.items()
+                if when > threshold and (among is None or user_id in among)
+            ]
+
+    def flush(self):
+        """Grava os heartbeats pendentes com um único UPDATE"""
+        from .models import Profile
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            now = timezone.now()
+            self._last_flush = now
+            # Esquece quem já saiu da janela de online
+            threshold = now - self.online_window
+            self._seen = {user_id: when for user_id, when in self._seen.items() if when > threshold}
+
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                return Profile.objects.filter(user_id__in=pending.keys()).update(
+                    last_activity=Case(
+                        *[When(user_id=user_id, then=Value(when)) for user_id, when in pending.items()],
+                        output_field=DateTimeField(),
+                    )
+                )
+        except Exception:
+            # Devolve ao buffer para tentar de novo no próximo flush
+            logger.exception('Falha ao gravar heartbeats de presença')
+            with self._lock:
+                for user_id, when in pending.items():
+                    self._pending.setdefault(user_id, when)
+            return 0
+
+
+tracker = PresenceTracker(
+    flush_interval=getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 60),
+    max_pending=getattr(settings, 'PRESENCE_MAX_PENDING', 500),
+)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        tracker.flush()
+    except Exception:
+        pass
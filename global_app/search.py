@@ -0,0 +1,201 @@
+import re
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Q, When
+
+from .models import Opportunity, Skill
+
+# Tokens da busca: sequências de letras/números (inclui acentos)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_QUERY_TOKENS = 8
+
+
+def match_expression(query):
+    """
+    Converte o texto digitado em uma expressão MATCH do FTS5 em que cada
+    palavra é um prefixo ("joa"* "sil"*). Aspas evitam que o usuário
+    injete operadores do FTS5.
+    """
+    tokens = TOKEN_RE.findall(query)[:MAX_QUERY_TOKENS]
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+class FTSIndex:
+    """
+    Índice de busca textual em uma tabela virtual FTS5 do SQLite (criada
+    por migration), com o rowid igual ao id do objeto indexado. O tokenizer remove acentos
+    ("joao" encontra "João") e os índices de prefixo deixam o typeahead
+    como uma busca por índice em vez de LIKE '%q%'.
+    """
+
+    def __init__(self, table, columns, weights=None, max_candidates=2000):
+        self.table = table
+        self.columns = columns
+        self.weights = weights or [1.0] * len(columns)
+        self.max_candidates = max_candidates
+
+    @property
+    def available(self):
+        return connection.vendor == 'sqlite'
+
+    def upsert(self, rowid, values):
+        """Indexa (ou reindexa) um objeto; values segue a ordem de columns"""
+        if not self.available:
+            return
+        placeholders = ', '.join(['%s'] * (len(self.columns) + 1))
+        with connection.cursor() as cur:
+            cur.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [rowid])
+            cur.execute(
+                f'INSERT INTO {self.table} (rowid, {", ".join(self.columns)}) VALUES ({placeholders})',
+                [rowid, *values],
+            )
+
+    def delete(self, rowid):
+        if not self.available:
+            return
+        with connection.cursor() as cur:
+            cur.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [rowid])
+
+    def clear(self):
+        if not self.available:
+            return
+        with connection.cursor() as cur:
+            cur.execute(f'DELETE FROM {self.table}')
+
+    def search(self, query, limit=10, offset=0, within=None):
+        """
+        Retorna os rowids que casam com a busca, do mais para o menos
+        relevante. within (queryset do modelo indexado) restringe os
+        candidatos antes de ranquear; no máximo max_candidates resultados.
+        """
+        expression = match_expression(query)
+        if not expression:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        sql = f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s'
+        params = [expression]
+        if within is not None:
+            try:
+                subquery, subquery_params = within.order_by().values('pk').query.sql_with_params()
+            except EmptyResultSet:
+                return []
+            sql += f' AND rowid IN ({subquery})'
+            params += subquery_params
+        # O FTS5 ordena pelo bm25 e para no LIMIT (top-N, sem ordenar tudo)
+        sql += f' ORDER BY bm25({self.table}, {weights}) LIMIT %s OFFSET %s'
+        params += [min(limit, max(self.max_candidates - offset, 0)), offset]
+        with connection.cursor() as cur:
+            cur.execute(sql, params)
+            return [row[0] for row in cur.fetchall()]
+
+
+user_index = FTSIndex('global_app_usersearch', ['username', 'full_name'], weights=[2.0, 1.0])
+
+
+# Campos do User que entram no índice
+USER_INDEX_FIELDS = frozenset(['username', 'first_name', 'last_name'])
+
+
+def user_index_values(user):
+    return [user.username, user.get_full_name()]
+
+
+def index_user(user):
+    user_index.upsert(user.id, user_index_values(user))
+
+
+def search_user_ids(query, limit=10):
+    return user_index.search(query, limit)
+
+
+opportunity_index = FTSIndex(
+    'global_app_opportunitysearch',
+    ['title', 'company', 'location', 'description', 'requirements', 'skills'],
+    weights=[5.0, 3.0, 1.0, 1.0, 1.0, 3.0],
+    max_candidates=500,
+)
+
+# Campos com contagem por valor na página de oportunidades
+OPPORTUNITY_FACETS = ('type', 'work_mode')
+
+
+def index_opportunity(opportunity):
+    opportunity_index.upsert(opportunity.id, [
+        opportunity.title,
+        opportunity.company,
+        opportunity.location,
+        opportunity.description,
+        opportunity.requirements,
+        opportunity.skills,
+    ])
+
+
+def _skill_counts(queryset):
+    """Contagem por habilidade no conjunto de resultados (pela tabela de tags)"""
+    rows = (
+        Skill.objects.filter(opportunity_links__opportunity__in=queryset.order_by().values('id'))
+        .annotate(count=Count('opportunity_links'))
+        .order_by('-count', 'name')
+        .values('slug', 'name', 'count')
+    )
+    return [{'value': row['slug'], 'label': row['name'], 'count': row['count']} for row in rows]
+
+
+def _filter_opportunities(queryset, query, filters):
+    """
+    Aplica os filtros e depois a busca textual. Os filtros entram no
+    within do índice, antes do corte de max_candidates: um termo comum não
+    tira do resultado as linhas que casam com os filtros.
+    """
+    filters = dict(filters)
+    skill = filters.pop('skill', '')
+    queryset = queryset.filter(**filters)
+    # Habilidades pela tabela de tags (join pelo índice skill -> oportunidade)
+    if skill:
+        queryset = queryset.with_all_skills([skill])
+
+    if query and opportunity_index.available:
+        ranked_ids = opportunity_index.search(query, limit=opportunity_index.max_candidates, within=queryset)
+        queryset = queryset.filter(id__in=ranked_ids).order_by(Case(
+            *[When(id=pk, then=position) for position, pk in enumerate(ranked_ids)],
+            output_field=IntegerField(),
+        ))
+    elif query:
+        queryset = queryset.filter(
+            Q(title__icontains=query) |
+            Q(company__icontains=query) |
+            Q(description__icontains=query)
+        )
+    return queryset
+
+
+def search_opportunities(queryset, query='', filters=None):
+    """
+    Aplica a busca textual (ranqueada pelo índice FTS5) e os filtros
+    (type, work_mode, skill) sobre o queryset. Retorna (queryset, facets),
+    onde facets tem, para cada campo, as contagens considerando todos os
+    outros filtros ativos.
+    """
+    filters = {key: value for key, value in (filters or {}).items() if value}
+    # Um resultado por combinação de filtros (sem filtro ativo, é um só)
+    results = {}
+
+    def matching(exclude=None):
+        applied = {key: value for key, value in filters.items() if key != exclude}
+        key = frozenset(applied.items())
+        if key not in results:
+            results[key] = _filter_opportunities(queryset, query, applied)
+        return results[key]
+
+    facets = {}
+    for field in OPPORTUNITY_FACETS:
+        labels = dict(Opportunity._meta.get_field(field).choices or [])
+        facets[field] = [
+            {'value': row[field], 'label': labels.get(row[field], row[field]), 'count': row['count']}
+            for row in matching(exclude=field).exclude(**{field: ''})
+            .order_by().values(field).annotate(count=Count('id')).order_by('-count', field)
+        ]
+    facets['skill'] = _skill_counts(matching(exclude='skill'))
+
+    return matching(), facets
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .broker import get_broker
+from .chat import participant_ids, user_channel
+from .websocket import route
+
+# Tempo (segundos) para o segundo participante entrar na sala
+JOIN_TIMEOUT = getattr(settings, 'SIGNAL_JOIN_TIMEOUT', 60)
+# Tempo para quem caiu voltar antes de a sala ser encerrada
+RECONNECT_GRACE = getattr(settings, 'SIGNAL_RECONNECT_GRACE', 30)
+# Uma oferta SDP com vídeo e áudio tem poucos KB
+MAX_SIGNAL_SIZE = 64 * 1024
+ICE_SERVERS = getattr(settings, 'WEBRTC_ICE_SERVERS', [{'urls': 'stun:stun.l.google.com:19302'}])
+# Mensagens repassadas ao outro participante, e os campos de cada uma
+RELAYED = {
+    'offer': ('sdp',),
+    'answer': ('sdp',),
+    'candidate': ('candidate',),
+}
+CONVERSATION_ROOM_PREFIX = 'chat-'
+
+
+def signal_channel(room_id, session_id):
+    return f'signal:{room_id}:{session_id}'
+
+
+class Room:
+    """Sala de uma chamada entre dois usuários"""
+
+    def __init__(self, room_id, user_ids):
+        self.id = room_id
+        self.allowed = frozenset(user_ids)
+        # user_id -> canal da sessão, na ordem de entrada
+        self.members = {}
+        self.timer = None
+
+    def others(self, user_id):
+        return [channel for member_id, channel in self.members.items() if member_id != user_id]
+
+
+class RoomRegistry:
+    """
+    Salas de sinalização abertas neste processo. O servidor só repassa
+    ofertas, respostas e candidatos ICE; a mídia vai direto de um navegador
+    ao outro. Uma sala expira se o segundo participante não entrar em
+    JOIN_TIMEOUT, ou se alguém sai e não volta em RECONNECT_GRACE.
+    Usada só pelo event loop, como a fila de pareamento.
+    """
+
+    def __init__(self, broker=None, join_timeout=JOIN_TIMEOUT, reconnect_grace=RECONNECT_GRACE):
+        self._broker = broker
+        self.join_timeout = join_timeout
+        self.reconnect_grace = reconnect_grace
+        self.rooms = {}
+
+    @property
+    def broker(self):
+        return self._broker or get_broker()
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def _schedule_expiry(self, room, delay):
+        if room.timer is not None:
+            room.timer.cancel()
+        room.timer = asyncio.get_running_loop().call_later(delay, self._expire, room.id)
+
+    def _expire(self, room_id):
+        room = self.rooms.pop(room_id, None)
+        if room is not None and room.members:
+            asyncio.ensure_future(self._publish(list(room.members.values()), {'type': 'timeout'}))
+
+    async def _publish(self, channels, message):
+        for channel in channels:
+            await self.broker.publish(channel, message)
+
+    def create(self, room_id, user_ids):
+        """Abre a sala para estes usuários (chamado pelo pareamento)"""
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = Room(room_id, user_ids)
+            self._schedule_expiry(room, self.join_timeout)
+        return room
+
+    def join(self, room_id, user_id, channel):
+        """Entra na sala (None se a sala não existe ou não é deste usuário)"""
+        room = self.rooms.get(room_id)
+        if room is None or user_id not in room.allowed:
+            return None
+        # Uma sessão nova do mesmo usuário (recarregou a página) substitui a antiga
+        room.members.pop(user_id, None)
+        room.members[user_id] = channel
+        return room
+
+    async def start(self, room):
+        """Com todos presentes, cancela a expiração e avisa que podem negociar"""
+        if len(room.members) < len(room.allowed):
+            return False
+        if room.timer is not None:
+            room.timer.cancel()
+            room.timer = None
+        # Quem chegou primeiro cria a oferta
+        first = next(iter(room.members))
+        for member_id, member_channel in room.members.items():
+            await self.broker.publish(member_channel, {'type': 'ready', 'initiator': member_id == first})
+        return True
+
+    async def leave(self, room_id, user_id, channel):
+        room = self.rooms.get(room_id)
+        if room is None or room.members.get(user_id) != channel:
+            return
+        del room.members[user_id]
+        if not room.members:
+            if room.timer is not None:
+                room.timer.cancel()
+            del self.rooms[room_id]
+            return
+        await self._publish(room.others(user_id), {'type': 'peer_left'})
+        self._schedule_expiry(room, self.reconnect_grace)
+
+    async def relay(self, room_id, user_id, message):
+        """Repassa a mensagem ao outro participante; False se ele não está na sala"""
+        room = self.rooms.get(room_id)
+        channels = room.others(user_id) if room is not None and user_id in room.members else []
+        await self._publish(channels, message)
+        return bool(channels)
+
+
+rooms = RoomRegistry()
+
+
+def room_allows(room_id, user_ids):
+    """True se a sala aberta neste processo é exatamente destes usuários"""
+    room = rooms.rooms.get(room_id)
+    return room is not None and room.allowed == frozenset(user_ids)
+
+
+def conversation_room(room_id, user_id):
+    """Participantes da sala 'chat-<id>' de uma conversa, ou None"""
+    try:
+        conversation_id = int(room_id[len(CONVERSATION_ROOM_PREFIX):])
+    except ValueError:
+        return None
+    return participant_ids(conversation_id, user_id)
+
+
+async def _forward(websocket, queue):
+    """Envia ao cliente as mensagens da sala; a expiração encerra a conexão"""
+    try:
+        while True:
+            message = await queue.get()
+            await websocket.send_json(message)
+            if message['type'] == 'timeout':
+                await websocket.close(4408)
+                return
+    except Exception:
+        pass
+
+
+class SignalSession:
+    """Uma conexão de sinalização: no máximo uma sala por vez"""
+
+    def __init__(self, websocket, broker, registry=rooms):
+        self.websocket = websocket
+        self.broker = broker
+        self.registry = registry
+        self.user = websocket.user
+        self.session_id = uuid.uuid4().hex
+        self.room_id = None
+        self.channel = None
+        self.queue = asyncio.Queue(maxsize=100)
+        self.forwarder = asyncio.create_task(_forward(websocket, self.queue))
+
+    async def error(self, message):
+        await self.websocket.send_json({'type': 'error', 'error': message})
+
+    async def handle(self, data):
+        kind = data.get('type')
+        if kind == 'join':
+            await self.join(str(data.get('room', '')))
+        elif kind == 'leave':
+            await self.leave()
+        elif kind in RELAYED:
+            await self.relay(kind, data)
+        else:
+            await self.error('Tipo de mensagem desconhecido')
+
+    async def join(self, room_id):
+        await self.leave()
+        if room_id.startswith(CONVERSATION_ROOM_PREFIX) and room_id not in self.registry.rooms:
+            user_ids = await sync_to_async(conversation_room)(room_id, self.user.id)
+            if user_ids:
+                self.registry.create(room_id, user_ids)
+
+        channel = signal_channel(room_id, self.session_id)
+        await self.broker.subscribe(channel, self.queue)
+        room = self.registry.join(room_id, self.user.id, channel)
+        if room is None:
+            await self.broker.unsubscribe(channel, self.queue)
+            await self.error('Sala não encontrada ou expirada')
+            return
+
+        self.room_id, self.channel = room_id, channel
+        await self.websocket.send_json({'type': 'joined', 'room': room_id, 'ice_servers': ICE_SERVERS})
+        if not await self.registry.start(room) and room_id.startswith(CONVERSATION_ROOM_PREFIX):
+            # Chamada numa conversa: o outro participante recebe o convite pelo chat
+            invite = {'type': 'call', 'room': room_id, 'from': self.user.get_full_name() or self.user.username}
+            for user_id in room.allowed - {self.user.id}:
+                await self.broker.publish(user_channel(user_id), invite)
+
+    async def leave(self):
+        if self.room_id is None:
+            return
+        await self.registry.leave(self.room_id, self.user.id, self.channel)
+        await self.broker.unsubscribe(self.channel, self.queue)
+        self.room_id = self.channel = None
+
+    async def relay(self, kind, data):
+        if self.room_id is None:
+            await self.error('Entre numa sala antes de negociar')
+            return
+        message = {'type': kind, **{field: data.get(field) for field in RELAYED[kind]}}
+        if len(json.dumps(message)) > MAX_SIGNAL_SIZE:
+            await self.error('Mensagem de sinalização grande demais')
+            return
+        if not await self.registry.relay(self.room_id, self.user.id, message):
+            await self.error('O outro participante não está na sala')
+
+    async def close(self):
+        await self.leave()
+        self.forwarder.cancel()
+
+
+@route('/ws/signal/')
+async def signal_socket(websocket):
+    """
+    Sinalização WebRTC. O cliente entra numa sala ({"type": "join",
+    "room": ...}), recebe {"type": "ready", "initiator": ...} quando o outro
+    participante chega e então troca offer/answer/candidate, repassados
+    sem alteração.
+    """
+    await websocket.accept()
+    session = SignalSession(websocket, get_broker())
+    try:
+        while True:
+            await session.handle(await websocket.receive_json())
+    finally:
+        await session.close()
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import Profile, Post, Friendship, Opportunity, Application
+from . import images, matching, search, suggestions, timeline
+from . import storage as media_storage
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,4 +15,135 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+        instance.profile.save()
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Distribui o post novo nas timelines depois do commit"""
+    if created:
+        transaction.on_commit(lambda: timeline.fan_out_post(instance))
+
+@receiver(post_save, sender=Friendship)
+def add_friend_to_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.add_friend_posts(instance.user, instance.friend)
+
+@receiver(post_delete, sender=Friendship)
+def remove_friend_from_timeline(sender, instance, **kwargs):
+    timeline.remove_friend_posts(instance.user, instance.friend)
+
+@receiver(post_save, sender=Friendship)
+def update_suggestions_on_friendship(sender, instance, created, **kwargs):
+    if created:
+        suggestions.friendship_created(instance.user_id, instance.friend_id)
+
+@receiver(post_delete, sender=Friendship)
+def update_suggestions_on_unfriend(sender, instance, **kwargs):
+    suggestions.friendship_deleted(instance.user_id, instance.friend_id)
+
+@receiver(post_init, sender=User)
+def remember_search_values(sender, instance, **kwargs):
+    """Guarda os valores indexados (se carregados) para comparar no save"""
+    if instance.pk and not search.USER_INDEX_FIELDS & instance.get_deferred_fields():
+        instance._search_values = search.user_index_values(instance)
+
+@receiver(post_save, sender=User)
+def index_user_for_search(sender, instance, created, update_fields=None, **kwargs):
+    """Reindexa só quando nome ou username mudam (não a cada last_login)"""
+    if update_fields is not None and not search.USER_INDEX_FIELDS & set(update_fields):
+        return
+    values = search.user_index_values(instance)
+    if not created and getattr(instance, '_search_values', None) == values:
+        return
+    search.index_user(instance)
+    instance._search_values = values
+
+@receiver(post_delete, sender=User)
+def remove_user_from_search(sender, instance, **kwargs):
+    search.user_index.delete(instance.id)
+
+@receiver(post_save, sender=Opportunity)
+def index_opportunity_for_search(sender, instance, **kwargs):
+    """Atualiza o índice a cada save (inclusive pelo OpportunityAdmin)"""
+    search.index_opportunity(instance)
+
+@receiver(post_save, sender=Opportunity)
+def sync_opportunity_skill_tags(sender, instance, **kwargs):
+    instance.sync_skill_tags()
+
+@receiver(post_delete, sender=Opportunity)
+def remove_opportunity_from_search(sender, instance, **kwargs):
+    search.opportunity_index.delete(instance.id)
+
+@receiver(post_save, sender=Opportunity)
+@receiver(post_delete, sender=Opportunity)
+def refresh_opportunity_matching(sender, instance, **kwargs):
+    """A linha da oportunidade na matriz de recomendação é recalculada na próxima leitura"""
+    matching.index.mark_dirty(instance.id)
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Post)
+def process_uploaded_image(sender, instance, **kwargs):
+    """Gera as versões redimensionadas depois do commit, fora do request"""
+    field_name = 'avatar' if sender is Profile else 'image'
+    if images.needs_processing(instance, field_name):
+        transaction.on_commit(lambda: images.schedule_renditions(instance, field_name))
+
+@receiver(post_save, sender=Application)
+def count_new_application(sender, instance, created, **kwargs):
+    """Conta toda inscrição nova: pela view, pelo admin ou por script"""
+    if created:
+        Opportunity.objects.filter(id=instance.opportunity_id).update(application_count=F('application_count') + 1)
+
+@receiver(post_delete, sender=Application)
+def discount_deleted_application(sender, instance, **kwargs):
+    """Desconta também no delete_selected do admin e nos cascades de User/Opportunity"""
+    Opportunity.objects.filter(id=instance.opportunity_id, application_count__gt=0).update(
+        application_count=F('application_count') - 1
+    )
+
+@receiver(post_init, sender=Profile)
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Application)
+def remember_media_names(sender, instance, **kwargs):
+    """Guarda os arquivos que a instância referencia ao ser carregada"""
+    instance._media_names = media_storage.file_names(instance)
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Application)
+def update_media_references(sender, instance, created, **kwargs):
+    """
+    Ajusta a contagem de referências dos arquivos que entraram ou saíram.
+    As versões (*_renditions) são contadas pelo images.py.
+    """
+    old = {} if created else getattr(instance, '_media_names', {})
+    new = media_storage.file_names(instance)
+    added, removed = [], []
+    for field, names in new.items():
+        # Campo que não estava carregado: conta os novos sem soltar os antigos
+        # (na dúvida o blob fica; o gc_media --recount corrige)
+        previous = old.get(field, [])
+        added += [name for name in names if name not in previous]
+        removed += [name for name in previous if name not in names]
+    media_storage.retain(added)
+    media_storage.release(removed)
+    if sender is Application:
+        discard_private_files(removed)
+    instance._media_names = new
+
+@receiver(post_delete, sender=Profile)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Application)
+def release_media_references(sender, instance, **kwargs):
+    names = media_storage.referenced_names(instance)
+    media_storage.release(names)
+    if sender is Application:
+        discard_private_files(names)
+
+def discard_private_files(names):
+    """Currículos (storage privado) não são deduplicados: saem junto com a inscrição"""
+    private = [name for name in names if name and not media_storage.is_blob(name)]
+    if private:
+        storage = media_storage.private_storage()
+        transaction.on_commit(lambda: [storage.delete(name) for name in private])
@@ -1,24 +1,74 @@
 document.addEventListener('DOMContentLoaded', function () {
   const btnVideo = document.getElementById('btn-video');
+  const btnVoice = document.getElementById('btn-voice');
   const searchCard = document.getElementById('search-card');
-  const chatUrl = searchCard?.dataset.chatUrl || '/chat/';
+  const searchFormHtml = searchCard?.innerHTML;
+  let socket = null;
 
-  function searchingHtml() {
+  function searchingHtml(queueSize) {
     return `
       <div class="text-center py-5">
         <h3>Buscando chamada</h3>
-        <p class="small text-muted mb-3">Aguarde...</p>
-        <div class="d-flex justify-content-center"><div class="spinner-border" role="status"></div></div>
+        <p class="small text-muted mb-3">Aguarde...${queueSize > 1 ? ` ${queueSize} pessoas na fila` : ''}</p>
+        <div class="d-flex justify-content-center mb-4"><div class="spinner-border" role="status"></div></div>
+        <button id="btn-cancel-search" type="button" class="btn btn-outline-secondary">Cancelar</button>
       </div>
     `;
   }
 
-  function startSearch() {
-    searchCard.innerHTML = searchingHtml();
-    setTimeout(() => {
-      window.location.href = chatUrl;
-    }, 5000);
+  function restoreForm() {
+    searchCard.innerHTML = searchFormHtml;
+    bindButtons();
   }
 
-  if (btnVideo) btnVideo.addEventListener('click', startSearch);
+  function cancelSearch() {
+    if (socket) {
+      socket.onclose = null;
+      socket.close();
+      socket = null;
+    }
+    restoreForm();
+  }
+
+  function showSearching(queueSize) {
+    searchCard.innerHTML = searchingHtml(queueSize);
+    document.getElementById('btn-cancel-search').addEventListener('click', cancelSearch);
+  }
+
+  // Fila de pareamento no servidor (WebSocket em /ws/calls/)
+  function startSearch(mode) {
+    showSearching(0);
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    socket = new WebSocket(`${scheme}://${window.location.host}${searchCard.dataset.socketPath}`);
+
+    socket.addEventListener('open', () => {
+      socket.send(JSON.stringify({ type: 'search', mode }));
+    });
+
+    socket.addEventListener('message', (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === 'waiting') {
+        showSearching(data.queue_size);
+      } else if (data.type === 'matched') {
+        socket.onclose = null;
+        const params = new URLSearchParams({ room: data.room, role: data.role, mode });
+        window.location.href = `${data.partner.chat_url}?${params}`;
+      } else if (data.type === 'error') {
+        console.warn('Busca de chamada:', data.error);
+      }
+    });
+
+    socket.onclose = () => {
+      socket = null;
+      restoreForm();
+      alert('A conexão com o servidor caiu. Tente buscar novamente.');
+    };
+  }
+
+  function bindButtons() {
+    document.getElementById('btn-video')?.addEventListener('click', () => startSearch('video'));
+    document.getElementById('btn-voice')?.addEventListener('click', () => startSearch('voice'));
+  }
+
+  if (btnVideo || btnVoice) bindButtons();
 });
@@ -1,3 +1,138 @@
+  // Chamada WebRTC: o servidor só repassa a sinalização (/ws/signal/)
+  const callContainer = document.getElementById('call');
+  const remoteVideo = document.getElementById('remoteVideo');
+  const localVideo = document.getElementById('localVideo');
+  const localPlaceholder = document.getElementById('localPlaceholder');
+  const callStatus = document.getElementById('callStatus');
+  const startCallBtn = document.getElementById('startCallBtn');
+  const callParams = new URLSearchParams(window.location.search);
+  let signalSocket = null;
+  let peerConnection = null;
+  let localStream = null;
+  let iceServers = [];
+  let pendingCandidates = [];
+
+  function setCallStatus(text) {
+    callStatus.textContent = text;
+  }
+
+  async function startLocalMedia() {
+    if (localStream) return localStream;
+    const video = callParams.get('mode') !== 'voice';
+    localStream = await navigator.mediaDevices.getUserMedia({ audio: true, video });
+    localVideo.srcObject = localStream;
+    localVideo.classList.toggle('d-none', !video);
+    localPlaceholder.classList.toggle('d-none', video);
+    return localStream;
+  }
+
+  function closePeer() {
+    if (peerConnection) {
+      peerConnection.close();
+      peerConnection = null;
+    }
+    pendingCandidates = [];
+    remoteVideo.srcObject = null;
+  }
+
+  function sendSignal(data) {
+    if (signalSocket && signalSocket.readyState === WebSocket.OPEN) {
+      signalSocket.send(JSON.stringify(data));
+    }
+  }
+
+  function createPeer() {
+    closePeer();
+    peerConnection = new RTCPeerConnection({ iceServers });
+    localStream.getTracks().forEach((track) => peerConnection.addTrack(track, localStream));
+
+    peerConnection.addEventListener('icecandidate', (event) => {
+      if (event.candidate) sendSignal({ type: 'candidate', candidate: event.candidate.toJSON() });
+    });
+    peerConnection.addEventListener('track', (event) => {
+      remoteVideo.srcObject = event.streams[0];
+      setCallStatus('');
+    });
+    peerConnection.addEventListener('connectionstatechange', () => {
+      if (peerConnection?.connectionState === 'failed') setCallStatus('Falha na conexão da chamada');
+    });
+    return peerConnection;
+  }
+
+  // Candidatos que chegam antes da descrição remota esperam na fila
+  async function flushCandidates() {
+    for (const candidate of pendingCandidates) {
+      await peerConnection.addIceCandidate(candidate);
+    }
+    pendingCandidates = [];
+  }
+
+  async function handleSignal(data) {
+    if (data.type === 'joined') {
+      iceServers = data.ice_servers;
+      setCallStatus('Aguardando o outro participante...');
+    } else if (data.type === 'ready') {
+      setCallStatus('Conectando...');
+      createPeer();
+      if (data.initiator) {
+        await peerConnection.setLocalDescription(await peerConnection.createOffer());
+        sendSignal({ type: 'offer', sdp: peerConnection.localDescription.sdp });
+      }
+    } else if (data.type === 'offer') {
+      if (!peerConnection) createPeer();
+      await peerConnection.setRemoteDescription({ type: 'offer', sdp: data.sdp });
+      await flushCandidates();
+      await peerConnection.setLocalDescription(await peerConnection.createAnswer());
+      sendSignal({ type: 'answer', sdp: peerConnection.localDescription.sdp });
+    } else if (data.type === 'answer') {
+      await peerConnection?.setRemoteDescription({ type: 'answer', sdp: data.sdp });
+      await flushCandidates();
+    } else if (data.type === 'candidate') {
+      if (peerConnection?.remoteDescription) {
+        await peerConnection.addIceCandidate(data.candidate);
+      } else {
+        pendingCandidates.push(data.candidate);
+      }
+    } else if (data.type === 'peer_left') {
+      closePeer();
+      setCallStatus('O outro participante saiu. Aguardando retorno...');
+    } else if (data.type === 'timeout') {
+      closePeer();
+      setCallStatus('A chamada foi encerrada');
+    } else if (data.type === 'error') {
+      console.warn('Sinalização:', data.error);
+      setCallStatus(data.error);
+    }
+  }
+
+  async function joinCall(room) {
+    try {
+      await startLocalMedia();
+    } catch (error) {
+      setCallStatus('Não foi possível acessar câmera ou microfone');
+      return;
+    }
+    setCallStatus('Conectando...');
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    signalSocket = new WebSocket(`${scheme}://${window.location.host}${callContainer.dataset.signalPath}`);
+    signalSocket.addEventListener('open', () => sendSignal({ type: 'join', room }));
+    signalSocket.addEventListener('message', (event) => {
+      handleSignal(JSON.parse(event.data)).catch((error) => console.error('Erro na chamada:', error));
+    });
+  }
+
+  function leaveCall() {
+    sendSignal({ type: 'leave' });
+    signalSocket?.close();
+    closePeer();
+    localStream?.getTracks().forEach((track) => track.stop());
+  }
+
+  startCallBtn?.addEventListener('click', () => joinCall(callContainer.dataset.conversationRoom));
+
+  // Veio do pareamento de /calls/ com a sala já criada
+  if (callParams.get('room')) joinCall(callParams.get('room'));
+
   // Controle de câmera
   const cameraBtn = document.getElementById('cameraBtn');
   let cameraActive = true;
@@ -5,6 +140,7 @@
   cameraBtn.addEventListener('click', () => {
     cameraActive = !cameraActive;
     cameraBtn.classList.toggle('active');
+    localStream?.getVideoTracks().forEach((track) => { track.enabled = cameraActive; });
     
     if (cameraActive) {
       cameraBtn.innerHTML = '<i class="bi bi-camera-video-fill"></i>';
@@ -20,6 +156,7 @@
   micBtn.addEventListener('click', () => {
     micActive = !micActive;
     micBtn.classList.toggle('active');
+    localStream?.getAudioTracks().forEach((track) => { track.enabled = micActive; });
     
     if (micActive) {
       micBtn.innerHTML = '<i class="bi bi-mic-fill"></i>';
@@ -32,6 +169,143 @@
   const disconnectBtn = document.getElementById('disconnectBtn');
   disconnectBtn.addEventListener('click', () => {
     if (confirm('Deseja realmente desconectar da chamada?')) {
+      leaveCall();
       window.location.href = '/calls/';
     }
   });
+
+  // Chat em tempo real (WebSocket em /ws/chat/)
+  const chatContainer = document.getElementById('chat');
+  const chatMessages = document.getElementById('chatMessages');
+  const chatForm = document.getElementById('chatForm');
+  const chatInput = document.getElementById('chatInput');
+  const currentUserId = Number(chatContainer.dataset.userId);
+  const conversationId = Number(chatContainer.dataset.conversationId) || null;
+  let chatSocket = null;
+  let reconnectDelay = 1000;
+
+  function scrollToBottom() {
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+  }
+
+  function buildMessage(message) {
+    const mine = message.sender === currentUserId;
+    const time = new Date(message.created_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+    const item = document.createElement('div');
+    item.className = `chat-message mb-2 ${mine ? 'align-self-end text-end' : 'align-self-start'}`;
+    item.dataset.messageUid = message.uid;
+    if (message.id) item.dataset.messageId = message.id;
+
+    const bubble = document.createElement('div');
+    bubble.className = `d-inline-block px-3 py-2 rounded ${mine ? 'bg-primary text-white' : 'bg-light'}`;
+    bubble.textContent = message.content;
+
+    const meta = document.createElement('div');
+    meta.className = 'text-muted';
+    meta.style.fontSize = '0.7rem';
+    meta.textContent = time;
+
+    item.append(bubble, meta);
+    return item;
+  }
+
+  // Mensagens novas chegam antes de serem gravadas (sem id): o uid identifica
+  function hasMessage(message) {
+    return Boolean(chatMessages.querySelector(`[data-message-uid="${message.uid}"]`));
+  }
+
+  function appendMessage(message) {
+    if (message.conversation !== conversationId) return;
+    if (hasMessage(message)) return;
+    document.getElementById('chatEmpty')?.remove();
+
+    chatMessages.appendChild(buildMessage(message));
+    scrollToBottom();
+
+    if (message.sender !== currentUserId && document.visibilityState === 'visible') {
+      markRead();
+    }
+  }
+
+  function markRead() {
+    if (chatSocket && chatSocket.readyState === WebSocket.OPEN && conversationId) {
+      chatSocket.send(JSON.stringify({ type: 'read', conversation: conversationId }));
+    }
+  }
+
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible') markRead();
+  });
+
+  // Histórico: carrega as mensagens anteriores à mais antiga exibida
+  const loadOlderBtn = document.getElementById('chatLoadOlder');
+  let oldestMessageId = Number(chatMessages.querySelector('[data-message-id]')?.dataset.messageId) || null;
+
+  loadOlderBtn?.addEventListener('click', async () => {
+    if (!oldestMessageId) return;
+    loadOlderBtn.disabled = true;
+    try {
+      const response = await fetch(`${chatContainer.dataset.messagesUrl}?before=${oldestMessageId}`);
+      const data = await response.json();
+      if (!data.success) throw new Error(data.error);
+
+      const previousHeight = chatMessages.scrollHeight;
+      const fragment = document.createDocumentFragment();
+      data.messages.filter((message) => !hasMessage(message)).forEach((message) => {
+        fragment.appendChild(buildMessage(message));
+      });
+      loadOlderBtn.after(fragment);
+      // Mantém a posição de leitura depois de inserir acima
+      chatMessages.scrollTop += chatMessages.scrollHeight - previousHeight;
+
+      if (data.messages.length) oldestMessageId = data.messages[0].id;
+      if (data.next_before) {
+        loadOlderBtn.disabled = false;
+      } else {
+        loadOlderBtn.remove();
+      }
+    } catch (error) {
+      console.error('Erro ao carregar mensagens:', error);
+      loadOlderBtn.disabled = false;
+    }
+  });
+
+  function connectChat() {
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    chatSocket = new WebSocket(`${scheme}://${window.location.host}${chatContainer.dataset.socketPath}`);
+
+    chatSocket.addEventListener('open', () => {
+      reconnectDelay = 1000;
+      markRead();
+    });
+
+    chatSocket.addEventListener('message', (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === 'message') {
+        appendMessage(data.message);
+      } else if (data.type === 'call') {
+        // Convite de chamada numa conversa (enviado pela sinalização)
+        if (!signalSocket && confirm(`${data.from} está chamando. Atender?`)) joinCall(data.room);
+      } else if (data.type === 'error') {
+        console.warn('Chat:', data.error);
+      }
+    });
+
+    // Reconecta com espera crescente (até 30s)
+    chatSocket.addEventListener('close', () => {
+      setTimeout(connectChat, reconnectDelay);
+      reconnectDelay = Math.min(reconnectDelay * 2, 30000);
+    });
+  }
+
+  chatForm.addEventListener('submit', (event) => {
+    event.preventDefault();
+    const content = chatInput.value.trim();
+    if (!content || !conversationId || !chatSocket || chatSocket.readyState !== WebSocket.OPEN) return;
+
+    chatSocket.send(JSON.stringify({ type: 'message', conversation: conversationId, content }));
+    chatInput.value = '';
+  });
+
+  scrollToBottom();
+  connectChat();
@@ -58,6 +58,66 @@ async function toggleLike(postId) {
     }
 }
 
+// Rolagem infinita: carrega a próxima página do feed quando a sentinela aparece
+let feedLoading = false;
+let feedObserver = null;
+
+async function loadMorePosts(sentinel) {
+    const cursor = sentinel.dataset.nextCursor;
+    if (feedLoading || !cursor) {
+        return;
+    }
+
+    feedLoading = true;
+    const spinner = document.getElementById('feed-loading');
+    if (spinner) spinner.classList.remove('d-none');
+
+    try {
+        const response = await fetch(`${sentinel.dataset.url}?cursor=${encodeURIComponent(cursor)}`);
+
+        if (!response.ok) {
+            throw new Error('Erro na requisição');
+        }
+
+        const data = await response.json();
+
+        document.getElementById('feed-posts').insertAdjacentHTML('beforeend', data.html);
+        sentinel.dataset.nextCursor = data.next_cursor || '';
+
+    } catch (error) {
+        console.error('Erro ao carregar mais posts:', error);
+        showToast('error', 'Erro ao carregar mais publicações.');
+    } finally {
+        feedLoading = false;
+        if (spinner) spinner.classList.add('d-none');
+    }
+
+    // Observa de novo para disparar caso a sentinela continue visível
+    if (feedObserver) {
+        feedObserver.unobserve(sentinel);
+        if (sentinel.dataset.nextCursor) {
+            feedObserver.observe(sentinel);
+        }
+    }
+}
+
+function setupInfiniteScroll() {
+    const sentinel = document.getElementById('feed-sentinel');
+    if (!sentinel || !('IntersectionObserver' in window)) {
+        return;
+    }
+
+    feedObserver = new IntersectionObserver(function(entries) {
+        if (entries[0].isIntersecting) {
+            loadMorePosts(sentinel);
+        }
+    }, { rootMargin: '400px' });
+
+    if (sentinel.dataset.nextCursor) {
+        feedObserver.observe(sentinel);
+    }
+}
+
 // Função para enviar solicitação de amizade
 async function sendFriendRequest(userId, userName, buttonElement) {
     // Desabilitar botão para evitar cliques múltiplos
@@ -118,53 +178,7 @@ function showToast(type, message) {
     }
 }
 
-// Carregar status de amizade ao carregar a página (opcional - melhoria futura)
+// O status de amizade das sugestões já vem resolvido do servidor
 document.addEventListener('DOMContentLoaded', function() {
-    // Aqui você pode adicionar lógica para verificar o status de amizade
-    // de cada usuário sugerido e atualizar os botões de acordo
-    checkFriendshipStatus();
+    setupInfiniteScroll();
 });
-
-// Função para verificar status de amizade dos usuários sugeridos
-async function checkFriendshipStatus() {
-    const addButtons = document.querySelectorAll('.add-friend-btn');
-    
-    for (const button of addButtons) {
-        const userId = button.getAttribute('data-user-id');
-        
-        try {
-            // Buscar o usuário para verificar status
-            const response = await fetch(`/api/friends/search/?q=id:${userId}`);
-            const data = await response.json();
-            
-            if (data.users && data.users.length > 0) {
-                const user = data.users[0];
-                
-                // Atualizar botão baseado no status
-                if (user.status === 'friend') {
-                    button.classList.remove('btn-outline-primary');
-                    button.classList.add('btn-success');
-                    button.innerHTML = '<i class="bi bi-check-lg me-1"></i>Amigos';
-                    button.disabled = true;
-                    button.onclick = null;
-                } else if (user.status === 'sent') {
-                    button.classList.remove('btn-outline-primary');
-                    button.classList.add('btn-secondary');
-                    button.innerHTML = '<i class="bi bi-check-lg me-1"></i>Enviado';
-                    button.disabled = true;
-                    button.onclick = null;
-                } else if (user.status === 'received') {
-                    button.classList.remove('btn-outline-primary');
-                    button.classList.add('btn-info');
-                    button.innerHTML = '<i class="bi bi-envelope-check me-1"></i>Aceitar';
-                    button.onclick = function() {
-                        window.location.href = '/friends/#solicitacoes';
-                    };
-                }
-            }
-        } catch (error) {
-            // Silenciosamente ignorar erros de verificação
-            console.log('Não foi possível verificar status para usuário:', userId);
-        }
-    }
-}
\ No newline at end of file
@@ -75,15 +75,25 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
             
-            searchTimeout = setTimeout(() => searchUsers(query), 500);
+            searchTimeout = setTimeout(() => searchUsers(query), 200);
         });
     }
 });
 
 // Função de busca
+let searchController = null;
+
 async function searchUsers(query) {
+    // Cancela a busca anterior para uma resposta antiga não sobrescrever a nova
+    if (searchController) {
+        searchController.abort();
+    }
+    searchController = new AbortController();
+
     try {
-        const response = await fetch(`/api/friends/search/?q=${encodeURIComponent(query)}`);
+        const response = await fetch(`/api/friends/search/?q=${encodeURIComponent(query)}`, {
+            signal: searchController.signal
+        });
         const data = await response.json();
         
         const resultsDiv = document.getElementById('searchResults');
@@ -130,6 +140,9 @@ async function searchUsers(query) {
         }).join('');
         
     } catch (error) {
+        if (error.name === 'AbortError') {
+            return;
+        }
         console.error('Erro ao buscar usuários:', error);
         showToast('error', 'Erro ao buscar usuários');
     }
@@ -24,6 +24,7 @@ function quickApply(opportunityId, opportunityTitle) {
     currentOpportunityId = opportunityId;
     document.getElementById('modalOpportunityTitle').textContent = opportunityTitle;
     document.getElementById('coverLetter').value = '';
+    document.getElementById('resumeFile').value = '';
     
     const modal = new bootstrap.Modal(document.getElementById('applyModal'));
     modal.show();
@@ -35,7 +36,12 @@ document.addEventListener('DOMContentLoaded', function() {
     
     if (confirmBtn) {
         confirmBtn.addEventListener('click', async function() {
-            const coverLetter = document.getElementById('coverLetter').value.trim();
+            const formData = new FormData();
+            formData.append('cover_letter', document.getElementById('coverLetter').value.trim());
+            const resume = document.getElementById('resumeFile').files[0];
+            if (resume) {
+                formData.append('resume', resume);
+            }
             
             // Desabilitar botão durante o envio
             confirmBtn.disabled = true;
@@ -46,11 +52,8 @@ document.addEventListener('DOMContentLoaded', function() {
                     method: 'POST',
                     headers: {
                         'X-CSRFToken': csrftoken,
-                        'Content-Type': 'application/json',
                     },
-                    body: JSON.stringify({
-                        cover_letter: coverLetter
-                    })
+                    body: formData
                 });
                 
                 const data = await response.json();
@@ -0,0 +1,113 @@
+document.addEventListener('DOMContentLoaded', function () {
+  const aiChat = document.getElementById('aiChat');
+  const aiMessages = document.getElementById('aiMessages');
+  const aiForm = document.getElementById('aiForm');
+  const aiInput = document.getElementById('aiInput');
+  const aiSend = document.getElementById('aiSend');
+  const aiSessions = document.getElementById('aiSessions');
+  let sessionId = aiChat.dataset.sessionId;
+
+  function scrollToBottom() {
+    aiMessages.scrollTop = aiMessages.scrollHeight;
+  }
+
+  function addBubble(role, text) {
+    document.getElementById('aiEmpty')?.remove();
+    const item = document.createElement('div');
+    item.className = `mb-2 ${role === 'user' ? 'align-self-end text-end' : 'align-self-start'}`;
+    const bubble = document.createElement('div');
+    bubble.className = `d-inline-block px-3 py-2 rounded ${role === 'user' ? 'bg-primary text-white' : 'bg-light'}`;
+    bubble.style.whiteSpace = 'pre-wrap';
+    bubble.textContent = text;
+    item.appendChild(bubble);
+    aiMessages.appendChild(item);
+    scrollToBottom();
+    return bubble;
+  }
+
+  // Sessão nova: entra no topo dos "Chats recentes" e na URL
+  function registerSession(data) {
+    if (sessionId) return;
+    sessionId = String(data.session);
+    document.getElementById('aiSessionsEmpty')?.remove();
+    const link = document.createElement('a');
+    link.href = `/work_ai/${sessionId}/`;
+    link.className = 'd-block text-truncate small py-2 px-2 rounded text-decoration-none bg-primary text-white';
+    link.textContent = data.title;
+    aiSessions.prepend(link);
+    history.replaceState(null, '', link.href);
+  }
+
+  // Um bloco do text/event-stream: "event: nome" (opcional) e "data: {...}"
+  function parseEvent(block) {
+    let event = 'message';
+    let data = '';
+    block.split('\n').forEach((line) => {
+      if (line.startsWith('event: ')) event = line.slice(7);
+      else if (line.startsWith('data: ')) data += line.slice(6);
+    });
+    return { event, data: data ? JSON.parse(data) : {} };
+  }
+
+  async function ask(content) {
+    addBubble('user', content);
+    const answer = addBubble('assistant', '');
+    answer.innerHTML = '<span class="spinner-border spinner-border-sm" role="status"></span>';
+
+    const body = new FormData(aiForm);
+    body.set('message', content);
+    if (sessionId) body.set('session', sessionId);
+
+    const response = await fetch(aiChat.dataset.streamUrl, { method: 'POST', body });
+    if (!response.ok || !response.body) {
+      const data = await response.json().catch(() => ({}));
+      answer.textContent = data.error || 'Não foi possível enviar a mensagem.';
+      return;
+    }
+
+    // Lê a resposta conforme chega, sem esperar o fim
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    let text = '';
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += value;
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const { event, data } = parseEvent(buffer.slice(0, boundary));
+        buffer = buffer.slice(boundary + 2);
+        if (event === 'session') {
+          registerSession(data);
+        } else if (event === 'message') {
+          text += data.delta;
+          answer.textContent = text;
+          scrollToBottom();
+        } else if (event === 'error') {
+          answer.textContent = text || data.error;
+        }
+      }
+    }
+  }
+
+  aiForm.addEventListener('submit', async (event) => {
+    event.preventDefault();
+    const content = aiInput.value.trim();
+    if (!content) return;
+
+    aiInput.value = '';
+    aiInput.disabled = true;
+    aiSend.disabled = true;
+    try {
+      await ask(content);
+    } catch (error) {
+      console.error('Erro no assistente:', error);
+    } finally {
+      aiInput.disabled = false;
+      aiSend.disabled = false;
+      aiInput.focus();
+    }
+  });
+
+  scrollToBottom();
+});
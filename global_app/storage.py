@@ -0,0 +1,117 @@
+import hashlib
+import os
+import uuid
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+# Prefixo dos arquivos endereçados por conteúdo (servidos com cache imutável)
+BLOB_PREFIX = 'blobs/'
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(content):
+    """SHA-256 do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Grava cada arquivo em blobs/ab/cd/<sha256>.<ext>. O mesmo conteúdo
+    enviado duas vezes vira um único arquivo; cada nome tem um MediaBlob
+    com a contagem de referências.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # O nome final vem do conteúdo em _save, então não há colisão a evitar
+        return name
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        digest = content_hash(content)
+        extension = os.path.splitext(name)[1].lower()
+        blob_name = f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+        if not self.exists(blob_name):
+            # Dois envios iguais podem passar pelo exists() juntos: cada um grava
+            # num nome temporário próprio e o os.replace põe no lugar (o conteúdo
+            # é o mesmo, então o segundo só sobrescreve o primeiro)
+            temp_name = super()._save(f'{blob_name}.{uuid.uuid4().hex}.tmp', content)
+            os.replace(self.path(temp_name), self.path(blob_name))
+
+        try:
+            with transaction.atomic():
+                _, created = MediaBlob.objects.get_or_create(name=blob_name, defaults={'size': content.size})
+        except IntegrityError:
+            created = False
+        if not created:
+            # Reenvio de um blob existente: adia uma coleta que estivesse para acontecer
+            MediaBlob.objects.filter(name=blob_name).update(updated_at=timezone.now())
+        return blob_name
+
+
+def private_storage():
+    """Storage dos arquivos privados (STORAGES['private'])"""
+    return storages['private']
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX)
+
+
+def retain(names):
+    """Soma uma referência a cada blob (nomes fora de blobs/ são ignorados)"""
+    _add_references(names, 1)
+
+
+def release(names):
+    """Tira uma referência de cada blob; os que chegam a zero ficam para o gc_media"""
+    _add_references(names, -1)
+
+
+def _add_references(names, delta):
+    from .models import MediaBlob
+
+    # Um mesmo blob pode aparecer mais de uma vez (dois campos com o mesmo conteúdo)
+    by_count = {}
+    for name, count in Counter(name for name in names if is_blob(name)).items():
+        by_count.setdefault(count, []).append(name)
+    for count, grouped in by_count.items():
+        MediaBlob.objects.filter(name__in=grouped).update(
+            ref_count=F('ref_count') + delta * count, updated_at=timezone.now()
+        )
+
+
+def file_names(instance):
+    """
+    {campo: [arquivo]} dos campos de arquivo carregados na instância.
+    Campos adiados (only/defer) ficam de fora para não gerar queries.
+    """
+    names = {}
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, models.FileField) and field.attname in instance.__dict__:
+            value = instance.__dict__[field.attname]
+            name = getattr(value, 'name', value)
+            names[field.attname] = [name] if name else []
+    return names
+
+
+def rendition_names(instance):
+    """Arquivos dos campos JSON de versões (*_renditions), mantidos por images.py"""
+    names = []
+    for field in instance._meta.concrete_fields:
+        if field.name.endswith('_renditions') and field.attname in instance.__dict__:
+            names += [name for key, name in (instance.__dict__[field.attname] or {}).items() if key != 'source']
+    return names
+
+
+def referenced_names(instance):
+    """Todos os arquivos que a instância referencia"""
+    return [name for names in file_names(instance).values() for name in names] + rendition_names(instance)
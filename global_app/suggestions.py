@@ -0,0 +1,134 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .friendships import mutual_friends_queryset
+from .models import FriendRequest, FriendSuggestion, Friendship
+
+BATCH_SIZE = 500
+
+# Quantas sugestões guardar por usuário no rebuild completo
+MAX_STORED_SUGGESTIONS = 100
+
+
+def _batches(ids):
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def _add_score(fixed_field, fixed_id, other_field, other_ids, delta):
+    """
+    Soma delta ao score das sugestões em que fixed_field = fixed_id e
+    other_field está em other_ids, criando as que ainda não existem
+    """
+    for batch in _batches(other_ids):
+        suggestions = FriendSuggestion.objects.filter(**{fixed_field: fixed_id, f'{other_field}__in': batch})
+        existing = set(suggestions.values_list(other_field, flat=True))
+
+        if existing:
+            suggestions.filter(**{f'{other_field}__in': existing}).update(score=F('score') + delta)
+
+        if delta > 0:
+            FriendSuggestion.objects.bulk_create(
+                [FriendSuggestion(**{fixed_field: fixed_id, other_field: other_id, 'score': delta})
+                 for other_id in batch if other_id not in existing],
+                ignore_conflicts=True,
+            )
+
+    if delta < 0:
+        FriendSuggestion.objects.filter(**{fixed_field: fixed_id}, score__lte=0).delete()
+
+
+def _friends_of(user_id, exclude_id):
+    """Amigos de user_id que ainda não são amigos de exclude_id"""
+    return list(
+        Friendship.objects.filter(user_id=user_id)
+        .exclude(friend_id=exclude_id)
+        .exclude(friend_id__in=Friendship.objects.filter(user_id=exclude_id).values('friend_id'))
+        .values_list('friend_id', flat=True)
+    )
+
+
+@transaction.atomic
+def friendship_created(user_id, friend_id):
+    """
+    Atualiza as sugestões quando user passa a ser amigo de friend:
+    os amigos de user ganham friend como amigo em comum e vice-versa
+    """
+    FriendSuggestion.objects.filter(
+        Q(user_id=user_id, candidate_id=friend_id) | Q(user_id=friend_id, candidate_id=user_id)
+    ).delete()
+
+    candidate_ids = _friends_of(user_id, friend_id)
+    _add_score('user_id', friend_id, 'candidate_id', candidate_ids, 1)
+    _add_score('candidate_id', friend_id, 'user_id', candidate_ids, 1)
+
+
+@transaction.atomic
+def friendship_deleted(user_id, friend_id):
+    """Desfaz o que friendship_created somou quando a amizade é removida"""
+    candidate_ids = _friends_of(user_id, friend_id)
+    _add_score('user_id', friend_id, 'candidate_id', candidate_ids, -1)
+    _add_score('candidate_id', friend_id, 'user_id', candidate_ids, -1)
+
+    # Os dois ex-amigos voltam a ser sugestão um do outro se tiverem amigos em comum
+    still_friends = Friendship.objects.filter(
+        Q(user_id=user_id, friend_id=friend_id) | Q(user_id=friend_id, friend_id=user_id)
+    ).exists()
+    if not still_friends:
+        score = mutual_friends_queryset(user_id, friend_id).count()
+        if score:
+            for owner_id, candidate_id in ((user_id, friend_id), (friend_id, user_id)):
+                FriendSuggestion.objects.update_or_create(
+                    user_id=owner_id, candidate_id=candidate_id, defaults={'score': score}
+                )
+
+
+@transaction.atomic
+def rebuild_for(user):
+    """Recalcula do zero as sugestões de um usuário (amigos de amigos)"""
+    friend_ids = Friendship.objects.filter(user=user).values('friend_id')
+    ranked = (
+        Friendship.objects.filter(user_id__in=friend_ids)
+        .exclude(friend_id=user.id)
+        .exclude(friend_id__in=friend_ids)
+        .values('friend_id')
+        .annotate(score=Count('id'))
+        .order_by('-score', 'friend_id')[:MAX_STORED_SUGGESTIONS]
+    )
+
+    FriendSuggestion.objects.filter(user=user).delete()
+    FriendSuggestion.objects.bulk_create([
+        FriendSuggestion(user=user, candidate_id=row['friend_id'], score=row['score'])
+        for row in ranked
+    ])
+
+
+def suggested_users(user, limit=5):
+    """
+    Lê as melhores sugestões pelo índice (user, -score). Se faltarem,
+    completa com os usuários mais recentes que ainda não são amigos.
+    """
+    pending = FriendRequest.objects.filter(Q(from_user=user) | Q(to_user=user), status='pending')
+
+    suggestions = (
+        FriendSuggestion.objects.filter(user=user)
+        .exclude(candidate_id__in=pending.values('to_user_id'))
+        .exclude(candidate_id__in=pending.values('from_user_id'))
+        .select_related('candidate', 'candidate__profile')
+        .order_by('-score', 'candidate_id')[:limit]
+    )
+    users = [suggestion.candidate for suggestion in suggestions]
+
+    if len(users) < limit:
+        users += list(
+            User.objects.exclude(id=user.id)
+            .exclude(id__in=[u.id for u in users])
+            .exclude(id__in=Friendship.objects.filter(user=user).values('friend_id'))
+            .exclude(id__in=pending.values('to_user_id'))
+            .exclude(id__in=pending.values('from_user_id'))
+            .select_related('profile')
+            .order_by('-id')[:limit - len(users)]
+        )
+
+    return users
@@ -0,0 +1,31 @@
+from django import template
+
+from global_app.images import rendition_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, param, number):
+    """Monta a querystring atual trocando apenas o parâmetro de página"""
+    query = context['request'].GET.copy()
+    query[param] = number
+    return '?' + query.urlencode()
+
+
+@register.simple_tag(takes_context=True)
+def filter_url(context, param, value=''):
+    """Troca (ou remove, se vazio) um filtro da querystring e volta para a primeira página"""
+    query = context['request'].GET.copy()
+    query.pop('page', None)
+    if value:
+        query[param] = value
+    else:
+        query.pop(param, None)
+    return '?' + query.urlencode()
+
+
+@register.filter
+def rendition(field_file, size):
+    """URL da versão redimensionada de uma imagem ({{ profile.avatar|rendition:'thumb' }})"""
+    return rendition_url(field_file, size)
@@ -0,0 +1,114 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from global_app.assistant import LocalProvider, Provider, ResponseStream, start_turn
+from global_app.models import AIChatMessage, AIChatSession
+from global_app.tests.utils import ClientTestCase
+
+
+def events(body):
+    """Lista de (evento, dados) de um corpo text/event-stream"""
+    parsed = []
+    for block in body.strip().split('\n\n'):
+        event, data = 'message', None
+        for line in block.split('\n'):
+            field, _, value = line.partition(': ')
+            if field == 'event':
+                event = value
+            elif field == 'data':
+                data = json.loads(value)
+        parsed.append((event, data))
+    return parsed
+
+
+class TrackingProvider(Provider):
+    """Provedor que registra se o gerador foi fechado"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.closed = False
+
+    def stream(self, messages):
+        try:
+            yield from self.tokens
+        finally:
+            self.closed = True
+
+
+class LocalProviderTests(TestCase):
+    def test_is_deterministic(self):
+        provider = LocalProvider(delay=0)
+        messages = [{'role': 'user', 'content': 'Como melhorar meu currículo?'}]
+        first = list(provider.stream(messages))
+        self.assertEqual(first, list(provider.stream(messages)))
+        self.assertGreater(len(first), 1)
+        self.assertEqual(''.join(first), provider.answer('Como melhorar meu currículo?'))
+
+    def test_unknown_topic_quotes_question(self):
+        self.assertIn('"astronomia"', LocalProvider(delay=0).answer('astronomia'))
+
+
+class WorkAIStreamTests(ClientTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ana')
+        self.client.force_login(self.user)
+
+    def ask(self, message, **data):
+        return self.client.post('/api/work_ai/stream/', {'message': message, **data})
+
+    def test_streams_session_deltas_and_done(self):
+        response = self.ask('Dicas para entrevista')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        parsed = events(b''.join(response.streaming_content).decode())
+
+        session = AIChatSession.objects.get(user=self.user)
+        self.assertEqual(parsed[0], ('session', {'session': session.id, 'title': 'Dicas para entrevista'}))
+        deltas = [data['delta'] for event, data in parsed[1:-1]]
+        self.assertEqual(''.join(deltas), LocalProvider().answer('Dicas para entrevista'))
+        answer = AIChatMessage.objects.get(session=session, role='assistant')
+        self.assertEqual(parsed[-1], ('done', {'message': answer.id}))
+        self.assertEqual(answer.content, ''.join(deltas))
+
+    def test_continues_existing_session(self):
+        b''.join(self.ask('Oi').streaming_content)
+        session = AIChatSession.objects.get()
+        b''.join(self.ask('E sobre vagas?', session=session.id).streaming_content)
+        self.assertEqual(AIChatSession.objects.count(), 1)
+        self.assertEqual(AIChatMessage.objects.filter(session=session).count(), 4)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.ask('').status_code, 400)
+        self.assertEqual(self.ask('x' * 5000).status_code, 400)
+        self.assertEqual(self.ask('Oi', session='abc').status_code, 400)
+
+        other = AIChatSession.objects.create(user=User.objects.create_user('bia'), title='Dela')
+        self.assertEqual(self.ask('Oi', session=other.id).status_code, 404)
+        self.assertFalse(AIChatMessage.objects.filter(session=other).exists())
+
+
+class ResponseStreamTests(TestCase):
+    def setUp(self):
+        self.session, self.history = start_turn(User.objects.create_user('ana'), 'Oi')
+        self.provider = TrackingProvider(['um ', 'dois ', 'três'])
+
+    def stream(self):
+        return ResponseStream(self.session, self.history, self.provider, time.perf_counter())
+
+    def test_client_leaving_closes_provider_and_keeps_partial(self):
+        body = iter(self.stream())
+        next(body)
+        next(body)
+        body.close()
+        self.assertTrue(self.provider.closed)
+        self.assertEqual(AIChatMessage.objects.get(role='assistant').content, 'um ')
+
+    async def test_async_client_leaving_closes_provider(self):
+        body = self.stream().__aiter__()
+        await anext(body)
+        await anext(body)
+        await body.aclose()
+        self.assertTrue(self.provider.closed)
+        self.assertEqual((await AIChatMessage.objects.aget(role='assistant')).content, 'um ')
@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+
+from global_app import matchmaking, signaling
+from global_app.matchmaking import MODES, MatchQueue, Ticket
+from global_app.tests.utils import ClientTestCase, WebSocketTestCase
+
+
+class MatchQueueTests(SimpleTestCase):
+    async def test_pairs_oldest_waiting(self):
+        queue = MatchQueue()
+        first, second, third = Ticket(1, {'id': 1}), Ticket(2, {'id': 2}), Ticket(3, {'id': 3})
+        self.assertIsNone(queue.join(first))
+        self.assertIs(queue.join(second), first)
+        self.assertEqual(len(queue), 0)
+
+        match = first.future.result()
+        self.assertEqual(match['role'], 'caller')
+        self.assertEqual(match['partner'], {'id': 2})
+        self.assertEqual(second.future.result()['room'], match['room'])
+        self.assertIsNone(queue.join(third))
+
+    async def test_online_users_first(self):
+        queue = MatchQueue()
+        # Parceiros recentes entre si: os dois ficam esperando
+        queue._remember(1, 2, time.monotonic())
+        idle, online = Ticket(1, {}, online=False), Ticket(2, {}, online=True)
+        queue.join(idle)
+        queue.join(online)
+        self.assertEqual(queue.join(Ticket(3, {})).user_id, 2)
+
+    async def test_recent_partners_are_not_repeated(self):
+        queue = MatchQueue(recent_window=60)
+        queue.join(Ticket(1, {}))
+        queue.join(Ticket(2, {}))
+        self.assertEqual(queue.recent_partner_ids(1), [2])
+
+        queue.join(Ticket(1, {}))
+        self.assertIsNone(queue.join(Ticket(2, {})))
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.join(Ticket(3, {})).user_id, 1)
+
+    async def test_expired_partners_are_pruned(self):
+        queue = MatchQueue(recent_window=0.01)
+        queue.join(Ticket(1, {}))
+        queue.join(Ticket(2, {}))
+        await asyncio.sleep(0.02)
+        self.assertEqual(queue.recent_partner_ids(1), [])
+        queue.join(Ticket(3, {}))
+        self.assertEqual(queue._recent, {})
+
+    async def test_leave_cancels_ticket(self):
+        queue = MatchQueue()
+        ticket = Ticket(1, {})
+        queue.join(ticket)
+        self.assertIs(queue.leave(1), ticket)
+        self.assertTrue(ticket.future.cancelled())
+        self.assertNotIn(1, queue)
+
+    async def test_leave_keeps_a_newer_ticket(self):
+        queue = MatchQueue()
+        old, new = Ticket(1, {}), Ticket(1, {})
+        queue.join(old)
+        queue.join(new)
+        self.assertTrue(old.future.cancelled())
+        self.assertIsNone(queue.leave(1, old))
+        self.assertIn(1, queue)
+        self.assertIs(queue.leave(1, new), new)
+        self.assertNotIn(1, queue)
+
+    async def test_recent_partners_read_from_another_thread(self):
+        queue = MatchQueue(recent_partners=50, recent_window=60)
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                try:
+                    queue.recent_partner_ids(1)
+                except RuntimeError as error:
+                    errors.append(error)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for other_id in range(2, 2000):
+            queue.join(Ticket(1, {}))
+            queue.join(Ticket(other_id, {}))
+        stop.set()
+        reader.join()
+        self.assertEqual(errors, [])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CallsSocketTests(WebSocketTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user('ana')
+        cls.bia = User.objects.create_user('bia')
+
+    def setUp(self):
+        patcher = mock.patch.dict(matchmaking.queues, {mode: MatchQueue() for mode in MODES})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.close_rooms)
+
+    def close_rooms(self):
+        for room in signaling.rooms.rooms.values():
+            if room.timer is not None:
+                room.timer.cancel()
+        signaling.rooms.rooms.clear()
+
+    async def test_two_users_are_matched_into_a_room(self):
+        ana = await self.connect('/ws/calls/', self.ana)
+        bia = await self.connect('/ws/calls/', self.bia)
+
+        await ana.send_json({'type': 'search', 'mode': 'voice'})
+        self.assertEqual(await ana.receive_json(), {'type': 'waiting', 'mode': 'voice', 'queue_size': 1})
+        await bia.send_json({'type': 'search', 'mode': 'voice'})
+
+        ana_match, bia_match = await ana.receive_json(), await bia.receive_json()
+        self.assertEqual(ana_match['type'], 'matched')
+        self.assertEqual((ana_match['role'], bia_match['role']), ('caller', 'callee'))
+        self.assertEqual(ana_match['room'], bia_match['room'])
+        self.assertEqual(ana_match['partner']['username'], 'bia')
+        self.assertEqual(ana_match['partner']['chat_url'], '/chat/bia/')
+        self.assertTrue(signaling.room_allows(ana_match['room'], {self.ana.id, self.bia.id}))
+        await self.close(ana, bia)
+
+    async def test_modes_do_not_mix(self):
+        ana = await self.connect('/ws/calls/', self.ana)
+        bia = await self.connect('/ws/calls/', self.bia)
+        await ana.send_json({'type': 'search', 'mode': 'video'})
+        await bia.send_json({'type': 'search', 'mode': 'voice'})
+        self.assertEqual((await ana.receive_json())['type'], 'waiting')
+        self.assertEqual((await bia.receive_json())['type'], 'waiting')
+        await self.close(ana, bia)
+
+    async def test_cancel_and_disconnect_leave_the_queue(self):
+        ana = await self.connect('/ws/calls/', self.ana)
+        await ana.send_json({'type': 'search'})
+        await ana.receive_json()
+        await ana.send_json({'type': 'cancel'})
+        await ana.send_json({'type': 'search'})
+        self.assertEqual((await ana.receive_json())['queue_size'], 1)
+
+        await ana.close()
+        self.assertEqual(len(matchmaking.queues['video']), 0)
+        await self.close()
+
+    async def test_another_tab_keeps_its_search(self):
+        first = await self.connect('/ws/calls/', self.ana)
+        second = await self.connect('/ws/calls/', self.ana)
+        await first.send_json({'type': 'search'})
+        await first.receive_json()
+        await second.send_json({'type': 'search'})
+        self.assertEqual((await second.receive_json())['queue_size'], 1)
+
+        # A primeira aba cancela (e fecha): a busca da segunda continua na fila
+        await first.send_json({'type': 'cancel'})
+        await first.send_json({'type': 'dance'})
+        await first.receive_json()
+        self.assertIn(self.ana.id, matchmaking.queues['video'])
+        await first.close()
+        self.assertIn(self.ana.id, matchmaking.queues['video'])
+
+        bia = await self.connect('/ws/calls/', self.bia)
+        await bia.send_json({'type': 'search'})
+        self.assertEqual((await second.receive_json())['type'], 'matched')
+        await self.close(second, bia)
+
+    async def test_unknown_message(self):
+        ana = await self.connect('/ws/calls/', self.ana)
+        await ana.send_json({'type': 'dance'})
+        self.assertEqual((await ana.receive_json())['type'], 'error')
+        await self.close(ana)
+
+
+class CallsViewTests(ClientTestCase):
+    def test_lists_recent_partners(self):
+        ana = User.objects.create_user('ana')
+        bia = User.objects.create_user('bia')
+        queue = MatchQueue()
+        queue._remember(ana.id, bia.id, time.monotonic())
+        with mock.patch.dict(matchmaking.queues, {'video': queue}):
+            self.client.force_login(ana)
+            response = self.client.get('/calls/')
+        self.assertEqual(response.context['recent_partners'], [bia])
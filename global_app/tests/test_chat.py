@@ -0,0 +1,206 @@
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import OperationalError
+from django.test import TransactionTestCase, override_settings
+
+from global_app import chat
+from global_app.models import Conversation, ConversationParticipant, Friendship, Message
+from global_app.tests.utils import ClientTestCase, WebSocketTestCase
+from global_app.websocket import LocalClient
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ChatSocketTests(WebSocketTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user('ana', first_name='Ana')
+        cls.bia = User.objects.create_user('bia')
+        cls.conversation = Conversation.between(cls.ana, cls.bia)
+
+    async def test_message_reaches_both_participants_and_is_saved(self):
+        ana = await self.connect('/ws/chat/', self.ana)
+        bia = await self.connect('/ws/chat/', self.bia)
+        await ana.send_json({'type': 'message', 'conversation': self.conversation.id, 'content': ' Oi! '})
+
+        for client in (ana, bia):
+            data = await client.receive_json()
+            self.assertEqual(data['type'], 'message')
+            self.assertEqual(data['message']['content'], 'Oi!')
+            self.assertEqual(data['message']['sender_name'], 'Ana')
+
+        await sync_to_async(chat.message_buffer.flush)()
+        saved = await Message.objects.aget(conversation=self.conversation)
+        self.assertEqual(saved.uid, data['message']['uid'])
+        unread = await sync_to_async(chat.unread_counts)(self.bia)
+        self.assertEqual(unread, {self.conversation.id: 1})
+        await self.close(ana, bia)
+
+    async def test_read_clears_unread(self):
+        ana = await self.connect('/ws/chat/', self.ana)
+        bia = await self.connect('/ws/chat/', self.bia)
+        await ana.send_json({'type': 'message', 'conversation': self.conversation.id, 'content': 'Oi'})
+        await bia.receive_json()
+        await bia.send_json({'type': 'read', 'conversation': self.conversation.id})
+        # O read não tem resposta: uma mensagem inválida depois dele marca o fim
+        await bia.send_json({'type': 'ping'})
+        self.assertEqual((await bia.receive_json())['type'], 'error')
+        participant = await ConversationParticipant.objects.aget(conversation=self.conversation, user=self.bia)
+        self.assertEqual(participant.unread_count, 0)
+        await self.close(ana, bia)
+
+    async def test_outsider_cannot_post(self):
+        outsider = await sync_to_async(User.objects.create_user)('eva')
+        client = await self.connect('/ws/chat/', outsider)
+        await client.send_json({'type': 'message', 'conversation': self.conversation.id, 'content': 'Oi'})
+        self.assertEqual(await client.receive_json(), {'type': 'error', 'error': 'Conversa não encontrada'})
+        await self.close(client)
+
+    async def test_empty_message_is_rejected(self):
+        client = await self.connect('/ws/chat/', self.ana)
+        await client.send_json({'type': 'message', 'conversation': self.conversation.id, 'content': '   '})
+        self.assertEqual((await client.receive_json())['type'], 'error')
+        self.assertEqual(chat.message_buffer.pending_count(), 0)
+        await self.close(client)
+
+    async def test_foreign_origin_is_refused(self):
+        for origin in ['https://evil.example', '', 'null']:
+            client = LocalClient('/ws/chat/', self.ana, origin=origin)
+            self.assertFalse(await client.connect())
+
+    async def test_anonymous_is_refused(self):
+        client = LocalClient('/ws/chat/', AnonymousUser())
+        self.assertFalse(await client.connect())
+
+
+class ChatViewTests(ClientTestCase):
+    def setUp(self):
+        self.ana = User.objects.create_user('ana')
+        self.bia = User.objects.create_user('bia')
+        self.client.force_login(self.ana)
+
+    def test_chat_only_with_friends(self):
+        response = self.client.get('/chat/bia/')
+        self.assertRedirects(response, '/friends/', fetch_redirect_response=False)
+        self.assertFalse(Conversation.objects.exists())
+
+        Friendship.objects.create(user=self.ana, friend=self.bia)
+        self.assertEqual(self.client.get('/chat/bia/').status_code, 200)
+        # Abrir de novo reaproveita a conversa
+        self.client.get('/chat/bia/')
+        self.assertEqual(Conversation.objects.count(), 1)
+
+
+class MessageBufferTests(TransactionTestCase):
+    # Transação de verdade: o SQLite só confere as FKs no commit
+
+    def setUp(self):
+        self.ana = User.objects.create_user('ana')
+        self.bia = User.objects.create_user('bia')
+        self.conversation = Conversation.between(self.ana, self.bia)
+        self.participants = [self.ana.id, self.bia.id]
+        self.buffer = chat.MessageBuffer(max_pending=3, max_buffered=4)
+
+    def add(self, content, conversation_id=None):
+        return self.buffer.add(conversation_id or self.conversation.id, self.ana, content, self.participants)
+
+    def test_flush_writes_batch_and_counters(self):
+        self.add('1')
+        self.add('2')
+        _, flush_now = self.add('3')
+        self.assertTrue(flush_now)
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(list(Message.objects.values_list('content', flat=True)), ['1', '2', '3'])
+        self.assertEqual(chat.unread_counts(self.bia), {self.conversation.id: 3})
+        self.assertEqual(chat.unread_counts(self.ana), {})
+
+    def test_poison_message_is_dropped_and_the_rest_saved(self):
+        self.add('antes')
+        self.add('conversa apagada', conversation_id=999999)
+        self.add('depois')
+        with self.assertLogs('global_app.chat', 'ERROR'):
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.buffer.pending_count(), 0)
+        self.assertEqual(list(Message.objects.values_list('content', flat=True)), ['antes', 'depois'])
+
+    def test_transient_error_is_retried_until_it_passes(self):
+        self.add('1')
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=OperationalError('database is locked')):
+            for _ in range(10):
+                with self.assertLogs('global_app.chat', 'ERROR'):
+                    self.assertEqual(self.buffer.flush(), 0)
+        # Já entregue ao vivo: continua no buffer até o banco aceitar
+        self.assertEqual(self.buffer.pending_count(), 1)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(list(Message.objects.values_list('content', flat=True)), ['1'])
+
+    def test_lock_while_writing_one_by_one_keeps_the_rest(self):
+        self.add('conversa apagada', conversation_id=999999)
+        self.add('1')
+        self.add('2')
+        bulk_create = Message.objects.bulk_create
+        calls = []
+
+        def flaky(messages):
+            calls.append(len(messages))
+            if len(calls) == 3:
+                raise OperationalError('database is locked')
+            return bulk_create(messages)
+
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=flaky):
+            with self.assertLogs('global_app.chat', 'ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.pending_count(), 2)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(list(Message.objects.values_list('content', flat=True)), ['1', '2'])
+
+    def test_transient_error_keeps_order_and_then_succeeds(self):
+        self.add('1')
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('global_app.chat', 'ERROR'):
+                self.buffer.flush()
+        self.add('2')
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(list(Message.objects.values_list('content', flat=True)), ['1', '2'])
+
+    def test_buffer_is_bounded_while_database_is_down(self):
+        for i in range(6):
+            self.add(str(i))
+        with mock.patch.object(Message.objects, 'bulk_create', side_effect=OperationalError('database is locked')):
+            with self.assertLogs('global_app.chat', 'ERROR'):
+                self.buffer.flush()
+        self.assertEqual(self.buffer.pending_count(), 4)
+        self.buffer.flush()
+        self.assertEqual(list(Message.objects.values_list('content', flat=True)), ['2', '3', '4', '5'])
+
+
+class ChatMessagesViewTests(ClientTestCase):
+    def setUp(self):
+        self.ana = User.objects.create_user('ana')
+        self.bia = User.objects.create_user('bia')
+        self.conversation = Conversation.between(self.ana, self.bia)
+        self.url = f'/api/chat/{self.conversation.id}/messages/'
+        buffer = chat.MessageBuffer()
+        for i in range(5):
+            buffer.add(self.conversation.id, self.ana, str(i), [self.ana.id, self.bia.id])
+        buffer.flush()
+        self.client.force_login(self.ana)
+
+    def test_pages_backwards(self):
+        data = self.client.get(self.url, {'limit': 3}).json()
+        self.assertEqual([message['content'] for message in data['messages']], ['2', '3', '4'])
+
+        data = self.client.get(self.url, {'limit': 3, 'before': data['next_before']}).json()
+        self.assertEqual([message['content'] for message in data['messages']], ['0', '1'])
+        self.assertIsNone(data['next_before'])
+
+    def test_bad_parameters_are_400(self):
+        for params in [{'before': 'abc'}, {'limit': 'x'}, {'before': '9' * 30}, {'before': '-1'}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json(), {'success': False, 'error': 'Parâmetros inválidos'})
+
+    def test_outsider_gets_404(self):
+        self.client.force_login(User.objects.create_user('eva'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -0,0 +1,52 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from global_app import matching
+from global_app.expiry import close_expired
+from global_app.models import Opportunity
+
+
+def create(deadline=None, **fields):
+    return Opportunity.objects.create(title='Vaga', company='Empresa', description='Descrição', deadline=deadline, **fields)
+
+
+class CloseExpiredTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.expired = [create(today - timedelta(days=days)) for days in range(1, 6)]
+        self.due_today = create(today)
+        self.future = create(today + timedelta(days=3))
+        self.no_deadline = create()
+        self.already_closed = create(today - timedelta(days=1), status='closed')
+
+    def test_open_excludes_past_deadlines(self):
+        self.assertEqual(
+            set(Opportunity.objects.open().values_list('id', flat=True)),
+            {self.due_today.id, self.future.id, self.no_deadline.id},
+        )
+
+    def test_closes_only_expired_in_batches(self):
+        with mock.patch.object(matching.index, 'mark_dirty') as mark_dirty, \
+                CaptureQueriesContext(connection) as context:
+            self.assertEqual(close_expired(batch_size=2), 5)
+        updates = [query for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(
+            set(Opportunity.objects.filter(status='closed').values_list('id', flat=True)),
+            {opportunity.id for opportunity in self.expired} | {self.already_closed.id},
+        )
+        # Saem da matriz de recomendação, já que o update não dispara signals
+        self.assertEqual({call.args[0] for call in mark_dirty.call_args_list}, {o.id for o in self.expired})
+        self.assertEqual(close_expired(batch_size=2), 0)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('close_expired_opportunities', batch_size=3, stdout=out)
+        self.assertIn('5 oportunidade(s) vencida(s) fechada(s)', out.getvalue())
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from global_app.friendships import mutual_friends
+from global_app.models import Friendship
+
+
+def befriend(user, friend):
+    Friendship.objects.create(user=user, friend=friend)
+    Friendship.objects.create(user=friend, friend=user)
+
+
+class MutualFriendsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ana, self.bia, self.caio, self.duda = [User.objects.create_user(name) for name in ['ana', 'bia', 'caio', 'duda']]
+        for common in (self.caio, self.duda):
+            befriend(self.ana, common)
+            befriend(self.bia, common)
+
+    def test_count_and_users(self):
+        count, users = mutual_friends(self.ana, self.bia, limit=1)
+        self.assertEqual(count, 2)
+        self.assertEqual(users, [self.caio])
+
+    def test_result_is_cached_per_pair(self):
+        mutual_friends(self.ana, self.bia)
+        # A ordem do par não importa; só falta buscar os usuários
+        with self.assertNumQueries(1):
+            count, _ = mutual_friends(self.bia, self.ana)
+        self.assertEqual(count, 2)
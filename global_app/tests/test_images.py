@@ -0,0 +1,85 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from global_app import images
+from global_app.images import generate_renditions, needs_processing
+from global_app.models import MediaBlob, Post
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+
+def jpeg(size, color='red', orientation=None):
+    exif = Image.Exif()
+    exif[0x010F] = 'Câmera'
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif)
+    return ContentFile(buffer.getvalue(), name='foto.jpg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenditionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('autor')
+
+    def open(self, storage, name):
+        with storage.open(name, 'rb') as handle:
+            image = Image.open(handle)
+            image.load()
+        return image
+
+    def test_avatar_sizes(self):
+        profile = self.user.profile
+        profile.avatar = jpeg((600, 300))
+        profile.save()
+        self.assertTrue(needs_processing(profile, 'avatar'))
+
+        renditions = generate_renditions('global_app.Profile', profile.pk, 'avatar')
+        profile.refresh_from_db()
+        self.assertEqual(profile.avatar_renditions, renditions)
+        self.assertEqual(renditions['source'], profile.avatar.name)
+        self.assertFalse(needs_processing(profile, 'avatar'))
+        for size, (width, height, _) in images.RENDITIONS['avatar'].items():
+            self.assertEqual(self.open(profile.avatar.storage, renditions[size]).size, (width, height))
+            self.assertEqual(MediaBlob.objects.get(name=renditions[size]).ref_count, 1)
+
+    def test_exif_is_applied_and_stripped(self):
+        # Orientação 6: a foto foi tirada com a câmera girada 90°
+        post = Post.objects.create(author=self.user, content='foto', image=jpeg((2400, 1600), orientation=6))
+        renditions = generate_renditions('global_app.Post', post.pk, 'image')
+        large = self.open(post.image.storage, renditions['large'])
+        self.assertEqual(large.size, (800, 1200))
+        self.assertEqual(len(large.getexif()), 0)
+        self.assertNotIn('exif', large.info)
+
+    def test_replaced_source_is_not_overwritten(self):
+        post = Post.objects.create(author=self.user, content='foto', image=jpeg((300, 300)))
+        replacement = Post.objects.create(author=self.user, content='outra', image=jpeg((300, 300), 'blue'))
+        render = images._render
+
+        def replace_then_render(*args):
+            # Outro upload troca a imagem enquanto as versões são geradas
+            Post.objects.filter(pk=post.pk).update(image=replacement.image.name)
+            return render(*args)
+
+        with mock.patch.object(images, '_render', side_effect=replace_then_render):
+            renditions = generate_renditions('global_app.Post', post.pk, 'image')
+        post.refresh_from_db()
+        self.assertEqual(post.image_renditions, {})
+        self.assertTrue(needs_processing(post, 'image'))
+        self.assertFalse(MediaBlob.objects.filter(name=renditions['large'], ref_count__gt=0).exists())
+
+    def test_missing_instance(self):
+        self.assertIsNone(generate_renditions('global_app.Post', 0, 'image'))
@@ -0,0 +1,57 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from global_app.models import Like, Post
+from global_app.tests.utils import ClientTestCase
+
+
+class LikeCounterTests(ClientTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('autor')
+        self.post = Post.objects.create(author=self.author, content='oi')
+        self.url = f'/post/{self.post.id}/like/'
+
+    def like_as(self, user):
+        self.client.force_login(user)
+        return self.client.post(self.url).json()
+
+    def test_toggle_updates_counter(self):
+        user = User.objects.create_user('fã')
+        self.assertEqual(self.like_as(user), {'liked': True, 'total_likes': 1})
+        self.assertEqual(self.like_as(user), {'liked': False, 'total_likes': 0})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_counter_matches_likes(self):
+        users = [User.objects.create_user(f'fã{i}') for i in range(3)]
+        for user in users:
+            self.like_as(user)
+        self.like_as(users[0])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 2)
+        self.assertEqual(self.post.like_count, Like.objects.filter(post=self.post).count())
+
+    def test_get_not_allowed(self):
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+
+class ReconcileLikeCountsTests(TestCase):
+    def test_fixes_drifted_counters_in_batches(self):
+        author = User.objects.create_user('autor')
+        fans = [User.objects.create_user(f'fã{i}') for i in range(3)]
+        posts = [Post.objects.create(author=author, content=str(i)) for i in range(5)]
+        for fan in fans:
+            Like.objects.create(post=posts[0], user=fan)
+        Like.objects.create(post=posts[3], user=fans[0])
+        Post.objects.filter(id=posts[0].id).update(like_count=1)
+        Post.objects.filter(id=posts[4].id).update(like_count=9)
+
+        out = io.StringIO()
+        call_command('reconcile_like_counts', batch_size=2, stdout=out)
+        counts = list(Post.objects.order_by('id').values_list('like_count', flat=True))
+        self.assertEqual(counts, [3, 0, 0, 1, 0])
+        self.assertIn('5 post(s) verificado(s), 3 contador(es) corrigido(s)', out.getvalue())
@@ -0,0 +1,58 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from global_app.matching import MatchingIndex
+from global_app.models import Opportunity
+
+
+class RecommendTests(TestCase):
+    def test_profile_skills_rank_opportunities(self):
+        python = Opportunity.objects.create(title='Dev', company='A', description='.', skills='Python, Django')
+        Opportunity.objects.create(title='Designer', company='B', description='.', skills='Figma')
+        user = User.objects.create_user('ana')
+        user.profile.set_skills('Django')
+        self.assertEqual(MatchingIndex().recommend(user), [python.id])
+
+
+class RebuildTests(SimpleTestCase):
+    def test_first_build_happens_once(self):
+        index = MatchingIndex()
+        calls = []
+
+        def rebuild():
+            calls.append(1)
+            time.sleep(0.05)
+            index._built_at = time.monotonic()
+
+        with mock.patch.object(index, 'rebuild', side_effect=rebuild):
+            threads = [threading.Thread(target=index.refresh) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_matrix_is_rebuilt_in_background(self):
+        index = MatchingIndex(rebuild_interval=0)
+        index._built_at = time.monotonic() - 1
+        started, release = threading.Event(), threading.Event()
+
+        def rebuild():
+            started.set()
+            release.wait(1)
+
+        with mock.patch.object(index, 'rebuild', side_effect=rebuild) as patched, \
+                mock.patch.object(index, '_refresh_dirty') as refresh_dirty:
+            # Não espera o rebuild, e um segundo refresh não dispara outro
+            index.refresh()
+            self.assertTrue(started.wait(1))
+            index.refresh()
+            refresh_dirty.assert_not_called()
+            release.set()
+            while index._rebuild_lock.locked():
+                time.sleep(0.01)
+        self.assertEqual(patched.call_count, 1)
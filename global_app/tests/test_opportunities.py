@@ -0,0 +1,105 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from global_app.models import Application, Opportunity
+from global_app.tests.utils import ClientTestCase
+
+
+def create_opportunity(**fields):
+    fields = {'title': 'Vaga', 'company': 'Empresa', 'description': 'Descrição', **fields}
+    return Opportunity.objects.create(**fields)
+
+
+class ApplicationCounterTests(ClientTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('candidato')
+        self.client.force_login(self.user)
+        self.opportunity = create_opportunity()
+
+    def apply(self):
+        return self.client.post(f'/api/opportunities/apply/{self.opportunity.id}/', {'cover_letter': 'Olá'})
+
+    def test_apply_and_cancel_update_counter(self):
+        application_id = self.apply().json()['application_id']
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 1)
+
+        self.client.post(f'/api/opportunities/cancel/{application_id}/')
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 0)
+
+    def test_second_application_is_not_counted(self):
+        self.apply()
+        self.assertEqual(self.apply().status_code, 400)
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 1)
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_cancel_only_pending(self):
+        application_id = self.apply().json()['application_id']
+        Application.objects.filter(id=application_id).update(status='reviewing')
+        self.assertEqual(self.client.post(f'/api/opportunities/cancel/{application_id}/').status_code, 400)
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 1)
+
+
+    def test_counter_follows_every_create_and_delete(self):
+        other = User.objects.create_user('outro')
+        Application.objects.create(opportunity=self.opportunity, user=self.user)
+        Application.objects.create(opportunity=self.opportunity, user=other)
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 2)
+
+        # Cascade ao apagar o usuário e delete em massa (delete_selected do admin)
+        other.delete()
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 1)
+        Application.objects.all().delete()
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 0)
+
+    def test_admin_add_is_counted(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+        self.client.post('/admin/global_app/application/add/', {
+            'opportunity': self.opportunity.id,
+            'user': self.user.id,
+            'status': 'pending',
+            'cover_letter': '',
+            'admin_notes': '',
+        })
+        self.assertTrue(Application.objects.exists())
+        self.opportunity.refresh_from_db()
+        self.assertEqual(self.opportunity.application_count, 1)
+
+
+class OpportunityListTests(ClientTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('candidato')
+        self.client.force_login(self.user)
+
+    def count_queries(self):
+        # A primeira leitura recalcula as linhas novas da matriz de recomendação
+        self.client.get('/opportunities/')
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get('/opportunities/').status_code, 200)
+        return len(context.captured_queries)
+
+    def add_opportunities(self, count):
+        for i in range(count):
+            opportunity = create_opportunity(title=f'Vaga {i}', skills='Python')
+            if i % 2:
+                Application.objects.create(opportunity=opportunity, user=self.user)
+
+    def test_queries_do_not_grow_with_page(self):
+        self.add_opportunities(2)
+        few = self.count_queries()
+        self.add_opportunities(8)
+        self.assertEqual(self.count_queries(), few)
+
+    def test_page_shows_stored_counter(self):
+        opportunity = create_opportunity()
+        Opportunity.objects.filter(id=opportunity.id).update(application_count=7)
+        page = self.client.get('/opportunities/').context['opportunities']
+        self.assertEqual([item.total_applications() for item in page], [7])
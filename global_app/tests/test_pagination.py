@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from global_app.models import Post
+from global_app.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_page, parse_page_size
+from global_app.tests.utils import ClientTestCase
+
+
+class CursorTests(TestCase):
+    def test_round_trip(self):
+        when = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(when, 42)), (when, 42))
+
+    def test_invalid_cursor_is_none(self):
+        for cursor in ['', None, 'lixo', encode_cursor(timezone.now(), 1)[:-3] + '!!!']:
+            self.assertIsNone(decode_cursor(cursor))
+
+    def test_pk_out_of_range_is_none(self):
+        when = timezone.now()
+        for pk in [0, -1, 2 ** 63, 10 ** 30]:
+            self.assertIsNone(decode_cursor(encode_cursor(when, pk)))
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(parse_page_size('abc', default=7), 7)
+        self.assertEqual(parse_page_size('0'), 1)
+        self.assertEqual(parse_page_size('1000'), MAX_PAGE_SIZE)
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('autor')
+        base = timezone.now()
+        posts = [Post.objects.create(author=cls.user, content=str(i)) for i in range(7)]
+        # Dois pares com o mesmo created_at: o id desempata
+        for post, offset in zip(posts, [0, 1, 1, 2, 3, 3, 4]):
+            Post.objects.filter(id=post.id).update(created_at=base - timedelta(minutes=offset))
+        cls.expected = list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_pages_cover_everything_once_in_order(self):
+        seen = []
+        cursor = None
+        while True:
+            items, cursor = keyset_page(Post.objects.all(), cursor, limit=3)
+            seen += [post.id for post in items]
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_last_page_has_no_cursor(self):
+        items, cursor = keyset_page(Post.objects.all(), limit=len(self.expected))
+        self.assertEqual(len(items), len(self.expected))
+        self.assertIsNone(cursor)
+
+    def test_new_post_does_not_shift_next_page(self):
+        first, cursor = keyset_page(Post.objects.all(), limit=3)
+        Post.objects.create(author=self.user, content='novo')
+        second, _ = keyset_page(Post.objects.all(), cursor, limit=3)
+        self.assertEqual([post.id for post in first + second], self.expected[:6])
+
+
+class FeedPostsViewTests(ClientTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('leitor', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                Post.objects.create(author=self.user, content=f'post {i}')
+        self.client.force_login(self.user)
+
+    def test_infinite_scroll(self):
+        response = self.client.get('/api/feed/posts/', {'limit': 3})
+        data = response.json()
+        self.assertEqual(data['count'], 3)
+        self.assertIsNotNone(data['next_cursor'])
+
+        data = self.client.get('/api/feed/posts/', {'limit': 3, 'cursor': data['next_cursor']}).json()
+        self.assertEqual(data['count'], 2)
+        self.assertIsNone(data['next_cursor'])
+        self.assertIn('post 0', data['html'])
+
+    def test_huge_cursor_pk_is_not_500(self):
+        cursor = encode_cursor(timezone.now(), 2 ** 64)
+        response = self.client.get('/api/feed/posts/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
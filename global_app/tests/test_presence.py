@@ -0,0 +1,77 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from global_app import presence
+from global_app.models import Profile
+from global_app.presence import PresenceTracker
+
+
+def last_activity(user):
+    return Profile.objects.get(user=user).last_activity
+
+
+class PresenceTrackerTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'u{i}') for i in range(3)]
+        self.old = timezone.now() - timedelta(days=1)
+        Profile.objects.update(last_activity=self.old)
+
+    def test_flush_on_size(self):
+        tracker = PresenceTracker(flush_interval=3600, max_pending=2)
+        tracker.touch(self.users[0].id)
+        self.assertEqual(last_activity(self.users[0]), self.old)
+        with CaptureQueriesContext(connection) as context:
+            tracker.touch(self.users[1].id)
+        updates = [query for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertGreater(last_activity(self.users[0]), self.old)
+        self.assertGreater(last_activity(self.users[1]), self.old)
+        self.assertEqual(last_activity(self.users[2]), self.old)
+
+    def test_flush_on_time(self):
+        tracker = PresenceTracker(flush_interval=60, max_pending=100)
+        now = timezone.now()
+        tracker.touch(self.users[0].id, now)
+        self.assertEqual(last_activity(self.users[0]), self.old)
+        later = now + timedelta(seconds=61)
+        tracker.touch(self.users[1].id, later)
+        self.assertEqual(last_activity(self.users[0]), now)
+        self.assertEqual(last_activity(self.users[1]), later)
+
+    def test_repeated_heartbeats_keep_the_latest(self):
+        tracker = PresenceTracker(flush_interval=3600, max_pending=100)
+        now = timezone.now()
+        tracker.touch(self.users[0].id, now - timedelta(seconds=30))
+        tracker.touch(self.users[0].id, now)
+        self.assertEqual(tracker.flush(), 1)
+        self.assertEqual(last_activity(self.users[0]), now)
+
+    def test_online_ids_read_the_buffer(self):
+        tracker = PresenceTracker(flush_interval=3600, max_pending=100)
+        tracker.touch(self.users[0].id)
+        tracker.touch(self.users[1].id, timezone.now() - presence.ONLINE_WINDOW * 2)
+        self.assertEqual(tracker.online_user_ids(), [self.users[0].id])
+        self.assertEqual(tracker.online_user_ids(among=[self.users[2].id]), [])
+
+
+class IsOnlineTests(TestCase):
+    def test_unflushed_heartbeat_counts(self):
+        # Tracker próprio: o global lembra ids de outros testes
+        tracker = PresenceTracker(flush_interval=3600, max_pending=100)
+        patcher = mock.patch.object(presence, 'tracker', tracker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        user = User.objects.create_user('ana')
+        old = timezone.now() - timedelta(days=1)
+        Profile.objects.filter(user=user).update(last_activity=old)
+        profile = Profile.objects.get(user=user)
+        self.assertFalse(profile.is_online())
+        tracker.touch(user.id)
+        self.assertEqual(last_activity(user), old)
+        self.assertTrue(profile.is_online())
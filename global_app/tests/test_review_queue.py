@@ -0,0 +1,89 @@
+import csv
+import io
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+
+from global_app import admin as app_admin
+from global_app.models import Application, Opportunity
+from global_app.tests.utils import ClientTestCase
+
+QUEUE_URL = '/admin/global_app/application/review-queue/'
+EXPORT_URL = '/admin/global_app/application/review-queue/export/'
+
+
+class ReviewQueueTests(ClientTestCase):
+    def setUp(self):
+        self.job = Opportunity.objects.create(title='Vaga', company='Empresa', description='.', type='job')
+        self.demand = Opportunity.objects.create(title='Projeto', company='Outra', description='.', type='demand')
+        self.applications = [
+            Application.objects.create(
+                opportunity=self.job if i < 4 else self.demand,
+                user=User.objects.create_user(f'candidato{i}', f'c{i}@example.com'),
+                status='reviewing' if i == 0 else 'pending',
+                cover_letter=f'Carta {i}',
+            )
+            for i in range(6)
+        ]
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    def staff(self, *codenames):
+        user = User.objects.create_user(f'rh{User.objects.count()}', is_staff=True)
+        user.user_permissions.set(Permission.objects.filter(codename__in=codenames))
+        self.client.force_login(user)
+
+    def test_permissions(self):
+        self.assertEqual(self.client.get(QUEUE_URL).status_code, 302)
+
+        self.staff()
+        self.assertEqual(self.client.get(QUEUE_URL).status_code, 403)
+        self.assertEqual(self.client.get(EXPORT_URL).status_code, 403)
+
+        self.staff('view_application')
+        self.assertEqual(self.client.get(QUEUE_URL).status_code, 200)
+        response = self.client.post(QUEUE_URL, {'new_status': 'accepted', 'ids': [self.applications[1].id]})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Application.objects.filter(status='accepted').exists())
+
+    def test_keyset_pages_and_status_counts(self):
+        self.client.force_login(self.admin)
+        expected = list(
+            Application.objects.filter(status='pending').order_by('-applied_at', '-id').values_list('id', flat=True)
+        )
+        seen, params = [], {}
+        with mock.patch.object(app_admin, 'REVIEW_PAGE_SIZE', 2):
+            while True:
+                context = self.client.get(QUEUE_URL, params).context
+                seen += [application.id for application in context['applications']]
+                if not context['next_cursor']:
+                    break
+                params = {'cursor': context['next_cursor']}
+        self.assertEqual(seen, expected)
+
+        counts = {value: count for value, _, count in context['status_choices']}
+        self.assertEqual((counts['pending'], counts['reviewing'], counts['accepted']), (5, 1, 0))
+
+        context = self.client.get(QUEUE_URL, {'type': 'demand', 'status': ''}).context
+        self.assertEqual({a.id for a in context['applications']}, {a.id for a in self.applications[4:]})
+
+    def test_bulk_status_change(self):
+        self.client.force_login(self.admin)
+        ids = [application.id for application in self.applications[1:3]]
+        response = self.client.post(QUEUE_URL, {'new_status': 'accepted', 'ids': ids + ['x']})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(sorted(Application.objects.filter(status='accepted').values_list('id', flat=True)), ids)
+
+        self.client.post(QUEUE_URL, {'new_status': 'inventado', 'ids': ids})
+        self.assertEqual(Application.objects.filter(status='accepted').count(), 2)
+
+    def test_csv_export_follows_filters(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(EXPORT_URL, {'status': 'pending', 'type': 'job'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('﻿'))
+        rows = list(csv.reader(io.StringIO(body.lstrip('﻿'))))
+        self.assertEqual(rows[0][:3], ['ID', 'Data', 'Status'])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [a.id for a in reversed(self.applications[1:4])])
+        self.assertEqual(rows[1][2], 'Pendente')
+        self.assertEqual(rows[1][-1], 'Carta 3')
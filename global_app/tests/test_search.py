@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User, update_last_login
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from global_app import search
+from global_app.models import Opportunity
+from global_app.search import match_expression, search_opportunities, search_user_ids
+from global_app.tests.utils import ClientTestCase
+
+
+def index_queries(context):
+    return [query['sql'] for query in context.captured_queries if search.user_index.table in query['sql']]
+
+
+class MatchExpressionTests(TestCase):
+    def test_tokens_become_quoted_prefixes(self):
+        self.assertEqual(match_expression('joa sil'), '"joa"* "sil"*')
+
+    def test_operators_are_not_injected(self):
+        self.assertEqual(match_expression('a OR "b" NEAR(c'), '"a"* "OR"* "b"* "NEAR"* "c"*')
+        self.assertEqual(match_expression('*"()'), '')
+
+
+class UserSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exact = User.objects.create_user('mariana', first_name='Mariana', last_name='Souza')
+        cls.others = [User.objects.create_user(f'user{i}', first_name='Mariana') for i in range(20)]
+        cls.accented = User.objects.create_user('jsilva', first_name='João', last_name='Silva')
+
+    def test_best_match_first_beyond_candidate_limit(self):
+        # Mais linhas casam do que max_candidates: o melhor ainda vem primeiro
+        original = search.user_index.max_candidates
+        search.user_index.max_candidates = 5
+        try:
+            self.assertEqual(search_user_ids('mari', limit=3)[0], self.exact.id)
+        finally:
+            search.user_index.max_candidates = original
+
+    def test_username_weighs_more_than_name(self):
+        self.assertEqual(search_user_ids('mariana')[0], self.exact.id)
+
+    def test_accents_and_prefixes(self):
+        self.assertEqual(search_user_ids('joao sil'), [self.accented.id])
+
+    def test_rename_reindexes(self):
+        self.accented.first_name = 'Joaquim'
+        self.accented.save()
+        self.assertEqual(search_user_ids('joaquim'), [self.accented.id])
+        self.assertEqual(search_user_ids('joao'), [])
+
+    def test_login_does_not_reindex(self):
+        user = User.objects.get(id=self.exact.id)
+        with CaptureQueriesContext(connection) as context:
+            update_last_login(None, user)
+        self.assertEqual(index_queries(context), [])
+
+    def test_save_without_name_change_does_not_reindex(self):
+        user = User.objects.get(id=self.exact.id)
+        user.email = 'mariana@example.com'
+        with CaptureQueriesContext(connection) as context:
+            user.save()
+        self.assertEqual(index_queries(context), [])
+
+    def test_delete_removes_from_index(self):
+        user_id = self.accented.id
+        self.accented.delete()
+        self.assertNotIn(user_id, search_user_ids('joao'))
+
+
+class SearchUsersViewTests(ClientTestCase):
+    def test_excludes_viewer(self):
+        viewer = User.objects.create_user('ana', first_name='Ana')
+        other = User.objects.create_user('anabela', first_name='Anabela')
+        self.client.force_login(viewer)
+        users = self.client.get('/api/friends/search/', {'q': 'ana'}).json()['users']
+        self.assertEqual([user['id'] for user in users], [other.id])
+
+
+class OpportunitySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def create(**fields):
+            return Opportunity.objects.create(**{'company': 'Empresa', 'description': 'Descrição', **fields})
+
+        cls.title_match = create(title='Desenvolvedor Python', type='job', work_mode='Remoto', skills='Python, Django')
+        cls.description_match = create(title='Analista', description='Usa Python às vezes', type='internship', work_mode='Remoto')
+        cls.closed = [create(title=f'Python {i}', status='closed') for i in range(5)]
+        cls.expired = create(title='Python expirada', deadline=timezone.localdate() - timedelta(days=1))
+
+    def search(self, query='', **filters):
+        queryset, facets = search_opportunities(Opportunity.objects.open(), query, filters)
+        return list(queryset.values_list('id', flat=True)), facets
+
+    def test_title_ranks_above_description(self):
+        ids, _ = self.search('python')
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+
+    def test_closed_do_not_take_candidate_slots(self):
+        original = search.opportunity_index.max_candidates
+        search.opportunity_index.max_candidates = 2
+        try:
+            ids, _ = self.search('python')
+        finally:
+            search.opportunity_index.max_candidates = original
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+
+    def test_filters_apply_before_candidate_limit(self):
+        # Só uma candidata cabe: o filtro escolhe qual, em vez de esvaziar o resultado
+        original = search.opportunity_index.max_candidates
+        search.opportunity_index.max_candidates = 1
+        try:
+            self.assertEqual(self.search('python', type='internship')[0], [self.description_match.id])
+            ids, _ = self.search('python', skill='django')
+            self.assertEqual(ids, [self.title_match.id])
+            self.assertEqual(self.search('python', skill='inexistente')[0], [])
+        finally:
+            search.opportunity_index.max_candidates = original
+
+    def test_facets_ignore_their_own_filter(self):
+        ids, facets = self.search('python', type='job')
+        self.assertEqual(ids, [self.title_match.id])
+        self.assertEqual(
+            {row['value']: row['count'] for row in facets['type']},
+            {'job': 1, 'internship': 1},
+        )
+        self.assertEqual(facets['work_mode'], [{'value': 'Remoto', 'label': 'Remoto', 'count': 1}])
+
+    def test_skill_filter(self):
+        ids, facets = self.search(skill='python')
+        self.assertEqual(ids, [self.title_match.id])
+        self.assertEqual([row['value'] for row in facets['skill']], ['django', 'python'])
@@ -0,0 +1,115 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from global_app import signaling
+from global_app.models import Conversation
+from global_app.signaling import MAX_SIGNAL_SIZE
+from global_app.tests.utils import WebSocketTestCase
+from global_app.websocket import WebSocketDisconnect
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class SignalSocketTests(WebSocketTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = User.objects.create_user('ana', first_name='Ana')
+        cls.bia = User.objects.create_user('bia')
+        cls.conversation = Conversation.between(cls.ana, cls.bia)
+
+    def setUp(self):
+        self.addCleanup(self.close_rooms)
+
+    def close_rooms(self):
+        # As salas e os timers pertencem ao event loop do teste
+        for room in signaling.rooms.rooms.values():
+            if room.timer is not None:
+                room.timer.cancel()
+        signaling.rooms.rooms.clear()
+
+    async def join(self, user, room_id='sala'):
+        client = await self.connect('/ws/signal/', user)
+        await client.send_json({'type': 'join', 'room': room_id})
+        self.assertEqual((await client.receive_json())['type'], 'joined')
+        return client
+
+    async def join_both(self, room_id='sala'):
+        signaling.rooms.create(room_id, (self.ana.id, self.bia.id))
+        ana = await self.join(self.ana, room_id)
+        bia = await self.join(self.bia, room_id)
+        return ana, bia
+
+    async def test_first_to_join_is_initiator(self):
+        ana, bia = await self.join_both()
+        self.assertEqual(await ana.receive_json(), {'type': 'ready', 'initiator': True})
+        self.assertEqual(await bia.receive_json(), {'type': 'ready', 'initiator': False})
+        await self.close(ana, bia)
+
+    async def test_offer_answer_and_candidates_are_relayed(self):
+        ana, bia = await self.join_both()
+        await ana.receive_json()
+        await bia.receive_json()
+
+        await ana.send_json({'type': 'offer', 'sdp': 'v=0 oferta', 'extra': 'descartado'})
+        self.assertEqual(await bia.receive_json(), {'type': 'offer', 'sdp': 'v=0 oferta'})
+        await bia.send_json({'type': 'answer', 'sdp': 'v=0 resposta'})
+        self.assertEqual(await ana.receive_json(), {'type': 'answer', 'sdp': 'v=0 resposta'})
+        await bia.send_json({'type': 'candidate', 'candidate': {'candidate': 'udp 1'}})
+        self.assertEqual(await ana.receive_json(), {'type': 'candidate', 'candidate': {'candidate': 'udp 1'}})
+        await self.close(ana, bia)
+
+    async def test_stranger_cannot_join(self):
+        signaling.rooms.create('sala', (self.ana.id, self.bia.id))
+        eva = await self.connect('/ws/signal/', await User.objects.acreate(username='eva'))
+        await eva.send_json({'type': 'join', 'room': 'sala'})
+        self.assertEqual(await eva.receive_json(), {'type': 'error', 'error': 'Sala não encontrada ou expirada'})
+        await eva.send_json({'type': 'join', 'room': 'nao-existe'})
+        self.assertEqual((await eva.receive_json())['error'], 'Sala não encontrada ou expirada')
+        await self.close(eva)
+
+    async def test_oversized_signal_is_rejected(self):
+        ana, bia = await self.join_both()
+        await ana.receive_json()
+        await bia.receive_json()
+        await ana.send_json({'type': 'offer', 'sdp': 'x' * MAX_SIGNAL_SIZE})
+        self.assertEqual((await ana.receive_json())['error'], 'Mensagem de sinalização grande demais')
+        await self.close(ana, bia)
+
+    async def test_peer_left_and_room_closes_when_empty(self):
+        ana, bia = await self.join_both()
+        await ana.receive_json()
+        await bia.receive_json()
+        await bia.close()
+        self.assertEqual(await ana.receive_json(), {'type': 'peer_left'})
+        await ana.close()
+        self.assertNotIn('sala', signaling.rooms.rooms)
+        await self.close()
+
+    async def test_room_expires_when_partner_never_joins(self):
+        with mock.patch.object(signaling.rooms, 'join_timeout', 0.01):
+            signaling.rooms.create('sala', (self.ana.id, self.bia.id))
+        ana = await self.join(self.ana)
+        self.assertEqual(await ana.receive_json(), {'type': 'timeout'})
+        with self.assertRaises(WebSocketDisconnect):
+            await ana.receive_json()
+        self.assertNotIn('sala', signaling.rooms.rooms)
+        await self.close(ana)
+
+    async def test_conversation_call_invites_the_other_participant(self):
+        room_id = f'chat-{self.conversation.id}'
+        bia_chat = await self.connect('/ws/chat/', self.bia)
+        ana = await self.join(self.ana, room_id)
+        self.assertEqual(await bia_chat.receive_json(), {'type': 'call', 'room': room_id, 'from': 'Ana'})
+
+        bia = await self.join(self.bia, room_id)
+        self.assertEqual(await ana.receive_json(), {'type': 'ready', 'initiator': True})
+        self.assertEqual(await bia.receive_json(), {'type': 'ready', 'initiator': False})
+        await self.close(ana, bia, bia_chat)
+
+    async def test_outsider_cannot_open_conversation_room(self):
+        eva = await self.connect('/ws/signal/', await User.objects.acreate(username='eva'))
+        await eva.send_json({'type': 'join', 'room': f'chat-{self.conversation.id}'})
+        self.assertEqual((await eva.receive_json())['error'], 'Sala não encontrada ou expirada')
+        self.assertEqual(len(signaling.rooms), 0)
+        await self.close(eva)
@@ -0,0 +1,167 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from global_app.models import Application, MediaBlob, Opportunity, Post
+from global_app.storage import ContentAddressedStorage, private_storage
+from global_app.tests.utils import ClientTestCase
+
+MEDIA_ROOT = tempfile.mkdtemp()
+PRIVATE_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+    shutil.rmtree(PRIVATE_MEDIA_ROOT, ignore_errors=True)
+
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name='foto.png')
+
+
+def gc(**options):
+    call_command('gc_media', stdout=io.StringIO(), **options)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class BlobStorageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('autor')
+
+    def post(self, image):
+        return Post.objects.create(author=self.user, content='foto', image=image)
+
+    def blob(self, name):
+        return MediaBlob.objects.get(name=name)
+
+    def test_same_content_is_stored_once(self):
+        first = self.post(png('red'))
+        second = self.post(png('red'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('blobs/'))
+        self.assertEqual(self.blob(first.image.name).ref_count, 2)
+        self.assertNotEqual(self.post(png('blue')).image.name, first.image.name)
+
+    def test_concurrent_upload_of_same_content(self):
+        # O outro envio gravou o blob depois do nosso exists()
+        name = self.post(png('red')).image.name
+        upload = TemporaryUploadedFile('foto.png', 'image/png', 0, None)
+        upload.write(png('red').read())
+        upload.seek(0)
+        with mock.patch.object(ContentAddressedStorage, 'exists', return_value=False):
+            for content in [png('red'), upload]:
+                self.assertEqual(default_storage.save('foto.png', content), name)
+        upload.close()
+        self.assertEqual(os.listdir(os.path.dirname(default_storage.path(name))), [os.path.basename(name)])
+
+    def test_delete_and_replace_release_references(self):
+        first = self.post(png('red'))
+        second = self.post(png('red'))
+        name = first.image.name
+
+        first.delete()
+        self.assertEqual(self.blob(name).ref_count, 1)
+
+        second = Post.objects.get(id=second.id)
+        second.image = png('blue')
+        second.save()
+        self.assertEqual(self.blob(name).ref_count, 0)
+        self.assertEqual(self.blob(second.image.name).ref_count, 1)
+
+    def test_gc_deletes_only_old_orphans(self):
+        orphan = self.post(png('red'))
+        kept = self.post(png('blue'))
+        name = orphan.image.name
+        orphan.delete()
+
+        # Dentro da carência o blob fica
+        gc()
+        self.assertTrue(default_storage.exists(name))
+
+        gc(grace_minutes=0)
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertFalse(default_storage.exists(name))
+        self.assertTrue(default_storage.exists(kept.image.name))
+
+    def test_reupload_saves_orphan_from_gc(self):
+        name = self.post(png('red')).image.name
+        Post.objects.all().delete()
+        MediaBlob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(hours=2))
+
+        self.post(png('red'))
+        gc()
+        self.assertEqual(self.blob(name).ref_count, 1)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_recount_fixes_drifted_counts(self):
+        post = self.post(png('red'))
+        name = post.image.name
+        MediaBlob.objects.filter(name=name).update(ref_count=0, updated_at=timezone.now() - timedelta(hours=2))
+
+        gc(recount=True)
+        self.assertEqual(self.blob(name).ref_count, 1)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_dry_run_deletes_nothing(self):
+        post = self.post(png('red'))
+        name = post.image.name
+        post.delete()
+        gc(grace_minutes=0, dry_run=True)
+        self.assertTrue(MediaBlob.objects.filter(name=name).exists())
+        self.assertTrue(default_storage.exists(name))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PrivateResumeTests(ClientTestCase):
+    def setUp(self):
+        # O FileField guarda a instância do storage privado: muda o diretório dela
+        patcher = mock.patch.object(private_storage(), 'location', PRIVATE_MEDIA_ROOT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.applicant = User.objects.create_user('candidato')
+        opportunity = Opportunity.objects.create(title='Vaga', company='Empresa', description='Descrição')
+        self.application = Application.objects.create(
+            opportunity=opportunity, user=self.applicant, resume=ContentFile(b'%PDF-1.4 cv', name='cv.pdf'),
+        )
+        self.url = f'{settings.PRIVATE_MEDIA_URL}{self.application.resume.name}'
+
+    def test_resume_is_not_a_public_blob(self):
+        name = self.application.resume.name
+        self.assertFalse(name.startswith('blobs/'))
+        self.assertTrue(private_storage().exists(name))
+        self.assertFalse(default_storage.exists(name))
+        self.assertEqual(self.application.resume.url, self.url)
+
+    def test_only_applicant_and_staff_download(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user('curioso'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        for user in [self.applicant, User.objects.create_user('rh', is_staff=True)]:
+            self.client.force_login(user)
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 cv')
+            self.assertIn('no-store', response['Cache-Control'])
+
+    def test_resume_is_deleted_with_application(self):
+        name = self.application.resume.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.application.delete()
+        self.assertFalse(private_storage().exists(name))
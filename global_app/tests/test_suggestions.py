@@ -0,0 +1,73 @@
+import importlib
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from global_app.models import FriendSuggestion, Friendship
+from global_app.suggestions import rebuild_for
+
+backfill = importlib.import_module('global_app.migrations.0028_backfill_friend_suggestions')
+
+
+def befriend(user, friend):
+    Friendship.objects.create(user=user, friend=friend)
+    Friendship.objects.create(user=friend, friend=user)
+
+
+def unfriend(user, friend):
+    Friendship.objects.filter(user=user, friend=friend).delete()
+    Friendship.objects.filter(user=friend, friend=user).delete()
+
+
+def stored(user):
+    return list(FriendSuggestion.objects.filter(user=user).order_by('candidate_id').values_list('candidate_id', 'score'))
+
+
+class SuggestionBackfillTests(TestCase):
+    def test_backfill_matches_rebuild(self):
+        users = [User.objects.create_user(f'u{i}') for i in range(6)]
+        for a, b in [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (4, 5)]:
+            befriend(users[a], users[b])
+        # Como ficaria uma base migrada antes da 0012
+        FriendSuggestion.objects.all().delete()
+
+        backfill.backfill_friend_suggestions(apps, None)
+        backfilled = {user.id: stored(user) for user in users}
+        for user in users:
+            rebuild_for(user)
+        self.assertEqual(backfilled, {user.id: stored(user) for user in users})
+        self.assertEqual(backfilled[users[0].id], [(users[3].id, 2)])
+
+
+class IncrementalSuggestionTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'u{i}') for i in range(7)]
+
+    def assertMatchesRebuild(self):
+        incremental = {user.id: stored(user) for user in self.users}
+        for user in self.users:
+            rebuild_for(user)
+        self.assertEqual(incremental, {user.id: stored(user) for user in self.users})
+
+    def test_create_and_delete_match_rebuild(self):
+        u = self.users
+        for a, b in [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (4, 5), (1, 5), (5, 6)]:
+            befriend(u[a], u[b])
+        self.assertMatchesRebuild()
+        self.assertEqual(stored(u[0]), [(u[3].id, 2), (u[5].id, 1)])
+
+        unfriend(u[1], u[3])
+        self.assertMatchesRebuild()
+        # Os ex-amigos voltam a ser sugestão um do outro pelos amigos em comum
+        befriend(u[0], u[3])
+        unfriend(u[0], u[3])
+        self.assertMatchesRebuild()
+
+    def test_friends_are_not_suggested(self):
+        u = self.users
+        befriend(u[0], u[1])
+        befriend(u[1], u[2])
+        befriend(u[0], u[2])
+        self.assertEqual(stored(u[0]), [])
+        self.assertMatchesRebuild()
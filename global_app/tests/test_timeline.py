@@ -0,0 +1,89 @@
+import importlib
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from global_app import timeline
+from global_app.models import Friendship, Post, TimelineEntry
+from global_app.timeline import read_timeline
+
+backfill = importlib.import_module('global_app.migrations.0026_backfill_timeline')
+
+
+def befriend(user, friend):
+    Friendship.objects.create(user=user, friend=friend)
+    Friendship.objects.create(user=friend, friend=user)
+
+
+def unfriend(user, friend):
+    Friendship.objects.filter(user=user, friend=friend).delete()
+    Friendship.objects.filter(user=friend, friend=user).delete()
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        # Com limite 1, quem tem dois amigos já tem fan-out na leitura
+        patcher = mock.patch.object(timeline, 'FANOUT_FRIEND_LIMIT', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.reader = User.objects.create_user('leitor')
+        self.friend = User.objects.create_user('amigo')
+        self.celebrity = User.objects.create_user('famosa')
+        self.stranger = User.objects.create_user('estranho')
+        befriend(self.reader, self.friend)
+        befriend(self.reader, self.celebrity)
+        befriend(self.celebrity, self.stranger)
+
+        self.clock = timezone.now()
+        authors = [self.reader, self.friend, self.celebrity, self.stranger]
+        # Vários posts no mesmo instante: o id desempata
+        for i, step in enumerate([0, 1, 1, 1, 2, 3, 3, 4, 5, 5, 5, 6]):
+            self.post(authors[i % len(authors)], self.clock + timedelta(seconds=step))
+
+    def post(self, author, when):
+        with mock.patch('django.utils.timezone.now', return_value=when), \
+                self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(author=author, content=f'{author.username} {when}')
+
+    def expected(self, *authors):
+        return list(
+            Post.objects.filter(author__in=authors).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def read_all(self, limit=2):
+        seen, cursor = [], None
+        while True:
+            ids, cursor = read_timeline(self.reader, cursor, limit)
+            seen += ids
+            if cursor is None:
+                return seen
+
+    def test_pages_merge_both_sources_in_order(self):
+        self.assertTrue(Post.objects.filter(author=self.celebrity, fanout_on_read=True).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, author=self.celebrity).exists())
+        expected = self.expected(self.reader, self.friend, self.celebrity)
+        for limit in (1, 2, 3, 50):
+            self.assertEqual(self.read_all(limit), expected, limit)
+
+    def test_unfriending_removes_both_kinds_of_posts(self):
+        unfriend(self.reader, self.friend)
+        self.assertEqual(self.read_all(), self.expected(self.reader, self.celebrity))
+        unfriend(self.reader, self.celebrity)
+        self.assertEqual(self.read_all(), self.expected(self.reader))
+
+    def test_new_friend_brings_recent_posts(self):
+        befriend(self.reader, self.stranger)
+        self.assertEqual(self.read_all(), self.expected(self.reader, self.friend, self.celebrity, self.stranger))
+
+    def test_backfill_migration_rebuilds_timelines(self):
+        expected = self.read_all()
+        TimelineEntry.objects.all().delete()
+        Post.objects.update(fanout_on_read=False)
+        with mock.patch.object(backfill, 'FANOUT_FRIEND_LIMIT', 1):
+            backfill.backfill_timeline(apps, None)
+        self.assertEqual(self.read_all(), expected)
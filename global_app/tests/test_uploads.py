@@ -0,0 +1,143 @@
+import io
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from global_app.models import Application, Opportunity, Post
+from global_app.storage import private_storage
+from global_app.tests.utils import ClientTestCase
+from global_app.uploads import DOCX_TYPE, MB, ODT_TYPE, UPLOAD_LIMITS, sniff_content_type, zip_document_type
+
+MEDIA_ROOT = tempfile.mkdtemp()
+PRIVATE_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+    shutil.rmtree(PRIVATE_MEDIA_ROOT, ignore_errors=True)
+
+
+PDF = b'%PDF-1.4\n' + b'0' * 64
+EXE = b'MZ' + b'\0' * 64
+
+
+def zipped(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+DOCX = zipped([('[Content_Types].xml', '<Types/>'), ('word/document.xml', '<w:document/>')])
+ODT = zipped([('mimetype', ODT_TYPE), ('content.xml', '<office:document-content/>')])
+OTHER_ZIP = zipped([('programa.exe', 'MZ' * 100)])
+
+
+class SniffTests(TestCase):
+    def test_signatures(self):
+        self.assertEqual(sniff_content_type(PDF[:16]), 'application/pdf')
+        self.assertEqual(sniff_content_type(b'RIFF\0\0\0\0WEBPVP8 '), 'image/webp')
+        self.assertEqual(sniff_content_type(DOCX[:16]), 'application/zip')
+        self.assertIsNone(sniff_content_type(EXE[:16]))
+
+    def test_zip_contents(self):
+        self.assertEqual(zip_document_type(io.BytesIO(DOCX)), DOCX_TYPE)
+        self.assertEqual(zip_document_type(io.BytesIO(ODT)), ODT_TYPE)
+        self.assertIsNone(zip_document_type(io.BytesIO(OTHER_ZIP)))
+        self.assertIsNone(zip_document_type(io.BytesIO(DOCX[:40])))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ResumeUploadTests(ClientTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(private_storage(), 'location', PRIVATE_MEDIA_ROOT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user('candidato')
+        self.client.force_login(self.user)
+
+    def apply(self, name, data):
+        opportunity = Opportunity.objects.create(title='Vaga', company='Empresa', description='Descrição')
+        response = self.client.post(f'/api/opportunities/apply/{opportunity.id}/', {
+            'cover_letter': 'Olá',
+            'resume': SimpleUploadedFile(name, data, content_type='application/pdf'),
+        })
+        return response, Application.objects.filter(opportunity=opportunity).first()
+
+    def test_documents_are_accepted(self):
+        for name, data in [('cv.pdf', PDF), ('cv.docx', DOCX), ('cv.odt', ODT)]:
+            response, application = self.apply(name, data)
+            self.assertEqual(response.status_code, 200, name)
+            self.assertTrue(private_storage().exists(application.resume.name))
+
+    def test_wrong_type_is_rejected(self):
+        # O tipo vem do conteúdo, não do nome nem do content-type enviado
+        for name, data in [('cv.pdf', EXE), ('cv.docx', OTHER_ZIP), ('cv.pdf', b'%PD')]:
+            response, application = self.apply(name, data)
+            self.assertEqual(response.status_code, 400, name)
+            self.assertEqual(response.json()['error'], 'Tipo de arquivo não permitido.')
+            self.assertIsNone(application)
+
+    def test_too_large_is_rejected(self):
+        response, application = self.apply('cv.pdf', PDF + b'0' * UPLOAD_LIMITS['resume'])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('excede o limite', response.json()['error'])
+        self.assertIsNone(application)
+
+    def test_json_without_resume_still_works(self):
+        opportunity = Opportunity.objects.create(title='Vaga', company='Empresa', description='Descrição')
+        response = self.client.post(
+            f'/api/opportunities/apply/{opportunity.id}/', {'cover_letter': 'Olá'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageUploadTests(ClientTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('autor')
+        self.client.force_login(self.user)
+
+    def test_post_with_non_image_shows_error(self):
+        response = self.client.post('/feed/', {'content': 'oi', 'image': SimpleUploadedFile('foto.png', PDF)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].errors['image'], ['Tipo de arquivo não permitido.'])
+        self.assertFalse(Post.objects.exists())
+
+    def test_avatar_limit(self):
+        self.assertEqual(UPLOAD_LIMITS['avatar'], 5 * MB)
+        data = b'\x89PNG\r\n\x1a\n' + b'0' * UPLOAD_LIMITS['avatar']
+        response = self.client.post('/profile/edit/', {'avatar': SimpleUploadedFile('a.png', data)})
+        self.assertIn('excede o limite', str(response.context['form'].errors['avatar']))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AdminUploadTests(ClientTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(private_storage(), 'location', PRIVATE_MEDIA_ROOT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(self.admin)
+
+    def test_rejected_resume_is_reported(self):
+        opportunity = Opportunity.objects.create(title='Vaga', company='Empresa', description='Descrição')
+        application = Application.objects.create(opportunity=opportunity, user=self.admin)
+        response = self.client.post(f'/admin/global_app/application/{application.id}/change/', {
+            'opportunity': opportunity.id,
+            'user': self.admin.id,
+            'status': 'pending',
+            'cover_letter': '',
+            'admin_notes': '',
+            'resume': SimpleUploadedFile('cv.docx', OTHER_ZIP),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['adminform'].form.errors['resume'], ['Tipo de arquivo não permitido.'])
+        application.refresh_from_db()
+        self.assertFalse(application.resume)
@@ -0,0 +1,36 @@
+import asyncio
+
+from django.test import TestCase
+
+from global_app import chat, presence
+from global_app.websocket import LocalClient
+
+
+class ClientTestCase(TestCase):
+    """
+    TestCase para views: os heartbeats de presença do middleware são
+    gravados ainda dentro do teste, e não no atexit, quando o banco de
+    teste já foi apagado.
+    """
+
+    def tearDown(self):
+        presence.tracker.flush()
+        super().tearDown()
+
+
+class WebSocketTestCase(TestCase):
+    """TestCase para os handlers de /ws/ pelo LocalClient (cada teste async tem o seu event loop)"""
+
+    async def connect(self, path, user, **kwargs):
+        client = LocalClient(path, user, **kwargs)
+        self.assertTrue(await client.connect())
+        return client
+
+    async def close(self, *clients):
+        for client in clients:
+            await client.close()
+        # O flusher do chat pertence ao event loop deste teste
+        for task, wake in list(chat._flushers.values()):
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        chat._flushers.clear()
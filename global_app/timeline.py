@@ -0,0 +1,92 @@
+from django.conf import settings
+
+from .models import Friendship, Post, TimelineEntry
+from .pagination import FEED_PAGE_SIZE, decode_cursor, encode_cursor, keyset_page
+
+# Acima deste número de amigos o post não é copiado para cada timeline,
+# e os amigos o buscam na leitura
+FANOUT_FRIEND_LIMIT = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 1000)
+
+# Quantos posts recentes de um novo amigo entram na timeline
+BACKFILL_POSTS = getattr(settings, 'TIMELINE_BACKFILL_POSTS', 50)
+
+BULK_BATCH_SIZE = 500
+
+
+def _entries_for(post, user_ids):
+    return [
+        TimelineEntry(user_id=user_id, post_id=post.id, author_id=post.author_id, created_at=post.created_at)
+        for user_id in user_ids
+    ]
+
+
+def fan_out_post(post):
+    """Materializa um novo post na timeline do autor e dos amigos dele"""
+    friend_ids = list(
+        Friendship.objects.filter(user_id=post.author_id)
+        .values_list('friend_id', flat=True)[:FANOUT_FRIEND_LIMIT + 1]
+    )
+
+    if len(friend_ids) > FANOUT_FRIEND_LIMIT:
+        # Autor com muitos amigos: só o autor recebe a entrada
+        Post.objects.filter(id=post.id).update(fanout_on_read=True)
+        post.fanout_on_read = True
+        friend_ids = []
+
+    TimelineEntry.objects.bulk_create(
+        _entries_for(post, [post.author_id] + friend_ids),
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_friend_posts(user, friend):
+    """Copia os posts recentes de um novo amigo para a timeline do usuário"""
+    posts = Post.objects.filter(author=friend, fanout_on_read=False).only('id', 'author_id', 'created_at')[:BACKFILL_POSTS]
+    TimelineEntry.objects.bulk_create(
+        [entry for post in posts for entry in _entries_for(post, [user.id])],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def remove_friend_posts(user, friend):
+    """Remove da timeline do usuário os posts de quem deixou de ser amigo"""
+    TimelineEntry.objects.filter(user=user, author=friend).delete()
+
+
+def read_timeline(user, cursor=None, limit=FEED_PAGE_SIZE):
+    """
+    Retorna (ids dos posts, próximo_cursor) da timeline do usuário.
+    As entradas materializadas são uma leitura por índice em TimelineEntry;
+    apenas os posts de autores com fan-out na leitura são buscados em Post.
+    """
+    position = decode_cursor(cursor)
+
+    entries, entries_cursor = keyset_page(
+        TimelineEntry.objects.filter(user=user).only('post_id', 'created_at'),
+        position, limit, id_field='post_id',
+    )
+    pulled, pulled_cursor = keyset_page(
+        Post.objects.filter(
+            fanout_on_read=True,
+            author__in=Friendship.objects.filter(user=user).values('friend'),
+        ).only('id', 'created_at'),
+        position, limit,
+    )
+
+    # Junta as duas fontes na mesma ordem (created_at, id) decrescente
+    merged = sorted(
+        {(entry.created_at, entry.post_id) for entry in entries} |
+        {(post.created_at, post.id) for post in pulled},
+        reverse=True,
+    )
+
+    has_more = len(merged) > limit or entries_cursor or pulled_cursor
+    merged = merged[:limit]
+
+    next_cursor = None
+    if has_more and merged:
+        next_cursor = encode_cursor(*merged[-1])
+
+    return [post_id for _, post_id in merged], next_cursor
@@ -0,0 +1,146 @@
+import zipfile
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+MB = 1024 * 1024
+
+# Tamanho máximo por campo de upload (o nome do campo no formulário)
+UPLOAD_LIMITS = {
+    'avatar': 5 * MB,
+    'image': 10 * MB,
+    'resume': 10 * MB,
+    **getattr(settings, 'UPLOAD_FIELD_LIMITS', {}),
+}
+DEFAULT_UPLOAD_LIMIT = getattr(settings, 'UPLOAD_DEFAULT_LIMIT', 10 * MB)
+
+IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp'}
+DOCX_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+ODT_TYPE = 'application/vnd.oasis.opendocument.text'
+DOCUMENT_TYPES = {'application/pdf', 'application/msword', DOCX_TYPE, ODT_TYPE}
+# Tipos que chegam como zip e só são confirmados pelo conteúdo do arquivo
+ZIP_TYPES = {DOCX_TYPE, ODT_TYPE}
+
+# Tipos aceitos por campo, pelo conteúdo e não pelo que o navegador informa
+ALLOWED_TYPES = {
+    'avatar': IMAGE_TYPES,
+    'image': IMAGE_TYPES,
+    'resume': DOCUMENT_TYPES,
+}
+
+# Assinaturas dos primeiros bytes de cada tipo aceito
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword'),
+    # .docx/.odt são arquivos zip
+    (b'PK\x03\x04', 'application/zip'),
+]
+SNIFF_BYTES = 16
+
+
+def sniff_content_type(head):
+    """Descobre o tipo do arquivo pelos primeiros bytes (None se desconhecido)"""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def zip_document_type(file):
+    """
+    Tipo do documento dentro de um zip: .docx ([Content_Types].xml e a
+    pasta word/) ou .odt (entrada mimetype). None para qualquer outro zip.
+    """
+    try:
+        with zipfile.ZipFile(file) as archive:
+            entries = {info.filename: info for info in archive.infolist()}
+            mimetype = entries.get('mimetype')
+            if mimetype is not None and mimetype.file_size < 100:
+                if archive.read(mimetype).strip() == ODT_TYPE.encode():
+                    return ODT_TYPE
+            if '[Content_Types].xml' in entries and any(name.startswith('word/') for name in entries):
+                return DOCX_TYPE
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, OSError):
+        pass
+    return None
+
+
+def upload_errors(request):
+    """Arquivos recusados pelo BoundedUploadHandler neste request ({campo: mensagem})"""
+    # Acessar FILES garante que o corpo já foi lido pelos handlers
+    request.FILES
+    return getattr(request, 'upload_errors', {})
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Grava os uploads direto em arquivo temporário, bloco a bloco, e recusa
+    o arquivo assim que ele passa do limite do campo ou quando os primeiros
+    bytes não são de um tipo aceito. Nada do arquivo fica em memória.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.limit = UPLOAD_LIMITS.get(field_name, DEFAULT_UPLOAD_LIMIT)
+        self.allowed_types = ALLOWED_TYPES.get(field_name)
+        self.head = b''
+        self.sniffed_type = None
+
+        if self.content_length and self.content_length > self.limit:
+            self._reject(f'O arquivo excede o limite de {filesizeformat(self.limit)}.')
+
+    def _record_error(self, message):
+        if self.request is not None:
+            if not hasattr(self.request, 'upload_errors'):
+                self.request.upload_errors = {}
+            self.request.upload_errors[self.field_name] = message
+
+    def _reject(self, message):
+        self._record_error(message)
+        # O parser fecha (e apaga) o temporário e descarta o resto do arquivo
+        raise SkipFile(message)
+
+    def _type_allowed(self):
+        self.sniffed_type = sniff_content_type(self.head)
+        if self.allowed_types is None or self.sniffed_type in self.allowed_types:
+            return True
+        # Um zip passa por enquanto; o conteúdo é conferido no file_complete
+        return self.sniffed_type == 'application/zip' and bool(self.allowed_types & ZIP_TYPES)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.limit:
+            self._reject(f'O arquivo excede o limite de {filesizeformat(self.limit)}.')
+
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES and not self._type_allowed():
+                self._reject('Tipo de arquivo não permitido.')
+
+        return super().receive_data_chunk(raw_data, start)
+
+    def _discard(self, message):
+        # Aqui o parser não trata SkipFile, então o arquivo é descartado devolvendo None
+        self._record_error(message)
+        self.file.close()
+        return None
+
+    def file_complete(self, file_size):
+        # Arquivo menor que a assinatura: verifica agora
+        if len(self.head) < SNIFF_BYTES and not self._type_allowed():
+            return self._discard('Tipo de arquivo não permitido.')
+        if self.sniffed_type == 'application/zip' and self.allowed_types is not None:
+            self.file.seek(0)
+            self.sniffed_type = zip_document_type(self.file)
+            if self.sniffed_type not in self.allowed_types:
+                return self._discard('Tipo de arquivo não permitido.')
+        uploaded = super().file_complete(file_size)
+        if self.sniffed_type:
+            uploaded.content_type = self.sniffed_type
+        return uploaded
@@ -17,6 +17,7 @@ urlpatterns = [
     # Rotas de gerais
     path('friends/', friends, name='friends'),
     path('work_ai/', work_ai, name='work_ai'),
+    path('work_ai/<int:session_id>/', work_ai, name='work_ai_session'),
     path('privacy_policy/', privacy_policy, name='privacy_policy'),
     path('terms_of_use/', terms_of_use, name='terms_of_use'),
     
@@ -25,8 +26,10 @@ urlpatterns = [
     path('opportunities/<int:opportunity_id>/', opportunity_detail, name='opportunity_detail'),
 
     path('feed/', feed, name='feed'),
+    path('api/feed/posts/', feed_posts, name='feed_posts'),
     path('calls/', calls, name='calls'),
     path('chat/', chat, name='chat'),
+    path('chat/<str:username>/', chat, name='chat_with'),
     
     # Rota para curtir/descurtir posts
     path('post/<int:post_id>/like/', toggle_like, name='toggle_like'),
@@ -47,4 +50,10 @@ urlpatterns = [
     # Rotas para oportunidades
     path('api/opportunities/apply/<int:opportunity_id>/', apply_opportunity, name='apply_opportunity'),
     path('api/opportunities/cancel/<int:application_id>/', cancel_application, name='cancel_application'),
+    
+    # Chat
+    path('api/chat/<int:conversation_id>/messages/', chat_messages, name='chat_messages'),
+    
+    # Assistente
+    path('api/work_ai/stream/', work_ai_stream, name='work_ai_stream'),
 ]
\ No newline at end of file
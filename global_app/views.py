@@ -3,15 +3,49 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib import messages
 from django.urls import reverse
-from django.http import JsonResponse
-from .forms import SignUpForm, PostForm, ProfileEditForm
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from .forms import SignUpForm, PostForm, ProfileEditForm, ApplicationForm
 from django.contrib.auth.forms import AuthenticationForm
 from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Post, Like, Profile, Friendship, FriendRequest, Opportunity, Application
-from django.db.models import Q
-from django.views.decorators.http import require_POST
+from .models import Post, Like, Profile, Friendship, FriendRequest, Opportunity, Application, Conversation, ConversationParticipant, AIChatSession
+from django.db import transaction
+from django.db.models import Q, F, Case, When, Value, BooleanField, Exists, OuterRef
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django.views.decorators.http import require_POST, require_GET
+from .pagination import MAX_PK, parse_page_size
+from .timeline import read_timeline
+from .fragments import attach_post_cards
+from . import presence
+from . import matchmaking
+from . import signaling
+from .suggestions import suggested_users as get_suggested_users
+from .friendships import mutual_friends as get_mutual_friends, resolve_friendship_status
+from .search import user_index, search_user_ids, search_opportunities
+from .matching import recommended_opportunities
+from .images import rendition_url
+from .storage import is_blob, private_storage
+from .uploads import upload_errors
+from .assistant import MAX_PROMPT_LENGTH, start_turn, response_stream
+from .chat import HISTORY_SIZE, message_buffer, recent_messages, mark_read, serialize_message, unread_counts
+from django.views.static import serve as static_serve
 import json
+import os
+import time
+
+FRIENDS_PAGE_SIZE = 20
+OPPORTUNITIES_PAGE_SIZE = 10
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Nomes de status usados pelo template de perfil público
+PROFILE_FRIENDSHIP_STATUS = {
+    'friend': 'friend',
+    'sent': 'request_sent',
+    'received': 'request_received',
+    'none': 'none',
+}
 
 def home(request):
     return render(request, 'pages/home.html')
@@ -86,43 +120,19 @@ def profile(request, username=None):
         return render(request, 'pages/profile.html', context)
     
     # Se não é o próprio perfil, renderiza o template de perfil público
-    # Verificar status de amizade
-    is_friend = Friendship.objects.filter(user=request.user, friend=user).exists()
-    
-    # Verificar se existe solicitação pendente
-    friend_request = FriendRequest.objects.filter(
-        Q(from_user=request.user, to_user=user) | 
-        Q(from_user=user, to_user=request.user),
-        status='pending'
-    ).first()
-    
-    friendship_status = 'none'
-    friend_request_id = None
-    
-    if is_friend:
-        friendship_status = 'friend'
-    elif friend_request:
-        if friend_request.from_user == request.user:
-            friendship_status = 'request_sent'
-        else:
-            friendship_status = 'request_received'
-        friend_request_id = friend_request.id
+    # Verificar status de amizade (mesmo resolvedor da busca e do feed)
+    status, friend_request_id = resolve_friendship_status(request.user, [user])[user.id]
+    friendship_status = PROFILE_FRIENDSHIP_STATUS[status]
     
     # Buscar posts do usuário
-    user_posts = Post.objects.filter(author=user).select_related('author', 'author__profile').prefetch_related('likes')[:10]
-    
-    # Adicionar informação se o usuário curtiu cada post
-    for post in user_posts:
-        post.user_has_liked = post.likes.filter(user=request.user).exists()
+    # (curtidas e se o usuário curtiu vêm anotadas na mesma query)
+    user_posts = Post.objects.filter(author=user).select_related('author', 'author__profile').with_viewer_state(request.user)[:10]
     
     # Contar amigos do usuário
     friends_count = Friendship.objects.filter(user=user).count()
     
-    # Buscar amigos em comum
-    user_friends = Friendship.objects.filter(user=user).values_list('friend_id', flat=True)
-    my_friends = Friendship.objects.filter(user=request.user).values_list('friend_id', flat=True)
-    mutual_friend_ids = set(user_friends).intersection(set(my_friends))
-    mutual_friends = User.objects.filter(id__in=mutual_friend_ids).select_related('profile')[:10]
+    # Buscar amigos em comum (interseção feita no banco, com cache por par)
+    mutual_friends_count, mutual_friends = get_mutual_friends(request.user, user)
     
     context = {
         'user': user,
@@ -134,47 +144,25 @@ def profile(request, username=None):
         'user_posts_count': user_posts.count(),
         'friends_count': friends_count,
         'mutual_friends': mutual_friends,
+        'mutual_friends_count': mutual_friends_count,
     }
     
     return render(request, 'pages/public_profile.html', context)
 
 @login_required
 def feed(request):
-    # Buscar usuários sugeridos excluindo:
-    # - O próprio usuário
-    # - Usuários que já são amigos
-    # - Usuários com solicitação pendente
+    # Sugestões pré-calculadas por amigos em comum (lidas pelo índice)
+    suggested_users = get_suggested_users(request.user)
+    statuses = resolve_friendship_status(request.user, suggested_users)
+    for suggested_user in suggested_users:
+        suggested_user.friendship_status, suggested_user.friend_request_id = statuses[suggested_user.id]
     
-    # IDs dos amigos atuais
-    friend_ids = Friendship.objects.filter(user=request.user).values_list('friend_id', flat=True)
-    
-    # IDs de usuários com solicitação pendente (enviada ou recebida)
-    pending_request_ids = list(FriendRequest.objects.filter(
-        Q(from_user=request.user) | Q(to_user=request.user),
-        status='pending'
-    ).values_list('to_user_id', 'from_user_id'))
-    
-    # Flatten a lista de tuplas e remover duplicatas
-    pending_ids = set()
-    for id_tuple in pending_request_ids:
-        pending_ids.update(id_tuple)
-    pending_ids.discard(request.user.id)  # Remover o próprio usuário se estiver
-    
-    # Buscar usuários que NÃO são amigos e NÃO têm solicitação pendente
-    suggested_users = User.objects.exclude(
-        id__in=list(friend_ids) + list(pending_ids) + [request.user.id]
-    ).select_related('profile').order_by('?')[:5]
-    
-    # Buscar todos os posts (ordenados por data)
-    posts = Post.objects.select_related('author', 'author__profile').prefetch_related('likes')
-    
-    # Adicionar informação se o usuário curtiu cada post
-    for post in posts:
-        post.user_has_liked = post.likes.filter(user=request.user).exists()
+    # Primeira página da timeline (as próximas são carregadas pelo feed_posts)
+    posts, next_cursor = _feed_page(request)
     
     # Formulário para criar novo post
     if request.method == 'POST':
-        form = PostForm(request.POST, request.FILES)
+        form = PostForm(request.POST, request.FILES, upload_errors=upload_errors(request))
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
@@ -187,40 +175,167 @@ def feed(request):
     context = {
         'suggested_users': suggested_users,
         'posts': posts,
+        'next_cursor': next_cursor,
         'form': form
     }
     return render(request, 'pages/feed.html', context)
 
+def _feed_page(request, cursor=None, limit=None):
+    """Retorna uma página da timeline (amigos + próprios posts) e o próximo cursor"""
+    post_ids, next_cursor = read_timeline(request.user, cursor, parse_page_size(limit))
+    
+    # Curtidas e estado do usuário anotados: custo fixo de queries por página
+    posts_by_id = Post.objects.select_related('author', 'author__profile').with_viewer_state(request.user).in_bulk(post_ids)
+    posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+    
+    # HTML dos cards vem do cache de fragmentos
+    attach_post_cards(posts)
+    
+    return posts, next_cursor
+
+@login_required
+@require_GET
+def feed_posts(request):
+    """Retorna a próxima página do feed em JSON para a rolagem infinita"""
+    posts, next_cursor = _feed_page(request, request.GET.get('cursor'), request.GET.get('limit'))
+    
+    html = ''.join(
+        render_to_string('components/post_card.html', {'post': post}, request=request)
+        for post in posts
+    )
+    
+    return JsonResponse({
+        'html': html,
+        'count': len(posts),
+        'next_cursor': next_cursor,
+    })
+
 @login_required
 def calls(request):
-    suggested_users = User.objects.exclude(id=request.user.id).select_related('profile')[:5]
+    """Busca de chamada aleatória; o pareamento acontece pelo /ws/calls/"""
+    # Parceiros recentes deste processo (os mesmos que a fila evita repetir)
+    partner_ids = matchmaking.recent_partner_ids(request.user.id)
+    partners = User.objects.filter(id__in=partner_ids).select_related('profile').in_bulk()
     
     context = {
-        'suggested_users': suggested_users
+        'recent_partners': [partners[user_id] for user_id in partner_ids if user_id in partners],
     }
     return render(request, 'pages/calls.html', context)
 
+def _can_chat_with(request, other_user):
+    """
+    Uma conversa nova só começa entre amigos ou entre os dois usuários que o
+    pareamento de /calls/ juntou (a sala vem em ?room=). Conversas que já
+    existem continuam abertas, mesmo depois de desfeita a amizade.
+    """
+    user = request.user
+    if Friendship.objects.filter(user=user, friend=other_user).exists():
+        return True
+    if Conversation.objects.filter(key=Conversation.key_for(user.id, other_user.id)).exists():
+        return True
+    return signaling.room_allows(request.GET.get('room', ''), {user.id, other_user.id})
+
 @login_required
-def chat(request):
-    return render(request, 'pages/chat.html')
+def chat(request, username=None):
+    """Chat com um usuário (ou a conversa mais recente). As mensagens novas chegam pelo /ws/chat/"""
+    if username:
+        other_user = get_object_or_404(User, username=username)
+        if other_user == request.user:
+            return redirect('chat')
+        if not _can_chat_with(request, other_user):
+            messages.error(request, 'Você só pode conversar com seus amigos.')
+            return redirect('friends')
+        conversation = Conversation.between(request.user, other_user)
+    else:
+        conversation = Conversation.objects.filter(participants=request.user).order_by('-updated_at').first()
+        other_user = conversation.participants.exclude(id=request.user.id).first() if conversation else None
+    
+    if conversation:
+        # Grava o que ainda está no buffer antes de ler o histórico
+        mark_read(conversation.id, request.user.id)
+    
+    # Conversas recentes para trocar de chat, com as não lidas de cada uma
+    recent = list(Conversation.objects.filter(participants=request.user).order_by('-updated_at')[:20])
+    others = {
+        membership.conversation_id: membership.user
+        for membership in ConversationParticipant.objects.filter(conversation__in=recent)
+        .exclude(user=request.user).select_related('user')
+    }
+    unread = unread_counts(request.user)
+    recent_chats = []
+    for recent_conversation in recent:
+        chat_user = others.get(recent_conversation.id)
+        if chat_user and recent_conversation.id != getattr(conversation, 'id', None):
+            chat_user.unread_count = unread.get(recent_conversation.id, 0)
+            recent_chats.append(chat_user)
+    
+    history = recent_messages(conversation) if conversation else []
+    context = {
+        'conversation': conversation,
+        'other_user': other_user,
+        'chat_messages': history,
+        'has_older_messages': len(history) == HISTORY_SIZE,
+        'recent_chats': recent_chats,
+    }
+    return render(request, 'pages/chat.html', context)
+
+@login_required
+@require_GET
+def chat_messages(request, conversation_id):
+    """Mensagens anteriores a ?before=<id> (botão "carregar anteriores" do chat)"""
+    if not ConversationParticipant.objects.filter(conversation_id=conversation_id, user=request.user).exists():
+        return JsonResponse({'success': False, 'error': 'Conversa não encontrada'}, status=404)
+    
+    try:
+        before = int(request.GET['before']) if request.GET.get('before') else None
+        limit = int(request.GET['limit']) if request.GET.get('limit') else HISTORY_SIZE
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Parâmetros inválidos'}, status=400)
+    if before is not None and not 0 < before < MAX_PK:
+        return JsonResponse({'success': False, 'error': 'Parâmetros inválidos'}, status=400)
+    limit = parse_page_size(limit, default=HISTORY_SIZE)
+    
+    if before is None:
+        message_buffer.flush()
+    # Uma a mais para saber se ainda há mensagens antes desta página
+    page = recent_messages(conversation_id, limit=limit + 1, before=before)
+    has_more = len(page) > limit
+    page = page[1:] if has_more else page
+    
+    return JsonResponse({
+        'success': True,
+        'messages': [
+            serialize_message(message, message.sender.get_full_name() or message.sender.username)
+            for message in page
+        ],
+        'next_before': page[0].id if has_more else None,
+    })
 
 @login_required
 def toggle_like(request, post_id):
     """View para curtir/descurtir um post via AJAX"""
     if request.method == 'POST':
         post = get_object_or_404(Post, id=post_id)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
         
-        if not created:
-            # Se já curtiu, remove a curtida
-            like.delete()
-            liked = False
-        else:
-            liked = True
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            
+            if not created:
+                # Se já curtiu, remove a curtida (0 se outra requisição já removeu)
+                deleted, _ = like.delete()
+                liked = False
+                delta = -deleted
+            else:
+                liked = True
+                delta = 1
+            
+            # Atualiza o contador no banco, sem COUNT na tabela de curtidas
+            Post.objects.filter(id=post.id).update(like_count=F('like_count') + delta)
+            total_likes = Post.objects.filter(id=post.id).values_list('like_count', flat=True).get()
         
         return JsonResponse({
             'liked': liked,
-            'total_likes': post.total_likes()
+            'total_likes': total_likes
         })
     
     return JsonResponse({'error': 'Método não permitido'}, status=405)
@@ -277,26 +392,71 @@ def update_font_size(request):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 @login_required
-def work_ai(request):
-    return render(request, 'pages/work_ai.html')
+def work_ai(request, session_id=None):
+    """Assistente (Connexa AI); as respostas chegam pelo work_ai_stream"""
+    session = get_object_or_404(AIChatSession, id=session_id, user=request.user) if session_id else None
+    
+    context = {
+        'ai_session': session,
+        'ai_messages': session.messages.all() if session else [],
+        'recent_sessions': AIChatSession.objects.filter(user=request.user).only('id', 'title', 'updated_at')[:20],
+    }
+    return render(request, 'pages/work_ai.html', context)
+
+@login_required
+@require_POST
+def work_ai_stream(request):
+    """Grava a pergunta e transmite a resposta do assistente em Server-Sent Events"""
+    started = time.perf_counter()
+    content = request.POST.get('message', '').strip()
+    if not content or len(content) > MAX_PROMPT_LENGTH:
+        return JsonResponse({'success': False, 'error': 'Mensagem vazia ou longa demais'}, status=400)
+    
+    session_id = request.POST.get('session') or None
+    if session_id is not None:
+        try:
+            session_id = int(session_id)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Chat inválido'}, status=400)
+    
+    session, history = start_turn(request.user, content, session_id)
+    if session is None:
+        return JsonResponse({'success': False, 'error': 'Chat não encontrado'}, status=404)
+    
+    response = StreamingHttpResponse(
+        response_stream(request, session, history, started),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Sem buffer no proxy (nginx), para cada pedaço chegar na hora
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 def friends(request):
     """View principal da página de amigos"""
-    # Buscar todos os amigos do usuário
-    friendships = Friendship.objects.filter(user=request.user).select_related('friend', 'friend__profile')
-    friends_list = [f.friend for f in friendships]
-    
-    # Separar amigos online e offline baseado no status real
-    online_friends = []
-    offline_friends = []
-    
-    for friend in friends_list:
-        # Verificar se o amigo tem profile e se está online
-        if hasattr(friend, 'profile') and friend.profile and friend.profile.is_online():
-            online_friends.append(friend)
-        else:
-            offline_friends.append(friend)
+    # Online: atividade recente gravada no banco ou heartbeat ainda no buffer
+    threshold = timezone.now() - presence.ONLINE_WINDOW
+    # Só os amigos entre os do buffer: o IN fica do tamanho da interseção, não do site todo
+    friend_ids = Friendship.objects.filter(user=request.user).values_list('friend_id', flat=True)
+    buffered_online = presence.tracker.online_user_ids(among=friend_ids)
+    online_q = Q(friend__profile__last_activity__gt=threshold) | Q(friend_id__in=buffered_online)
+    
+    # O banco separa online e offline, e cada seção é paginada
+    friendships = Friendship.objects.filter(user=request.user).select_related('friend', 'friend__profile').annotate(
+        is_online=Case(When(online_q, then=Value(True)), default=Value(False), output_field=BooleanField())
+    )
+    online_page = Paginator(
+        friendships.filter(is_online=True).order_by('-friend__profile__last_activity', 'friend_id'),
+        FRIENDS_PAGE_SIZE,
+    ).get_page(request.GET.get('online_page'))
+    offline_page = Paginator(
+        friendships.filter(is_online=False).order_by('friend__username'),
+        FRIENDS_PAGE_SIZE,
+    ).get_page(request.GET.get('offline_page'))
+    
+    online_friends = [f.friend for f in online_page]
+    offline_friends = [f.friend for f in offline_page]
     
     # Buscar solicitações recebidas pendentes
     received_requests = FriendRequest.objects.filter(
@@ -313,6 +473,8 @@ def friends(request):
     context = {
         'online_friends': online_friends,
         'offline_friends': offline_friends,
+        'online_page': online_page,
+        'offline_page': offline_page,
         'received_requests': received_requests,
         'sent_requests': sent_requests,
     }
@@ -454,43 +616,30 @@ def search_users(request):
         return JsonResponse({'users': []})
     
     # Buscar usuários excluindo o próprio usuário
-    users = User.objects.filter(
-        Q(username__icontains=query) | 
-        Q(first_name__icontains=query) | 
-        Q(last_name__icontains=query)
-    ).exclude(id=request.user.id).select_related('profile')[:10]
+    if user_index.available:
+        # Índice FTS5: prefixos ranqueados e sem diferença de acentos
+        user_ids = [user_id for user_id in search_user_ids(query, limit=11) if user_id != request.user.id][:10]
+        users_by_id = User.objects.select_related('profile').in_bulk(user_ids)
+        users = [users_by_id[user_id] for user_id in user_ids if user_id in users_by_id]
+    else:
+        users = User.objects.filter(
+            Q(username__icontains=query) | 
+            Q(first_name__icontains=query) | 
+            Q(last_name__icontains=query)
+        ).exclude(id=request.user.id).select_related('profile')[:10]
+    
+    # Status de amizade da página inteira com um número fixo de queries
+    statuses = resolve_friendship_status(request.user, users)
     
-    # Verificar status de amizade para cada usuário
     results = []
     for user in users:
-        # Verificar se já são amigos
-        is_friend = Friendship.objects.filter(user=request.user, friend=user).exists()
-        
-        # Verificar se existe solicitação pendente
-        pending_request = FriendRequest.objects.filter(
-            Q(from_user=request.user, to_user=user) | 
-            Q(from_user=user, to_user=request.user),
-            status='pending'
-        ).first()
-        
-        status = 'none'
-        request_id = None
-        
-        if is_friend:
-            status = 'friend'
-        elif pending_request:
-            if pending_request.from_user == request.user:
-                status = 'sent'
-                request_id = pending_request.id
-            else:
-                status = 'received'
-                request_id = pending_request.id
+        status, request_id = statuses[user.id]
         
         results.append({
             'id': user.id,
             'username': user.username,
             'full_name': user.get_full_name() or user.username,
-            'avatar': user.profile.avatar.url if user.profile and user.profile.avatar else None,
+            'avatar': rendition_url(user.profile.avatar, 'thumb') if user.profile and user.profile.avatar else None,
             'bio': user.profile.bio if user.profile else '',
             'status': status,
             'request_id': request_id
@@ -503,38 +652,41 @@ def opportunities(request):
     """View principal da página de oportunidades"""
     # Filtros
     opportunity_type = request.GET.get('type', '')
-    search_query = request.GET.get('q', '')
-    
-    # Buscar oportunidades abertas
-    opportunities_list = Opportunity.objects.filter(status='open')
-    
-    # Aplicar filtros
-    if opportunity_type:
-        opportunities_list = opportunities_list.filter(type=opportunity_type)
-    
-    if search_query:
-        opportunities_list = opportunities_list.filter(
-            Q(title__icontains=search_query) |
-            Q(company__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
-    
-    opportunities_list = opportunities_list.order_by('-created_at')
-    
-    # Verificar quais oportunidades o usuário já se inscreveu
-    user_applications = Application.objects.filter(user=request.user).values_list('opportunity_id', flat=True)
-    
-    for opp in opportunities_list:
-        opp.user_applied = opp.id in user_applications
-    
-    # Buscar inscrições do usuário
-    user_applications_list = Application.objects.filter(user=request.user).select_related('opportunity').order_by('-applied_at')
+    work_mode = request.GET.get('work_mode', '')
+    skill = request.GET.get('skill', '')
+    search_query = request.GET.get('q', '').strip()
+    
+    # Buscar oportunidades abertas aplicando busca textual, filtros e facets
+    opportunities_list, facets = search_opportunities(
+        Opportunity.objects.open(),
+        search_query,
+        {'type': opportunity_type, 'work_mode': work_mode, 'skill': skill},
+    )
+    
+    # Sem busca textual, as mais recentes primeiro (com busca, por relevância)
+    if not search_query:
+        opportunities_list = opportunities_list.order_by('-created_at')
+    
+    # Se o usuário já se inscreveu vem anotado na mesma query da página
+    opportunities_list = opportunities_list.annotate(
+        user_applied=Exists(Application.objects.filter(opportunity=OuterRef('pk'), user=request.user))
+    )
+    opportunities_page = Paginator(opportunities_list, OPPORTUNITIES_PAGE_SIZE).get_page(request.GET.get('page'))
+    
+    # Buscar inscrições do usuário (apenas as exibidas na lateral)
+    user_applications = Application.objects.filter(user=request.user)
+    user_applications_list = user_applications.select_related('opportunity').order_by('-applied_at')[:5]
     
     context = {
-        'opportunities': opportunities_list,
+        'opportunities': opportunities_page,
         'user_applications': user_applications_list,
+        'user_applications_count': user_applications.count(),
+        'recommended_opportunities': recommended_opportunities(request.user),
         'current_type': opportunity_type,
+        'current_work_mode': work_mode,
+        'current_skill': skill,
         'search_query': search_query,
+        'facets': facets,
     }
     
     return render(request, 'pages/opportunities.html', context)
@@ -553,6 +705,7 @@ def opportunity_detail(request, opportunity_id):
     context = {
         'opportunity': opportunity,
         'user_application': user_application,
+        'skill_tags': opportunity.skill_tags.all(),
     }
     
     return render(request, 'pages/opportunity_detail.html', context)
@@ -576,17 +729,22 @@ def apply_opportunity(request, opportunity_id):
         if Application.objects.filter(opportunity=opportunity, user=request.user).exists():
             return JsonResponse({'success': False, 'error': 'Você já se inscreveu nesta oportunidade'}, status=400)
         
-        # Pegar dados do formulário
-        data = json.loads(request.body)
-        cover_letter = data.get('cover_letter', '')
-        
-        # Criar inscrição
-        application = Application.objects.create(
-            opportunity=opportunity,
-            user=request.user,
-            cover_letter=cover_letter,
-            status='pending'
-        )
+        # Formulário multipart (carta + currículo); JSON só com a carta
+        if request.content_type == 'application/json':
+            form = ApplicationForm(json.loads(request.body))
+        else:
+            form = ApplicationForm(request.POST, request.FILES, upload_errors=upload_errors(request))
+        if not form.is_valid():
+            error = next(iter(form.errors.values()))[0]
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        
+        # O contador de inscrições é atualizado pelo post_save, na mesma transação
+        with transaction.atomic():
+            application = form.save(commit=False)
+            application.opportunity = opportunity
+            application.user = request.user
+            application.status = 'pending'
+            application.save()
         
         return JsonResponse({
             'success': True,
@@ -609,6 +767,7 @@ def cancel_application(request, application_id):
         if application.status != 'pending':
             return JsonResponse({'success': False, 'error': 'Não é possível cancelar esta inscrição'}, status=400)
         
+        # O delete roda numa transação, com o post_delete que desconta o contador
         application.delete()
         
         return JsonResponse({
@@ -619,6 +778,31 @@ def cancel_application(request, application_id):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
     
+def serve_media(request, path):
+    """
+    Serve os arquivos de MEDIA_ROOT em desenvolvimento (DEBUG). Os blobs têm
+    o nome igual ao hash do conteúdo e nunca mudam, então podem ficar em
+    cache por um ano; em produção o servidor web manda o mesmo cabeçalho.
+    """
+    response = static_serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_blob(path):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+@login_required
+def serve_private_media(request, path):
+    """Currículo de uma inscrição: só para o candidato e para a equipe"""
+    application = Application.objects.filter(resume=path).only('user_id').first()
+    if application is None or not (request.user.is_staff or application.user_id == request.user.id):
+        raise Http404
+    
+    storage = private_storage()
+    if not storage.exists(path):
+        raise Http404
+    response = FileResponse(storage.open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
 def privacy_policy(request):
     return render(request, 'pages/privacy_policy.html')
 
@@ -635,7 +819,8 @@ def edit_profile(request):
             request.POST, 
             request.FILES, 
             instance=profile,
-            user=request.user
+            user=request.user,
+            upload_errors=upload_errors(request)
         )
         
         if form.is_valid():
@@ -0,0 +1,193 @@
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.http.request import split_domain_port, validate_host
+from django.utils.http import is_same_domain
+from django.utils.module_loading import import_string
+
+
+class WebSocketDisconnect(Exception):
+    pass
+
+
+class WebSocket:
+    """Conexão WebSocket sobre o protocolo ASGI, trocando mensagens em JSON"""
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self._receive = receive
+        self._send = send
+        self.user = AnonymousUser()
+        self.closed = False
+
+    async def accept(self):
+        message = await self._receive()
+        if message['type'] != 'websocket.connect':
+            raise WebSocketDisconnect()
+        await self._send({'type': 'websocket.accept'})
+
+    async def close(self, code=1000):
+        if not self.closed:
+            self.closed = True
+            await self._send({'type': 'websocket.close', 'code': code})
+
+    async def send_json(self, data):
+        await self._send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+    async def receive_json(self):
+        """Próxima mensagem do cliente; mensagens que não são JSON viram {}"""
+        message = await self._receive()
+        if message['type'] == 'websocket.disconnect':
+            self.closed = True
+            raise WebSocketDisconnect()
+        try:
+            data = json.loads(message.get('text') or message.get('bytes') or '')
+        except (TypeError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+class _SessionRequest:
+    """O mínimo de request que o get_user precisa"""
+
+    def __init__(self, session):
+        self.session = session
+
+
+def _load_user(session_key):
+    engine = import_string(settings.SESSION_ENGINE)
+    return get_user(_SessionRequest(engine.SessionStore(session_key)))
+
+
+async def authenticate(scope):
+    """Usuário da sessão (cookie sessionid) do handshake"""
+    if 'user' in scope:
+        # Já resolvido antes (middleware ASGI ou LocalClient)
+        return scope['user']
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return AnonymousUser()
+    return await sync_to_async(_load_user)(morsel.value)
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def origin_allowed(scope):
+    """
+    O navegador manda o cookie de sessão no handshake de qualquer página,
+    então só aceitamos conexões vindas das nossas: Origin precisa ser um
+    host de ALLOWED_HOSTS ou estar em CSRF_TRUSTED_ORIGINS.
+    """
+    origin = _header(scope, b'origin')
+    if not origin:
+        return False
+    parsed = urlsplit(origin)
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return False
+
+    for trusted in getattr(settings, 'CSRF_TRUSTED_ORIGINS', []):
+        if origin == trusted:
+            return True
+        scheme, _, host = trusted.partition('://')
+        if '*' in host and parsed.scheme == scheme and is_same_domain(parsed.netloc, host.replace('*', '', 1)):
+            return True
+
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        # Mesmo padrão do Django para o host em desenvolvimento
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    domain, _ = split_domain_port(parsed.netloc)
+    return bool(domain) and validate_host(domain, allowed_hosts)
+
+
+# Caminho -> handler async(websocket). Os módulos de tempo real se registram aqui
+ROUTES = {}
+
+
+def route(path):
+    def register(handler):
+        ROUTES[path] = handler
+        return handler
+    return register
+
+
+async def websocket_application(scope, receive, send):
+    """Aplicação ASGI para conexões WebSocket autenticadas pela sessão"""
+    websocket = WebSocket(scope, receive, send)
+    handler = ROUTES.get(scope['path'])
+    if handler is None:
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    # Antes de olhar a sessão: bloqueia o sequestro por páginas de outros sites
+    if not origin_allowed(scope):
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+
+    websocket.user = await authenticate(scope)
+    if not websocket.user.is_authenticated:
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    try:
+        await handler(websocket)
+    except WebSocketDisconnect:
+        pass
+
+
+class LocalClient:
+    """
+    Cliente WebSocket em processo: fala direto com a aplicação ASGI, sem
+    rede, para testes e scripts. O usuário é passado já autenticado e o
+    Origin padrão é o primeiro host de ALLOWED_HOSTS (origin='' não manda).
+    """
+
+    def __init__(self, path, user, application=websocket_application, origin=None):
+        if origin is None:
+            hosts = [host for host in settings.ALLOWED_HOSTS if host != '*']
+            origin = 'http://%s' % (hosts[0].lstrip('.') if hosts else 'localhost')
+        headers = [(b'origin', origin.encode('latin-1'))] if origin else []
+        self.scope = {'type': 'websocket', 'path': path, 'headers': headers, 'user': user}
+        self.application = application
+        self._to_app = asyncio.Queue()
+        self._from_app = asyncio.Queue()
+        self._task = None
+
+    async def connect(self, timeout=1):
+        """Retorna True se o servidor aceitou a conexão"""
+        self._task = asyncio.create_task(self.application(self.scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({'type': 'websocket.connect'})
+        message = await asyncio.wait_for(self._from_app.get(), timeout)
+        return message['type'] == 'websocket.accept'
+
+    async def send_json(self, data):
+        await self._to_app.put({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def receive_json(self, timeout=1):
+        message = await asyncio.wait_for(self._from_app.get(), timeout)
+        if message['type'] == 'websocket.close':
+            raise WebSocketDisconnect(message.get('code'))
+        return json.loads(message['text'])
+
+    async def close(self):
+        await self._to_app.put({'type': 'websocket.disconnect', 'code': 1000})
+        if self._task is not None:
+            await asyncio.wait_for(self._task, 1)
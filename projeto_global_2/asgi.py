@@ -2,6 +2,9 @@
 ASGI config for projeto_global_2 project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run with an ASGI server so WebSockets work, e.g.:
+
+    uvicorn projeto_global_2.asgi:application
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +16,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projeto_global_2.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importado depois do setup do Django (os handlers usam os models)
+from global_app.websocket import websocket_application  # noqa: E402
+import global_app.chat  # noqa: E402,F401  registra /ws/chat/
+import global_app.matchmaking  # noqa: E402,F401  registra /ws/calls/
+import global_app.signaling  # noqa: E402,F401  registra /ws/signal/
+
+
+async def application(scope, receive, send):
+    """HTTP vai para o Django; WebSocket para os handlers de tempo real"""
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
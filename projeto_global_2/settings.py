@@ -84,6 +84,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Usado pelos fragmentos do feed; pode ser trocado por FileBasedCache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'connecta-fiap',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+FEED_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -143,6 +160,35 @@ MESSAGE_TAGS = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Arquivos que não podem ser públicos (currículos): fora de MEDIA_ROOT e
+# servidos só pela view serve_private_media, que confere o acesso
+PRIVATE_MEDIA_URL = '/private-media/'
+PRIVATE_MEDIA_ROOT = BASE_DIR / 'private_media'
+
+# Uploads gravados em disco bloco a bloco, com limite de tamanho e tipo por campo
+FILE_UPLOAD_HANDLERS = [
+    'global_app.uploads.BoundedUploadHandler',
+]
+
+# Uploads deduplicados pelo hash do conteúdo (global_app.storage). Em
+# produção o servidor web serve MEDIA_URL e deve mandar
+# "Cache-Control: public, max-age=31536000, immutable" em /media/blobs/
+STORAGES = {
+    'default': {
+        'BACKEND': 'global_app.storage.ContentAddressedStorage',
+    },
+    'private': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': PRIVATE_MEDIA_ROOT,
+            'base_url': PRIVATE_MEDIA_URL,
+        },
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 JAZZMIN_SETTINGS = {
     # title of the window (Will default to current_admin_site.site_title if absent or None)
     "site_title": "Admin",
@@ -237,6 +283,12 @@ JAZZMIN_SETTINGS = {
             "url": "make_messages", 
             "icon": "fas fa-comments",
             "permissions": ["books.view_book"]
+        }],
+        "global_app": [{
+            "name": "Fila de Revisão",
+            "url": "admin:global_app_application_review_queue",
+            "icon": "fas fa-tasks",
+            "permissions": ["global_app.view_application"]
         }]
     },
 
@@ -1,12 +1,17 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from global_app.views import serve_media, serve_private_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', include('global_app.urls'))
+    path('', include('global_app.urls')),
+    # Currículos: sempre pelo Django, que confere quem pode baixar
+    re_path(r'^%s(?P<path>.*)$' % settings.PRIVATE_MEDIA_URL.lstrip('/'), serve_private_media, name='private_media'),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Em produção /media/ é servido pelo servidor web (ver STORAGES no settings)
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
+    ]